@@ -0,0 +1,321 @@
+"""
+명찰 생성 파이프라인 벤치마크.
+
+합성 참석자 엑셀(1k/10k/50k 행, sample 여러 개)과 합성 템플릿(text/image/group/connector)을 만들고,
+단계별(read_excel_data, create_from_slide, SlideDrawer.draw, prs.save) 시간과 최대 RSS를
+케이스마다 새 프로세스에서 측정해 benchmarks/results/에 JSON으로 저장합니다.
+
+    python benchmarks/bench.py
+    python benchmarks/bench.py --rows 1000 --templates text image --engines clone drawer
+    python benchmarks/bench.py --compare benchmarks/results/old.json benchmarks/results/new.json
+    python benchmarks/bench.py --startup-only
+
+RPC 모드 시작 시간(main.py --rpc가 준비 메시지를 출력할 때까지, 그리고 첫 get_excel_header 응답까지)도 함께 측정해
+STARTUP_TARGET과 비교합니다.
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import statistics
+import subprocess
+from io import BytesIO
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+BENCH_DIR = os.path.join(ROOT, "benchmarks")
+FIXTURE_DIR = os.path.join(BENCH_DIR, "fixtures")
+RESULT_DIR = os.path.join(BENCH_DIR, "results")
+
+TEMPLATES = ["text", "image", "group", "connector"]
+ROWS = [1000, 10000, 50000]
+NUM_SAMPLES = 3
+LABELS = ["name", "role", "campus"]
+# Electron 앱이 실행 직후 기다리는 "Python RPC mode ready"까지의 목표 시간 (초)
+STARTUP_TARGET = 0.3
+STARTUP_RUNS = 5
+
+# ---------------------------------------------------------------- fixtures
+
+def make_workbook(path: str, rows: int, num_samples: int = NUM_SAMPLES, seed: int = 0):
+    from openpyxl import Workbook
+
+    rnd = random.Random(seed)
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(["Sample Num", "Name", "Role", "Campus"])
+    for i in range(rows):
+        ws.append([
+            i % num_samples,
+            "".join(rnd.choice("가나다라마바사아자차카타파하") for _ in range(3)),
+            rnd.choice(["Staff", "Speaker", "Attendee", "Volunteer"]),
+            f"Campus {rnd.randint(1, 40)}",
+        ])
+    wb.save(path)
+
+def _png(seed: int, size: int = 256) -> BytesIO:
+    from PIL import Image
+
+    rnd = random.Random(seed)
+    image = Image.new("RGB", (size, size))
+    image.putdata([(rnd.randrange(256), rnd.randrange(256), rnd.randrange(256)) for _ in range(size * size)])
+    stream = BytesIO()
+    image.save(stream, format="PNG")
+    stream.seek(0)
+    return stream
+
+def _add_labels(shapes, left, top):
+    from pptx.util import Cm, Pt
+
+    for i, label in enumerate(LABELS):
+        box = shapes.add_textbox(left, top + Cm(1.2 * i), Cm(6), Cm(1))
+        box.text_frame.text = label
+        box.text_frame.paragraphs[0].runs[0].font.size = Pt(20 - 4 * i)
+
+def _draw_sample(slide, kind: str, sample_num: int):
+    from pptx.enum.shapes import MSO_CONNECTOR, MSO_SHAPE
+    from pptx.util import Cm
+
+    shapes = slide.shapes
+    left, top = Cm(2), Cm(2)
+    if kind == "text":
+        shapes.add_shape(MSO_SHAPE.ROUNDED_RECTANGLE, left, top, Cm(9), Cm(5.5))
+        _add_labels(shapes, left + Cm(1), top + Cm(1))
+    elif kind == "image":
+        shapes.add_picture(_png(sample_num * 10), left, top, Cm(9), Cm(5.5))
+        shapes.add_picture(_png(sample_num * 10 + 1, 128), left + Cm(6.5), top + Cm(0.5), Cm(2), Cm(2))
+        shapes.add_picture(_png(sample_num * 10 + 2, 128), left + Cm(6.5), top + Cm(3), Cm(2), Cm(2))
+        _add_labels(shapes, left + Cm(0.5), top + Cm(1))
+    elif kind == "group":
+        group = shapes.add_group_shape()
+        group.shapes.add_shape(MSO_SHAPE.RECTANGLE, left, top, Cm(9), Cm(5.5))
+        inner = group.shapes.add_group_shape()
+        inner.shapes.add_shape(MSO_SHAPE.OVAL, left + Cm(7), top + Cm(0.5), Cm(1.5), Cm(1.5))
+        _add_labels(inner.shapes, left + Cm(1), top + Cm(1))
+    elif kind == "connector":
+        boxes = []
+        for i, label in enumerate(LABELS):
+            box = shapes.add_shape(MSO_SHAPE.RECTANGLE, left + Cm(3.2 * i), top + Cm(1.5 * (i % 2)), Cm(2.8), Cm(1.2))
+            box.text_frame.text = label
+            boxes.append(box)
+        for begin, end in zip(boxes, boxes[1:]):
+            connector = shapes.add_connector(MSO_CONNECTOR.STRAIGHT, 0, 0, 0, 0)
+            connector.begin_connect(begin, 3)
+            connector.end_connect(end, 1)
+    else:
+        raise ValueError(f"Unknown template: {kind}")
+
+def make_template(path: str, kind: str, num_samples: int = NUM_SAMPLES):
+    from pptx import Presentation
+
+    prs = Presentation()
+    for sample_num in range(num_samples):
+        slide = prs.slides.add_slide(prs.slide_layouts[6])
+        _draw_sample(slide, kind, sample_num)
+    prs.save(path)
+
+def fixture(name: str, build) -> str:
+    path = os.path.join(FIXTURE_DIR, name)
+    if not os.path.exists(path):
+        os.makedirs(FIXTURE_DIR, exist_ok=True)
+        build(path)
+    return path
+
+# ---------------------------------------------------------------- case (child process)
+
+def _peak_rss_mb() -> float:
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+        except ImportError:
+            return None
+        return psutil.Process().memory_info().peak_wset / 2**20
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux는 KB, macOS는 byte 단위
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+def run_case(pptx: str, excel: str, engine: str, output: str) -> dict:
+    from pptx import Presentation
+    from src.draw_nametag import NameTagDrawer
+    from src.compile_nametag import CompiledNameTag
+    from src.draw_slide import SlideDrawer
+    from src.utils import read_excel_data, headed_data_with_sample_num, group_by_sample
+
+    stages = {}
+    def timed(stage, func, *args):
+        start = time.perf_counter()
+        result = func(*args)
+        stages[stage] = stages.get(stage, 0.0) + time.perf_counter() - start
+        return result
+
+    header, data = timed("read_excel_data", read_excel_data, excel)
+    data_by_sample = timed("group_by_sample", lambda: group_by_sample(headed_data_with_sample_num(header, data)))
+    del header, data
+
+    prs = timed("open_template", Presentation, pptx)
+    for sample_num, rows in data_by_sample.items():
+        sample = timed("create_from_slide", NameTagDrawer.create_from_slide, prs.slides[sample_num])
+        if engine == "clone":
+            sample = timed("compile", CompiledNameTag.compile, sample)
+        timed("draw", SlideDrawer(prs, sample_num, rows, sample=sample).draw)
+
+    timed("save", prs.save, output)
+    return {
+        "stages": stages,
+        "total": sum(stages.values()),
+        "slides": len(prs.slides),
+        "output_mb": os.path.getsize(output) / 2**20,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+# ---------------------------------------------------------------- runner
+
+def _git(*args) -> str:
+    try:
+        return subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def _spawn_case(pptx: str, excel: str, engine: str) -> dict:
+    output = os.path.join(FIXTURE_DIR, f"out-{os.getpid()}.pptx")
+    # 배포 빌드(build.ps1의 python -O)와 같은 조건에서 재도록 -O로 실행 (assert 검사가 빠짐)
+    proc = subprocess.run(
+        [sys.executable, "-O", os.path.abspath(__file__), "--run-case", pptx, excel, engine, output],
+        capture_output=True, text=True, cwd=ROOT,
+    )
+    if os.path.exists(output):
+        os.remove(output)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f"exit code {proc.returncode}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+def _spawn_startup(excel: str) -> dict:
+    """main.py --rpc를 새로 띄워 준비 메시지까지, 그리고 첫 요청의 응답까지 걸린 시간을 잽니다."""
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-O", os.path.join(ROOT, "main.py"), "--rpc"],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, encoding="utf-8", cwd=ROOT,
+    )
+    try:
+        if "ready" not in proc.stdout.readline():
+            raise RuntimeError("main.py --rpc did not report ready")
+        ready = time.perf_counter() - start
+        proc.stdin.write(json.dumps({"id": 1, "task": "get_excel_header", "data": {"excel": excel}}) + "\n")
+        proc.stdin.flush()
+        proc.stdout.readline()
+        first_request = time.perf_counter() - start
+    finally:
+        proc.stdin.close()
+        proc.wait()
+    return {"ready": ready, "first_request": first_request}
+
+def measure_startup(runs: int = STARTUP_RUNS) -> dict:
+    excel = fixture("attendees-1000.xlsx", lambda path: make_workbook(path, 1000))
+    samples = [_spawn_startup(excel) for _ in range(runs)]
+    startup = {key: statistics.median(sample[key] for sample in samples) for key in samples[0]}
+    startup["target"] = STARTUP_TARGET
+    startup["passed"] = startup["ready"] <= STARTUP_TARGET
+    return startup
+
+def _print_startup(startup: dict):
+    verdict = "ok" if startup["passed"] else "SLOW"
+    print(f"startup    ready={startup['ready']:.3f}s (target {startup['target']:.1f}s, {verdict}) first_request={startup['first_request']:.3f}s", flush=True)
+
+def _median_case(runs: list[dict]) -> dict:
+    result = dict(runs[0])
+    result["stages"] = {stage: statistics.median(run["stages"][stage] for run in runs) for stage in runs[0]["stages"]}
+    result["total"] = statistics.median(run["total"] for run in runs)
+    result["peak_rss_mb"] = max((run["peak_rss_mb"] or 0) for run in runs) or None
+    return result
+
+def run_all(templates: list[str], rows_list: list[int], engines: list[str], repeat: int = 1) -> dict:
+    results = {
+        "commit": _git("rev-parse", "HEAD"),
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "cases": [],
+    }
+    results["startup"] = measure_startup()
+    _print_startup(results["startup"])
+    for kind in templates:
+        pptx = fixture(f"template-{kind}.pptx", lambda path: make_template(path, kind))
+        for rows in rows_list:
+            excel = fixture(f"attendees-{rows}.xlsx", lambda path: make_workbook(path, rows))
+            for engine in engines:
+                case = {"template": kind, "rows": rows, "engine": engine}
+                try:
+                    case.update(_median_case([_spawn_case(pptx, excel, engine) for _ in range(repeat)]))
+                except RuntimeError as e:
+                    case["error"] = str(e)
+                results["cases"].append(case)
+                _print_case(case)
+    return results
+
+def _print_case(case: dict):
+    name = f"{case['template']:<10} {case['rows']:>6} {case['engine']:<7}"
+    if "error" in case:
+        print(f"{name} ERROR {case['error']}", flush=True)
+        return
+    stages = " ".join(f"{stage}={seconds:.3f}" for stage, seconds in case["stages"].items())
+    rss = f"{case['peak_rss_mb']:.0f}MB" if case["peak_rss_mb"] else "n/a"
+    print(f"{name} total={case['total']:.3f}s rss={rss} | {stages}", flush=True)
+
+def compare(old_path: str, new_path: str):
+    with open(old_path, encoding="utf-8") as f:
+        old = json.load(f)
+    with open(new_path, encoding="utf-8") as f:
+        new = json.load(f)
+
+    old_cases = {(c["template"], c["rows"], c["engine"]): c for c in old["cases"] if "error" not in c}
+    print(f"{(old['commit'] or '?')[:8]} -> {(new['commit'] or '?')[:8]}")
+    if "startup" in old and "startup" in new:
+        print(f"startup    ready={new['startup']['ready'] / old['startup']['ready']:.2f}x first_request={new['startup']['first_request'] / old['startup']['first_request']:.2f}x")
+    for case in new["cases"]:
+        key = (case["template"], case["rows"], case["engine"])
+        if key not in old_cases or "error" in case:
+            continue
+        base = old_cases[key]
+        ratios = " ".join(
+            f"{stage}={case['stages'][stage] / base['stages'][stage]:.2f}x"
+            for stage in case["stages"] if base["stages"].get(stage)
+        )
+        print(f"{key[0]:<10} {key[1]:>6} {key[2]:<7} total={case['total'] / base['total']:.2f}x | {ratios}")
+
+def get_args():
+    parser = argparse.ArgumentParser(description="Benchmark the nametag generation pipeline")
+    parser.add_argument("--templates", nargs="+", choices=TEMPLATES, default=TEMPLATES, help="Synthetic templates to run")
+    parser.add_argument("--rows", nargs="+", type=int, default=ROWS, help="Attendee counts of the synthetic workbooks")
+    parser.add_argument("--engines", nargs="+", choices=["clone", "drawer"], default=["clone"], help="Engines to run")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per case; stage times are the median")
+    parser.add_argument("--output", type=str, help="Result JSON path (default: benchmarks/results/<time>-<commit>.json)")
+    parser.add_argument("--startup-only", action="store_true", help="Only measure the RPC startup time")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="Compare two result files instead of running")
+    parser.add_argument("--run-case", nargs=4, metavar=("PPTX", "EXCEL", "ENGINE", "OUTPUT"), help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = get_args()
+    if args.run_case:
+        print(json.dumps(run_case(*args.run_case)))
+    elif args.compare:
+        compare(*args.compare)
+    elif args.startup_only:
+        startup = measure_startup(max(args.repeat, STARTUP_RUNS))
+        _print_startup(startup)
+        sys.exit(0 if startup["passed"] else 1)
+    else:
+        results = run_all(args.templates, args.rows, args.engines, args.repeat)
+        output = args.output or os.path.join(RESULT_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{(results['commit'] or 'nogit')[:8]}.json")
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Saved: {output}")
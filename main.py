@@ -4,15 +4,24 @@ import sys
 import json
 import logging
 import argparse
+import multiprocessing
+
+import threading
 
 from dataclasses import dataclass
-from pptx import Presentation
-from pptx.enum.shapes import MSO_SHAPE_TYPE
-from tkinter import filedialog, messagebox
+from typing import TYPE_CHECKING
+
+# 시작 시간을 줄이기 위해 python-pptx/openpyxl을 쓰는 모듈(그리기, 저장, 엑셀 읽기)과 tkinter는
+# 처음 쓰는 메서드 안에서 import합니다. 여기서는 가벼운 모듈만 import합니다.
+from src.batch import load_batch_manifest, run_batch, write_report
+from src.cache import FileCache, TemplateEntry
+from src.job import Job, JobCancelled
+from src.rpc import RPCServer
+from src.profiler import Profiler, measure, profiling
 
-from src.draw_slide import SlideDrawer
-from src.utils import get_data_by_sample, open_file_with_default_program, read_excel_data
-from src.gui import get_args_by_gui
+if TYPE_CHECKING:
+    from src.incremental import IncrementalBuild
+    from src.stream_writer import StreamingPptxWriter
 
 logging.basicConfig(level=logging.WARNING, format='%(levelname)s: %(message)s')
 
@@ -30,13 +39,34 @@ def get_args():
     parser.add_argument("--padding_x", type=float, default=0.0, help="Padding of nametag in x direction. unit: cm")
     parser.add_argument("--padding_y", type=float, default=0.0, help="Padding of nametag in y direction. unit: cm")
     parser.add_argument("--per_slide", type=int, help="Number of nametags per slide")
+    parser.add_argument("--label_template", type=str, help="Place nametags on the cells of a label sheet from the catalog (e.g. 'FORMTEC 3100'), or 'auto' to read it from the pptx. Margin and padding are ignored")
+    parser.add_argument("--engine", type=str, choices=["clone", "drawer"], default="clone", help="clone: stamp pre-compiled sample XML (fast), drawer: rebuild each shape through python-pptx")
+    parser.add_argument("--workers", type=int, default=1, help="Number of processes that render pages in parallel")
+    parser.add_argument("--profile", action="store_true", help="Time each stage (excel read, compile, draw per shape type, save) and print the report")
+    parser.add_argument("--output", type=str, help="Output pptx path. If omitted, a save dialog is shown")
+    parser.add_argument("--stream", action="store_true", help="Write each finished slide straight to the output file to keep memory flat")
+    parser.add_argument("--incremental", action="store_true", help="Reuse pages of the previous output whose rows did not change (needs --output)")
+    parser.add_argument("--pack", action="store_true", help="Pack nametags of different samples onto shared pages instead of one grid per sample")
+    parser.add_argument("--fit_text", action="store_true", help="Shrink the font of substituted text that would overflow its text box")
+    parser.add_argument("--photo_column", type=str, help="Excel column with a photo file path per attendee, placed into the sample's picture placeholder")
+    parser.add_argument("--photo_cache", type=str, help="Folder that keeps converted photos between runs. Default: <temp>/nametag-photos")
+    parser.add_argument("--split_pages", type=int, help="Split the output into files of at most this many pages")
+    parser.add_argument("--split_mb", type=float, help="Split the output into files of about at most this size. unit: MB")
+    parser.add_argument("--split_column", type=str, help="Write one file per value of this excel column (e.g. campus)")
+    parser.add_argument("--cache_mb", type=int, default=512, help="Memory budget of the parsed file cache kept between RPC requests. unit: MB")
+    parser.add_argument("--batch", type=str, help="Run every job of a JSON/YAML manifest without any dialog and write a summary report")
+    parser.add_argument("--batch_workers", type=int, default=1, help="Number of processes that run batch jobs at the same time")
+    parser.add_argument("--report", type=str, help="Path of the batch summary report. Default: <manifest>.report.json")
     parser.add_argument("--gui", action="store_true", help="Use Tkinter GUI to select files and set parameters")
     parser.add_argument("--rpc", action="store_true", help="Pass arguments through JSON (Electron IPC)") # RPC: Remote Procedure Call
     args = parser.parse_args()
 
     if args.rpc:
         args.gui = True
+    elif args.batch:
+        args.gui = False
     elif not args.excel or not args.pptx or args.gui:
+        from src.gui import get_args_by_gui
         args = get_args_by_gui(args)
         args.gui = True
     return args
@@ -77,25 +107,73 @@ class GenerateRequest:
     padding_x: float = 0.0
     padding_y: float = 0.0
     per_slide: int = None
+    label_template: str = None
+    engine: str = "clone"
+    workers: int = 1
+    profile: bool = False
+    output: str = None
+    stream: bool = False
+    incremental: bool = False
+    pack: bool = False
+    fit_text: bool = False
+    photo_column: str = None
+    photo_cache: str = None
+    split_pages: int = None
+    split_mb: float = None
+    split_column: str = None
+
+    @property
+    def split(self) -> bool:
+        return bool(self.split_pages or self.split_mb or self.split_column)
 
     def __post_init__(self):
         assert_file_valid(self.pptx)
         assert_file_valid(self.excel)
+        if self.engine not in ("clone", "drawer"):
+            raise ValueError(f"Unknown engine: {self.engine}")
+        if self.workers < 1:
+            raise ValueError("workers must be a positive integer")
+        if self.output is not None and not os.path.isdir(os.path.dirname(os.path.abspath(self.output))):
+            raise ValueError(f"Output folder does not exist: {self.output}")
+        if self.incremental and self.workers > 1:
+            raise ValueError("incremental cannot be combined with workers > 1")
+        if self.pack and (self.workers > 1 or self.incremental):
+            raise ValueError("pack cannot be combined with workers > 1 or incremental")
+        if self.label_template and self.pack:
+            raise ValueError("label_template cannot be combined with pack")
+        if self.label_template and self.label_template != "auto":
+            from src.label_template.catalog import find_label_template
+            find_label_template(self.label_template)
+        if self.photo_column and (self.workers > 1 and not self.split or self.incremental):
+            raise ValueError("photo_column cannot be combined with workers > 1 (unless the output is split) or incremental")
+        if self.split_pages is not None and self.split_pages < 1:
+            raise ValueError("split_pages must be a positive integer")
+        if self.split_mb is not None and self.split_mb <= 0:
+            raise ValueError("split_mb must be a positive number")
+        if self.split and (self.stream or self.incremental or self.pack):
+            raise ValueError("Splitting the output cannot be combined with stream, incremental or pack")
 
 class TaskManger:
-    def __init__(self, is_gui):
+    def __init__(self, is_gui, cache_mb=512, open_output=True, ask_output=True):
         self.is_gui = is_gui
+        self.open_output = open_output
+        # False면 output이 없을 때 저장 대화상자 대신 오류를 반환함
+        self.ask_output = ask_output
+        self.cache = FileCache(cache_mb * 1024 * 1024)
         self.tasks = {
             "get_excel_header": (self.get_excel_header, GetExcelHeaderRequest),
             "get_pptx_slide_text": (self.get_pptx_slide_text, GetPptxTextRequest),
             "generate_pptx": (self.generate_pptx, GenerateRequest),
         }
 
-    def process_request(self, request):
+    def handle_request(self, request, job: Job = None):
         task = request.get("task")
         data = request.get("data", {})
+        job = job or Job(request.get("id"))
 
         response = {"task": task}
+        if "id" in request:
+            response["id"] = request["id"]
         if task in self.tasks:
             function, dataclass_type = self.tasks[task]
             try:
@@ -105,77 +183,322 @@ class TaskManger:
             except TypeError as e:
                 response.update({"status": "developer_error", "message": f"Invalid parameters for {task}: {str(e)}"})
             else:
-                _response = function(request_data)
+                try:
+                    job.check()
+                    _response = function(request_data, job)
+                except JobCancelled as e:
+                    _response = {"status": "cancelled", "message": str(e)}
                 response.update(_response)
+                if job.warnings:
+                    response["warnings"] = job.warnings
         else:
             response.update({"status": "developer_error", "message": f"Unknown task: {task}"})
-
-        print(json.dumps(response, ensure_ascii=False), flush=True)
+        return response
     
-    def get_excel_header(self, data: GetExcelHeaderRequest):
-        headers, _ = read_excel_data(data.excel)
+    def get_excel_header(self, data: GetExcelHeaderRequest, job: Job = None):
+        from src.utils import read_excel_header
+        headers = self.cache.get(data.excel, "excel_header", read_excel_header)
         return {"status": "success", "headers": headers}
 
-    def get_pptx_slide_text(self, data: GetPptxTextRequest):
-        prs = Presentation(data.pptx)
-        slides_text = []
-        for slide in prs.slides:
-            slide_text = []
-            shapes_to_process = list(slide.shapes)
-            for shape in shapes_to_process:
-                if shape.has_text_frame and shape.text_frame.text.strip():
-                    slide_text.append(shape.text_frame.text.strip())
-                elif hasattr(shape, 'shapes') and shape.shape_type == MSO_SHAPE_TYPE.GROUP:
-                    shapes_to_process.extend(shape.shapes)
-            slides_text.append(slide_text)
+    def get_pptx_slide_text(self, data: GetPptxTextRequest, job: Job = None):
+        from src.utils import read_pptx_slide_text
+        slides_text = self.cache.get(data.pptx, "pptx_text", read_pptx_slide_text)
         return {"status": "success", "slides": slides_text}
     
-    def generate_pptx(self, data: GenerateRequest):
-        prs = Presentation(data.pptx)
-        sample_num = len(prs.slides)
+    def generate_pptx(self, data: GenerateRequest, job: Job = None):
+        if not data.output and not self.ask_output:
+            return {"status": "error", "message": "An 'output' path is required"}
+        with profiling(Profiler() if data.profile else None) as profiler:
+            with measure("template.load"):
+                template: TemplateEntry = self.cache.get(data.pptx, "template", TemplateEntry, expansion=4)
+            with template.lock:
+                try:
+                    response = self._generate_pptx(template, data, job)
+                finally:
+                    template.rollback()
+
+        if profiler is not None:
+            response["profile"] = profiler.report()
+        return response
+
+    def _generate_pptx(self, template: TemplateEntry, data: GenerateRequest, job: Job = None):
+        from src.draw_slide import SlidePositioner
+        from src.incremental import IncrementalBuild
+        from src.stream_writer import StreamingPptxWriter
+        from src.utils import get_data_by_sample, open_file_with_default_program
 
-        data_by_sample = get_data_by_sample(data.excel)
+        prs = template.prs
+        sample_num = template.sample_count
+
+        with measure("excel.read"):
+            data_by_sample = self.cache.get(data.excel, "excel_rows", get_data_by_sample, expansion=20)
+        if job is not None:
+            job.check()
+        samples = {}
         for i in data_by_sample.keys():
             if isinstance(i, str):
-                self.log_warning(f"Sample number '{i}' is not an integer. Skipping sample '{i}'.")
+                self.log_warning(f"Sample number '{i}' is not an integer. Skipping sample '{i}'.", job)
                 continue
             if i >= sample_num:
-                self.log_warning(f"No sample slide with index {i} exists. Skipping sample {i}.\nHint: The 'Sample Num' column should start from 0 and be continuous.")
+                self.log_warning(f"No sample slide with index {i} exists. Skipping sample {i}.\nHint: The 'Sample Num' column should start from 0 and be continuous.", job)
                 continue
+            samples[i] = data_by_sample[i]
+
+        layout = dict(
+            margin=(data.margin_x, data.margin_y),
+            padding=(data.padding_x, data.padding_y),
+            per_slide=data.per_slide
+        )
+        if data.label_template:
+            label_template = self._label_template(template, data)
+            if label_template is None:
+                return {"status": "error", "message": "The pptx has no label template information. Pass a label template name instead of 'auto'"}
+            # 꺼져 있을 때는 넣지 않아 이전 incremental manifest의 hash가 그대로 맞도록 함
+            layout["label_template"] = label_template
+        packed_pages, packing = None, None
+        if data.pack:
             try:
-                SlideDrawer(prs, i, data_by_sample[i]).draw(
-                    margin=(data.margin_x, data.margin_y),
-                    padding=(data.padding_x, data.padding_y),
-                    per_slide=data.per_slide
-                )
+                packed_pages, packing = self._pack_samples(template, data, samples, layout)
             except Exception as e:
-                return {"status": "developer_error", "message": f"Error while drawing slide {i}: {str(e)}"}
+                return {"status": "developer_error", "message": f"Error while packing slides: {str(e)}"}
+            if job is not None:
+                job.set_total(len(packed_pages), sum(len(rows) for rows in samples.values()))
+        elif job is not None and not data.split:
+            slide_size = (prs.slide_width.cm, prs.slide_height.cm)
+            num_slides = 0
+            for i, rows in samples.items():
+                try:
+                    num_slides += SlidePositioner(slide_size, template.sample(i, data.engine), rows, **layout).num_slides
+                except Exception as e:
+                    return {"status": "developer_error", "message": f"Error while drawing slide {i}: {str(e)}"}
+            job.set_total(num_slides, sum(len(rows) for rows in samples.values()))
+
+        if data.fit_text:
+            # 글꼴을 찾고 sample마다 상자 크기를 재는 일은 sample을 처음 맞출 때 한 번만 함
+            with measure("text_fit.prepare"):
+                for i in samples:
+                    template.sample(i, data.engine).use_text_fit(True)
+        photos = None
+        if data.photo_column:
+            error, photos = self._prepare_photos(template, data, samples, job)
+            if error is not None:
+                return error
+        if data.split:
+            return self._generate_split(template, data, samples, layout, photos, job)
+
+        filename = data.output
+        writer = None
+        incremental = None
+        if data.stream or data.incremental:
+            # 슬라이드를 그리는 즉시 파일에 쓰거나 이전 출력과 비교하므로 저장 위치를 먼저 정함
+            filename = filename or self._ask_save_filename(data.pptx)
+            if not filename:
+                return {"status": "success", "message": "Saving PPTX canceled by user"}
+        if data.incremental:
+            incremental = IncrementalBuild(prs, filename, data.engine, layout, template.fingerprints, data.fit_text)
+        if data.stream:
+            try:
+                writer = StreamingPptxWriter(prs, filename)
+            except OSError as e:
+                return {"status": "error", "message": f"Cannot write '{os.path.basename(filename)}': {str(e)}"}
+
+        try:
+            if packed_pages is not None:
+                error = self._draw_packed(template, data, packed_pages, job, writer)
+            else:
+                error = self._draw_samples(template, data, samples, layout, job, writer, incremental)
+            if error is not None:
+                return error
+
+            filename = filename or self._ask_save_filename(data.pptx)
+            if filename:
+                try:
+                    if incremental is not None:
+                        incremental.close()
+                    with measure("save"):
+                        if writer is not None:
+                            writer.close()
+                        else:
+                            prs.save(filename)
+                    message = f"PPTX saved as '{os.path.basename(filename)}'"
+                    if incremental is not None:
+                        incremental.save_manifest(template.sample_count)
+                        message += f" ({incremental.reused} of {len(prs.slides) - template.sample_count} pages reused)"
+                    if packing is not None:
+                        message += f" ({packing['pages']} pages packed, {packing['grid_pages']} with one grid per sample)"
+                    if self.open_output:
+                        open_file_with_default_program(filename)
+                    response = {"status": "success", "message": message}
+                    if packing is not None:
+                        response["packing"] = packing
+                    return response
+                except PermissionError:
+                    return {"status": "error", "message": f"Close the file '{os.path.basename(filename)}' to save"}
+            else:
+                return {"status": "success", "message": "Saving PPTX canceled by user"}
+        finally:
+            if writer is not None:
+                writer.abort()
+            if incremental is not None:
+                incremental.close()
+
+    def _label_template(self, template: TemplateEntry, data: GenerateRequest):
+        """catalog에서, 또는 'auto'면 pptx의 core_properties.comments(set_label_template이 씀)에서 라벨지 배치를 찾습니다."""
+        from src.label_template.catalog import LabelTemplate, find_label_template
+
+        if data.label_template == "auto":
+            return LabelTemplate.from_comment(template.prs.core_properties.comments)
+        return find_label_template(data.label_template)
+
+    def _prepare_photos(self, template: TemplateEntry, data: GenerateRequest, samples: dict, job: Job = None):
+        """사진 열의 사진을 모두 변환해 두고 sample에 연결합니다. 연결은 template.rollback()에서 풀립니다."""
+        from src.label_index import field_name
+        from src.photos import PhotoPipeline, PhotoSet
+
+        photos = PhotoSet(data.photo_column, os.path.dirname(os.path.abspath(data.excel)))
+        if not any(photos.column in rows[0] for rows in samples.values() if rows):
+            return {"status": "error", "message": f"Column '{field_name(data.photo_column)}' not found in the excel file"}, None
+        slots = {i: template.sample(i, data.engine).photo_slots for i in samples}
+        if not any(slots.values()):
+            self.log_warning("No picture placeholder found in the sample slides. Photos are not placed.", job)
+            return None, None
+
+        missing = photos.prepare(PhotoPipeline(data.photo_cache), samples, slots, job)
+        if missing:
+            self.log_warning(f"{missing} photo(s) could not be read. The sample picture is kept for them.", job)
+        for i in samples:
+            template.sample(i, data.engine).use_photos(photos)
+        return None, photos
+
+    def _generate_split(self, template: TemplateEntry, data: GenerateRequest, samples: dict, layout: dict, photos=None, job: Job = None):
+        """출력을 여러 파일로 나눠 그리고 저장합니다. 파일 이름은 출력 경로 뒤에 '-<번호 또는 열 값>'을 붙입니다."""
+        from src.split import OutputSplitter, draw_split
+        from src.utils import open_file_with_default_program
+
+        filename = data.output or self._ask_save_filename(data.pptx)
+        if not filename:
+            return {"status": "success", "message": "Saving PPTX canceled by user"}
+        sample_objects = {i: template.sample(i, data.engine) for i in samples}
+        max_bytes = int(data.split_mb * 1024 * 1024) if data.split_mb else None
+        try:
+            splitter = OutputSplitter(template.prs, sample_objects, layout, data.split_pages, max_bytes, data.split_column, photos)
+            with measure("split.plan"):
+                parts = splitter.plan(samples)
+        except ValueError as e:
+            return {"status": "error", "message": str(e)}
+        except Exception as e:
+            return {"status": "developer_error", "message": f"Error while splitting the output: {str(e)}"}
+        if job is not None:
+            job.set_total(splitter.page_count(parts), sum(len(rows) for rows in samples.values()))
 
-        filename = filedialog.asksaveasfilename(
+        try:
+            results = draw_split(template.prs, data.pptx, sample_objects, parts, filename, data.workers, engine=data.engine, job=job, fit_text=data.fit_text, photos=photos, **layout)
+        except JobCancelled:
+            raise
+        except PermissionError as e:
+            return {"status": "error", "message": f"Close the file '{os.path.basename(e.filename or filename)}' to save"}
+        except Exception as e:
+            return {"status": "developer_error", "message": f"Error while drawing slides: {str(e)}"}
+
+        message = f"PPTX saved as {len(results)} files: " + ", ".join(f"'{os.path.basename(r['output'])}'" for r in results)
+        if max_bytes is not None:
+            oversized = [r for r in results if r["bytes"] > max_bytes]
+            if oversized:
+                message += f" ({len(oversized)} over {data.split_mb} MB)"
+        if self.open_output and results:
+            open_file_with_default_program(results[0]["output"])
+        return {"status": "success", "message": message, "parts": results}
+
+    def _pack_samples(self, template: TemplateEntry, data: GenerateRequest, samples: dict, layout: dict):
+        """sample 여러 개를 같은 페이지에 채워 넣을 배치와 페이지 사용률 보고를 반환합니다."""
+        from src.packing import PagePacker
+
+        prs = template.prs
+        packer = PagePacker((prs.slide_width.cm, prs.slide_height.cm), {i: template.sample(i, data.engine) for i in samples}, **layout)
+        with measure("pack"):
+            pages = packer.pack(samples)
+        return pages, packer.report(pages, samples)
+
+    def _draw_packed(self, template: TemplateEntry, data: GenerateRequest, pages: list, job: Job = None, writer: "StreamingPptxWriter" = None):
+        from src.packing import draw_packed
+
+        sample_nums = {placement.sample_num for placements in pages for placement in placements}
+        try:
+            draw_packed(template.prs, {i: template.sample(i, data.engine) for i in sample_nums}, pages, job=job, writer=writer)
+        except JobCancelled:
+            raise
+        except Exception as e:
+            return {"status": "developer_error", "message": f"Error while drawing slides: {str(e)}"}
+
+    def _draw_samples(self, template: TemplateEntry, data: GenerateRequest, samples: dict, layout: dict, job: Job = None, writer: "StreamingPptxWriter" = None, incremental: "IncrementalBuild" = None):
+        from src.draw_slide import SlideDrawer
+        from src.parallel import draw_parallel
+
+        if data.workers > 1:
+            try:
+                draw_parallel(template.prs, data.pptx, samples, data.workers, engine=data.engine, job=job, writer=writer, fit_text=data.fit_text, **layout)
+            except JobCancelled:
+                raise
+            except Exception as e:
+                return {"status": "developer_error", "message": f"Error while drawing slides: {str(e)}"}
+        else:
+            for i, rows in samples.items():
+                try:
+                    sample = template.sample(i, data.engine)
+                    reuse, appender = None, None
+                    if incremental is not None:
+                        reuse, appender = incremental.reuse_pages(i, sample, rows), incremental.appender
+                    SlideDrawer(template.prs, i, rows, sample=sample).draw(job=job, writer=writer, appender=appender, reuse=reuse, **layout)
+                except JobCancelled:
+                    raise
+                except Exception as e:
+                    return {"status": "developer_error", "message": f"Error while drawing slide {i}: {str(e)}"}
+
+    def preload(self):
+        """
+        생성에 필요한 모듈을 미리 import합니다 (patch 적용 포함).
+        RPC 모드에서 준비 메시지를 보낸 뒤 백그라운드 스레드에서 호출해, 첫 요청이 import를 기다리지 않게 합니다.
+        """
+        import src.utils, src.draw_slide, src.parallel, src.incremental, src.stream_writer, src.packing, src.photos, src.text_fit, src.split
+
+    def _ask_save_filename(self, pptx):
+        from tkinter import filedialog
+        return filedialog.asksaveasfilename(
             defaultextension=".pptx",
             filetypes=[("PowerPoint files", "*.pptx")],
             title="Save the file as",
-            initialfile=f"generated-{os.path.basename(data.pptx)}"
+            initialfile=f"generated-{os.path.basename(pptx)}"
         )
-        if filename:
-            try:
-                prs.save(filename)
-                open_file_with_default_program(filename)
-                return {"status": "success", "message": f"PPTX saved as '{os.path.basename(filename)}'"}
-            except PermissionError:
-                return {"status": "error", "message": f"Close the file '{os.path.basename(filename)}' to save"}
-        else:
-            return {"status": "success", "message": "Saving PPTX canceled by user"}
 
-    def log_warning(self, message):
+    def log_warning(self, message, job: Job = None):
+        if job is not None:
+            job.warnings.append(message)
         if self.is_gui:
+            from tkinter import messagebox
             messagebox.showwarning("Warning", message)
         logging.warning(message)
 
+# batch 모드: 프로세스마다 TaskManger 하나를 두고 그 프로세스의 job들이 캐시를 같이 씀
+_batch_task_manager: TaskManger = None
+
+def init_batch_worker(cache_mb=512):
+    global _batch_task_manager
+    _batch_task_manager = TaskManger(False, cache_mb, open_output=False)
+
+def run_batch_job(data: dict) -> dict:
+    if not data.get("output"):
+        return {"status": "error", "message": "Batch jobs need an 'output' path"}
+    return _batch_task_manager.handle_request({"task": "generate_pptx", "data": data})
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     args = get_args()
-    task_manager = TaskManger(args.gui)
+    if args.rpc:
+        # generate_pptx는 rpc-heavy 스레드에서 실행되고 macOS의 Tk는 메인 스레드에서만 동작하므로 Tk 대화상자를 띄우지 않음.
+        # 저장 위치는 요청의 output으로 받고(Electron이 저장 대화상자를 띄움), 경고는 응답의 warnings로 돌려줌
+        task_manager = TaskManger(False, args.cache_mb, ask_output=False)
+    else:
+        task_manager = TaskManger(args.gui, args.cache_mb)
 
     if args.rpc:
         print("Python RPC mode ready")
@@ -183,13 +506,21 @@ if __name__ == "__main__":
         sys.stdin = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8')
         sys.stdout.reconfigure(encoding='utf-8', line_buffering=True)
         sys.stderr.reconfigure(encoding='utf-8')
-        
-        for line in sys.stdin:
-            try:
-                request = json.loads(line.strip())
-                task_manager.process_request(request)
-            except Exception as e:
-                print(json.dumps({"status": "developer_error", "message": str(e)}, ensure_ascii=False), flush=True)
+
+        threading.Thread(target=task_manager.preload, name="preload", daemon=True).start()
+        RPCServer(task_manager).run(sys.stdin)
+    elif args.batch:
+        jobs = load_batch_manifest(args.batch)
+        report = run_batch(
+            jobs, run_batch_job, args.batch_workers,
+            initializer=init_batch_worker, initargs=(args.cache_mb,),
+            on_result=lambda r: print(f"[{r['index'] + 1}/{len(jobs)}] {r['status']}: {r['message']} ({r['elapsed']}s)", flush=True)
+        )
+        report["manifest"] = os.path.abspath(args.batch)
+        report_path = args.report or os.path.splitext(args.batch)[0] + ".report.json"
+        write_report(report, report_path)
+        print(f"{report['succeeded']} of {report['total']} jobs succeeded in {report['elapsed']}s. Report: {report_path}")
+        sys.exit(0 if report["failed"] == 0 else 1)
     else:
         data = GenerateRequest(
             pptx=args.pptx,
@@ -198,7 +529,27 @@ if __name__ == "__main__":
             margin_y=args.margin_y,
             padding_x=args.padding_x,
             padding_y=args.padding_y,
-            per_slide=args.per_slide
+            per_slide=args.per_slide,
+            label_template=args.label_template,
+            engine=args.engine,
+            workers=args.workers,
+            profile=args.profile,
+            output=args.output,
+            stream=args.stream,
+            incremental=args.incremental,
+            pack=args.pack,
+            fit_text=args.fit_text,
+            photo_column=args.photo_column,
+            photo_cache=args.photo_cache,
+            split_pages=args.split_pages,
+            split_mb=args.split_mb,
+            split_column=args.split_column
         )
         result = task_manager.generate_pptx(data)
         print(result["message"])
+        if "parts" in result:
+            print(json.dumps(result["parts"], indent=2, ensure_ascii=False))
+        if "packing" in result:
+            print(json.dumps(result["packing"], indent=2))
+        if "profile" in result:
+            print(json.dumps(result["profile"], indent=2))
@@ -1 +0,0 @@
-from .patches import * 
\ No newline at end of file
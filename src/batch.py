@@ -0,0 +1,114 @@
+import os
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from typing import Callable
+
+# 경로로 해석할 job 항목 (manifest 파일 기준 상대 경로 허용)
+PATH_KEYS = ("pptx", "excel", "output")
+
+def load_batch_manifest(path: str) -> list[dict]:
+    """
+    batch manifest를 읽어 job별 generate_pptx data 목록을 반환합니다.
+
+    형식 (JSON, 또는 PyYAML이 설치되어 있으면 .yaml/.yml):
+        {"defaults": {"pptx": "template.pptx", "margin_x": 0.2}, "jobs": [{"excel": "a.xlsx", "output": "out/a.pptx"}, ...]}
+    jobs 목록만 있어도 됩니다. 각 job은 defaults 위에 덮어쓰며, 상대 경로는 manifest가 있는 폴더 기준입니다.
+    """
+    with open(path, encoding="utf-8") as f:
+        if os.path.splitext(path)[1].lower() in (".yaml", ".yml"):
+            try:
+                import yaml
+            except ImportError:
+                raise ValueError("Reading a YAML manifest requires PyYAML (pip install pyyaml), or use JSON")
+            manifest = yaml.safe_load(f)
+        else:
+            manifest = json.load(f)
+
+    if isinstance(manifest, list):
+        manifest = {"jobs": manifest}
+    if not isinstance(manifest, dict) or not isinstance(manifest.get("jobs"), list):
+        raise ValueError("Batch manifest must be a list of jobs or an object with a 'jobs' list")
+    defaults = manifest.get("defaults") or {}
+    if not isinstance(defaults, dict):
+        raise ValueError("'defaults' in the batch manifest must be an object")
+
+    base_dir = os.path.dirname(os.path.abspath(path))
+    jobs = []
+    for i, job in enumerate(manifest["jobs"]):
+        if not isinstance(job, dict):
+            raise ValueError(f"Job {i} in the batch manifest must be an object")
+        job = {**defaults, **job}
+        for key in PATH_KEYS:
+            if isinstance(job.get(key), str):
+                job[key] = os.path.join(base_dir, os.path.expanduser(job[key]))
+        jobs.append(job)
+    return jobs
+
+def run_batch(jobs: list[dict], run_job: Callable[[dict], dict], workers: int = 1, initializer: Callable = None, initargs: tuple = (), on_result: Callable[[dict], None] = None) -> dict:
+    """
+    jobs를 run_job으로 실행하고 요약 보고서를 반환합니다.
+
+    workers > 1이면 프로세스 풀에서 실행합니다. initializer는 각 프로세스(또는 현재 프로세스)에서 한 번 호출되므로
+    여기서 만든 템플릿/엑셀 캐시를 그 프로세스가 맡은 job들이 같이 씁니다.
+    run_job과 initializer는 pickle 가능한 최상위 함수여야 합니다.
+    on_result는 job이 하나 끝날 때마다 그 결과로 호출됩니다.
+    """
+    started = time.perf_counter()
+    results: list[dict] = [None] * len(jobs)
+
+    def finish(index: int, response: dict, elapsed: float):
+        job = jobs[index]
+        results[index] = result = {
+            "index": index,
+            "excel": job.get("excel"),
+            "pptx": job.get("pptx"),
+            "output": job.get("output"),
+            "status": response.get("status"),
+            "message": response.get("message"),
+            "elapsed": round(elapsed, 3),
+        }
+        if "profile" in response:
+            result["profile"] = response["profile"]
+        if on_result is not None:
+            on_result(result)
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=initializer, initargs=initargs) as executor:
+            futures = {executor.submit(_timed, run_job, job): i for i, job in enumerate(jobs)}
+            for future in as_completed(futures):
+                try:
+                    response, elapsed = future.result()
+                except Exception as e:
+                    response, elapsed = {"status": "developer_error", "message": str(e)}, 0.0
+                finish(futures[future], response, elapsed)
+    else:
+        if initializer is not None:
+            initializer(*initargs)
+        for i, job in enumerate(jobs):
+            try:
+                response, elapsed = _timed(run_job, job)
+            except Exception as e:
+                response, elapsed = {"status": "developer_error", "message": str(e)}, 0.0
+            finish(i, response, elapsed)
+
+    succeeded = sum(1 for r in results if r["status"] == "success")
+    return {
+        "finished_at": datetime.now().isoformat(timespec="seconds"),
+        "elapsed": round(time.perf_counter() - started, 3),
+        "workers": workers,
+        "total": len(results),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "jobs": results,
+    }
+
+def write_report(report: dict, path: str):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+def _timed(run_job: Callable[[dict], dict], job: dict) -> tuple[dict, float]:
+    start = time.perf_counter()
+    response = run_job(job)
+    return response, time.perf_counter() - start
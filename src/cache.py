@@ -0,0 +1,104 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Callable
+
+if TYPE_CHECKING:
+    from .draw_nametag import NameTagDrawer
+    from .compile_nametag import CompiledNameTag
+
+class FileCache:
+    """
+    파일에서 읽어 파싱한 결과를 (종류, 경로, mtime, 크기)를 key로 보관하는 LRU 캐시.
+
+    RPC 모드처럼 프로세스가 계속 살아있을 때, 같은 파일에 대한 반복 요청이 파싱을 건너뛰도록 합니다.
+    메모리 사용량은 "파일 크기 x expansion"으로 추정하며, max_bytes를 넘으면 오래 쓰지 않은 항목부터 버립니다.
+    """
+    def __init__(self, max_bytes: int = 512 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[tuple, tuple[Any, int]] = OrderedDict()
+        self._keys: dict[tuple[str, str], tuple] = {}
+        self._size = 0
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _key(kind: str, path: str) -> tuple:
+        stat = os.stat(path)
+        return (kind, os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+    def get(self, path: str, kind: str, loader: Callable[[str], Any], expansion: float = 1.0) -> Any:
+        key = self._key(kind, path)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key][0]
+
+        value = loader(path)
+        cost = int(key[3] * expansion)
+        with self._lock:
+            # 같은 파일의 이전 버전(mtime/크기가 다른 항목)은 더 이상 쓸 일이 없음
+            old_key = self._keys.get(key[:2])
+            if old_key is not None and old_key != key:
+                self._pop(old_key)
+            if key not in self._entries:
+                self._entries[key] = (value, cost)
+                self._keys[key[:2]] = key
+                self._size += cost
+            self._evict()
+            return self._entries[key][0] if key in self._entries else value
+
+    def _pop(self, key: tuple):
+        _, cost = self._entries.pop(key, (None, 0))
+        self._size -= cost
+        if self._keys.get(key[:2]) == key:
+            del self._keys[key[:2]]
+
+    def _evict(self):
+        while self._size > self.max_bytes and len(self._entries) > 1:
+            self._pop(next(iter(self._entries)))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys.clear()
+            self._size = 0
+
+class TemplateEntry:
+    """
+    캐시에 보관하는 파싱된 템플릿과 컴파일된 sample.
+
+    생성이 끝나면 rollback()으로 추가한 슬라이드를 지워 원본 상태로 되돌리므로
+    같은 Presentation 객체를 다음 요청에서 다시 쓸 수 있습니다. 사용하는 동안에는 lock을 잡아야 합니다.
+    """
+    def __init__(self, pptx: str):
+        # python-pptx는 처음 템플릿을 열 때 import (RPC 시작 시간을 줄이기 위함)
+        # incremental이 utils를 import하면서 patch가 적용되므로 Presentation으로 파싱하기 전에 import해야 함
+        from .incremental import sample_fingerprint
+        from pptx import Presentation
+
+        self.prs = Presentation(pptx)
+        self.sample_count = len(self.prs.slides)
+        # 그리기가 sample을 건드리기 전에 계산 (incremental의 페이지 hash에 쓰임)
+        self.fingerprints = [sample_fingerprint(self.prs, i) for i in range(self.sample_count)]
+        self.lock = threading.Lock()
+        self._samples: dict[tuple[int, str], "NameTagDrawer|CompiledNameTag"] = {}
+
+    def sample(self, sample_num: int, engine: str = "clone") -> "NameTagDrawer|CompiledNameTag":
+        from .draw_nametag import NameTagDrawer
+        from .compile_nametag import CompiledNameTag
+
+        key = (sample_num, engine)
+        if key not in self._samples:
+            sample = NameTagDrawer.create_from_slide(self.prs.slides[sample_num])
+            self._samples[key] = CompiledNameTag.compile(sample) if engine == "clone" else sample
+        return self._samples[key]
+
+    def rollback(self):
+        from .utils import truncate_slides
+        from .image_cache import ImagePartCache
+        truncate_slides(self.prs, self.sample_count)
+        ImagePartCache.forget(self.prs.part.package)
+        # 요청마다 정하는 사진 열과 글자 맞춤은 다음 요청에 남기지 않음
+        for sample in self._samples.values():
+            sample.use_photos(None)
+            sample.use_text_fit(False)
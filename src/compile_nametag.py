@@ -0,0 +1,120 @@
+from pptx.slide import Slide
+
+from .draw_nametag import NameTagDrawer
+from .image_cache import set_photo
+from .label_index import render_parts
+from .photos import PhotoSet
+from .subtree import SubtreeTemplate, child_path, detached_copy, follow, new_group, next_shape_id, renumber_ids, set_offset
+from .profiler import profiled
+
+
+class CompiledNameTag:
+    """
+    샘플 슬라이드를 lxml 템플릿으로 한 번만 컴파일해두고,
+    명찰마다 deepcopy + 좌표(a:off)/텍스트(a:t) 패치만 하여 spTree에 붙입니다.
+    shape가 여러 개면 컴파일할 때 명찰 왼쪽 위를 원점으로 하는 그룹(p:grpSp) 하나로 묶어두므로
+    명찰마다 그룹을 통째로 복제하고 그룹의 a:off만 옮깁니다.
+    NameTagDrawer와 같은 인터페이스(draw, set_text, width, height)를 제공합니다.
+    """
+    def __init__(self, nametag: NameTagDrawer, template: SubtreeTemplate, offset: tuple[float, float], source_part, photo_slots: list[tuple[tuple[int, ...], tuple[float, float]]] = ()):
+        """
+        offset: 명찰 왼쪽 위에서 template까지의 거리 (그룹이면 (0, 0))
+        photo_slots: [(사진을 바꿔 끼울 p:pic 경로, 칸 크기(cm))]
+        """
+        self._nametag = nametag
+        self._template = template
+        self._offset = offset
+        self._source_part = source_part
+        self._photo_slots = list(photo_slots)
+        self._photos: PhotoSet = None
+        self._fit_text = False
+
+        self._slide_part = None
+        self._next_id: int = None
+        self._drawn = None
+
+    @staticmethod
+    @profiled("sample.compile")
+    def compile(nametag: NameTagDrawer) -> "CompiledNameTag":
+        # drawer의 left/top은 이미 명찰 왼쪽 위 기준의 상대 좌표
+        drawers = nametag.drawers
+        if len(drawers) == 1:
+            template = SubtreeTemplate.from_shape(drawers[0].shape)
+            elements = [template.element]
+            offset = (drawers[0].left, drawers[0].top)
+        else:
+            group = new_group(0, 0, 0, nametag.width, nametag.height)
+            elements = []
+            for drawer in drawers:
+                element = detached_copy(drawer.shape)
+                set_offset(element, drawer.left, drawer.top)
+                group.append(element)
+                elements.append(element)
+            template = SubtreeTemplate(group)
+            offset = (0, 0)
+        photo_drawers = nametag.photo_drawers
+        photo_slots = [
+            (child_path(template.element, element), drawer.photo_size)
+            for drawer, element in zip(drawers, elements)
+            if drawer in photo_drawers
+        ]
+        return CompiledNameTag(nametag, template, offset, drawers[0].shape.part, photo_slots)
+
+    @property
+    def left(self):
+        return self._nametag.left
+
+    @property
+    def top(self):
+        return self._nametag.top
+
+    @property
+    def width(self):
+        return self._nametag.width
+
+    @property
+    def height(self):
+        return self._nametag.height
+
+    @property
+    def photo_slots(self) -> list[tuple[float, float]]:
+        return [size for _, size in self._photo_slots]
+
+    def use_photos(self, photos: PhotoSet):
+        self._photos = photos
+
+    def use_text_fit(self, enabled: bool):
+        if enabled:
+            self._template.prepare_text_fit(self._source_part)
+        self._fit_text = enabled
+
+    def _prepare_slide(self, slide: Slide):
+        """새 슬라이드에 처음 그릴 때 한 번만 relationship(rId)과 shape id를 준비합니다."""
+        self._template.relate(self._source_part, slide.part, {})
+        self._slide_part = slide.part
+        self._next_id = next_shape_id(slide.shapes._spTree)
+
+    @profiled("draw.CompiledNameTag")
+    def draw(self, slide: Slide, left: float=0, top: float=0):
+        if slide.part is not self._slide_part:
+            self._prepare_slide(slide)
+
+        clone = self._template.clone(left + self._offset[0], top + self._offset[1])
+        self._next_id = renumber_ids([clone], self._next_id)
+        slide.shapes._spTree.insert_element_before(clone, "p:extLst")
+        self._drawn = clone
+
+    @profiled("label.substitute")
+    def set_text(self, data: dict[str, int|str]):
+        drawn = self._drawn
+        for path, original, parts in self._template.text_runs:
+            text = render_parts(parts, data)
+            if text != original:
+                follow(drawn, path).text = text
+        if self._fit_text:
+            self._template.fit_text(drawn)
+        if self._photos is not None:
+            for path, size in self._photo_slots:
+                photo = self._photos.get(data, size)
+                if photo is not None:
+                    set_photo(follow(drawn, path), self._slide_part, photo)
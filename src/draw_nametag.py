@@ -1,22 +1,26 @@
-from collections import namedtuple
+import logging
 from pptx.slide import Slide
-from pptx.shapes.shapetree import GroupShapes
 
-from .draw_shape import ShapeDrawer, TextBoxDrawer, AutoShapeDrawer
-
-BoundingBox = namedtuple("BoundingBox", ["left", "top", "width", "height"])
+from .draw_shape import ImageDrawer, ShapeDrawer
+from .geometry import BoundingBox, rotated_bounding_box, union_bounding_box
+from .subtree import new_group
+from .photos import PhotoSet
+from .profiler import measure, profiled
 
 class NameTagDrawer(ShapeDrawer):
     def __init__(self):
         self.drawers: list[ShapeDrawer] = []
+        self._labeled_drawers: list[ShapeDrawer] = []
         self._bbox: BoundingBox = None
 
     @staticmethod
+    @profiled("sample.create_from_slide")
     def create_from_slide(slide: Slide):
         nameTagDrawer = NameTagDrawer()
         nameTagDrawer.drawers = list(nameTagDrawer._create_drawers(slide))
         if len(nameTagDrawer.drawers) == 0:
             raise ValueError("No shape found in the slide")
+        nameTagDrawer._labeled_drawers = [d for d in nameTagDrawer.drawers if d.has_labels]
         nameTagDrawer._bbox = nameTagDrawer.get_position()
         nameTagDrawer.to_relative_position(nameTagDrawer.left, nameTagDrawer.top)
         return nameTagDrawer
@@ -38,37 +42,42 @@ class NameTagDrawer(ShapeDrawer):
         return self._bbox.height
 
     def _create_drawers(self, slide: Slide):
-        shapes = list(slide.shapes)
-        for shape in shapes:
-            if __debug__:
-                print("(debug) shape:", shape.name, shape.shape_type, flush=True)
+        # 그룹은 펼치지 않고 SubtreeDrawer 하나로 통째로 복제
+        for shape in slide.shapes:
+            logging.debug("shape: %s", shape.name)
             sd = ShapeDrawer.create(shape)
-            if sd is None:
-                continue
-            elif isinstance(sd, GroupShapes):
-                shapes += list(sd)
-                continue
-            yield sd
+            if sd is not None:
+                yield sd
     
     def add_drawer(self, drawer: ShapeDrawer):
         self.drawers.append(drawer)
-        self._bbox = self.get_position()
+        if drawer.has_labels:
+            self._labeled_drawers.append(drawer)
+        # 지금까지의 범위에 새 shape 범위만 합침
+        bbox = rotated_bounding_box(drawer.extent)
+        self._bbox = bbox if self._bbox is None else union_bounding_box([self._bbox, bbox])
         self.to_relative_position(self.left, self.top)
     
+    @property
+    def photo_drawers(self) -> list[ImageDrawer]:
+        return [d for d in self.drawers if isinstance(d, ImageDrawer) and d.is_photo_slot]
+
+    @property
+    def photo_slots(self) -> list[tuple[float, float]]:
+        """사진 열의 사진을 넣을 칸(그림 placeholder)들의 크기(cm)"""
+        return [d.photo_size for d in self.photo_drawers]
+
+    def use_photos(self, photos: PhotoSet):
+        """set_text에서 명찰마다 넣을 사진. None이면 sample의 그림을 그대로 둡니다."""
+        for drawer in self.photo_drawers:
+            drawer.photos = photos
+
+    def use_text_fit(self, enabled: bool):
+        for drawer in self._labeled_drawers:
+            drawer.use_text_fit(enabled)
+
     def get_position(self) -> BoundingBox:
-        bbox = _get_rotated_bounding_box(self.drawers[0].shape)
-        left:float = bbox.left
-        top:float = bbox.top
-        right:float = bbox.left + bbox.width
-        buttom:float = bbox.top + bbox.height
-        
-        for drawer in self.drawers[1:]:
-            bbox = _get_rotated_bounding_box(drawer.shape)
-            left = min(left, bbox.left)
-            top = min(top, bbox.top)
-            right = max(right, bbox.left + bbox.width)
-            buttom = max(buttom, bbox.top + bbox.height)
-        return BoundingBox(left, top, right - left, buttom - top)
+        return union_bounding_box([rotated_bounding_box(drawer.extent) for drawer in self.drawers])
 
     def to_relative_position(self, left: float, top: float):
         for drawer in self.drawers:
@@ -76,52 +85,18 @@ class NameTagDrawer(ShapeDrawer):
 
     def draw(self, slide: Slide, left: float=0, top: float=0):
         for drawer in self.drawers:
-            drawer.draw(slide, left, top)
-    
-    def set_text(self, data: dict[str, int|str]):
-        for drawer in self.drawers:
-            if isinstance(drawer, TextBoxDrawer) or isinstance(drawer, AutoShapeDrawer):
-                if drawer.label in data:
-                    drawer.substitute_label(data[drawer.label])
+            with measure(f"draw.{type(drawer).__name__}"):
+                drawer.draw(slide, left, top)
 
-def _get_rotated_bounding_box(shape):
-    """
-    회전된 shape의 실제 바운딩 박스를 계산합니다.
-    
-    Args:
-        shape: pptx shape 객체
-        
-    Returns:
-        BoundingBox: 실제 바운딩 박스 좌표
-    """
-    import math
-    
-    # 원본 shape의 좌표와 크기
-    left = shape.left.cm
-    top = shape.top.cm
-    width = shape.width.cm
-    height = shape.height.cm
-    rotation = shape.rotation
-    
-    # 회전이 없으면 원본 좌표 반환
-    if rotation == 0:
-        return BoundingBox(left, top, width, height)
-    
-    # 회전 각도를 라디안으로 변환
-    angle_rad = math.radians(rotation)
-    cos_angle = abs(math.cos(angle_rad))
-    sin_angle = abs(math.sin(angle_rad))
-    
-    # 회전된 바운딩 박스의 크기 계산
-    rotated_width = width * cos_angle + height * sin_angle
-    rotated_height = width * sin_angle + height * cos_angle
-    
-    # 회전된 바운딩 박스의 중심점
-    center_x = left + width / 2
-    center_y = top + height / 2
-    
-    # 회전된 바운딩 박스의 좌상단 좌표
-    rotated_left = center_x - rotated_width / 2
-    rotated_top = center_y - rotated_height / 2
-    
-    return BoundingBox(rotated_left, rotated_top, rotated_width, rotated_height)
\ No newline at end of file
+        if len(self.drawers) > 1:
+            # 명찰 하나를 그룹 하나로 묶음. 그룹에 바로 추가하면 python-pptx가 shape마다 그룹 범위를 다시 계산하므로 그린 뒤에 옮김
+            shapes = slide.shapes
+            group = new_group(shapes._next_shape_id, left, top, self.width, self.height)
+            shapes._spTree.insert_element_before(group, "p:extLst")
+            for drawer in self.drawers:
+                group.append(drawer.drawed_shape._element)
+
+    @profiled("label.substitute")
+    def set_text(self, data: dict[str, int|str]):
+        for drawer in self._labeled_drawers:
+            drawer.substitute_labels(data)
@@ -1,4 +1,3 @@
-from io import BytesIO
 from abc import ABC, abstractmethod
 
 from pptx.slide import Slide
@@ -17,51 +16,83 @@ from pptx.oxml.ns import nsdecls
 from pptx.oxml.ns import qn
 
 from .utils import set_fill, set_line, set_base_shape, set_text
+from .image_cache import add_picture_from_part, set_photo
+from .geometry import shape_extent
+from .label_index import LabelIndex, render_parts
+from .photos import PhotoSet
+from .subtree import SubtreeTemplate, follow, renumber_ids
+from .text_fit import TextFitSpec, default_text_sizes
 
 class ShapeDrawer(ABC):
     def __init__(self, shape: Picture|BaseShape):
         self.shape = shape
+        # 명찰 범위를 계산하거나 기준점을 옮길 때마다 lxml을 다시 읽지 않도록 한 번만 읽어 둠
+        self.extent = shape_extent(shape)
         self.to_relative_position(0, 0)
         self.drawed_shape = None
 
     def to_relative_position(self, left: float, top: float):
-        self.left:float = self.shape.left.cm - left
-        self.top:float = self.shape.top.cm - top
+        self.left:float = self.extent.left - left
+        self.top:float = self.extent.top - top
     
     @abstractmethod
     def draw(self, slide: Slide, left: float=0, top: float=0):
         pass
-    
+
+    @property
+    def has_labels(self) -> bool:
+        """명찰마다 substitute_labels로 바꿀 텍스트가 있는지"""
+        return False
+
+    def use_text_fit(self, enabled: bool):
+        """substitute_labels에서 넘치는 텍스트의 글자 크기를 줄일지 정합니다."""
+
     @classmethod
     def create(cls, shape: BaseShape):
         if isinstance(shape, GroupShape):
-            if shape.shape_type == MSO_SHAPE_TYPE.GROUP:
-                return shape.shapes
+            return SubtreeDrawer(shape)
         elif isinstance(shape, Picture):
             if shape.shape_type == MSO_SHAPE_TYPE.PICTURE or shape.is_placeholder and shape.placeholder_format.type == PP_PLACEHOLDER.PICTURE:
                 return ImageDrawer(shape)
+            return SubtreeDrawer(shape)
         elif isinstance(shape, Connector):
             return ConnectorDrawer(shape)
         elif isinstance(shape, Shape):
-            if shape.shape_type == MSO_SHAPE_TYPE.TEXT_BOX:
+            try:
+                shape_type = shape.shape_type
+            except NotImplementedError:
+                shape_type = None
+            if shape_type == MSO_SHAPE_TYPE.TEXT_BOX:
                 return TextBoxDrawer(shape)
-            elif shape.shape_type == MSO_SHAPE_TYPE.AUTO_SHAPE:
+            elif shape_type == MSO_SHAPE_TYPE.AUTO_SHAPE:
                 return AutoShapeDrawer(shape)
-            elif shape.shape_type == MSO_SHAPE_TYPE.FREEFORM:
-                return None
-            elif shape.shape_type == MSO_SHAPE_TYPE.PLACEHOLDER:
+            elif shape_type == MSO_SHAPE_TYPE.PLACEHOLDER and not (shape.has_text_frame and shape.text.strip()):
+                # 비어 있는 placeholder는 편집 화면에만 보이는 레이아웃 틀이므로 그리지 않음
                 return None
+            return SubtreeDrawer(shape)
         raise ValueError(f"Unsupported shape type: {type(shape)}")
 
 class ImageDrawer(ShapeDrawer):
     def __init__(self, shape: Picture):
+        # 그림 placeholder는 명찰마다 사진 열(PhotoSet)의 사진으로 바꿔 끼우는 자리
+        self.is_photo_slot = shape.is_placeholder
+        self.photos: PhotoSet = None
         super().__init__(shape)
 
+    @property
+    def has_labels(self) -> bool:
+        return self.is_photo_slot
+
+    @property
+    def photo_size(self) -> tuple[float, float]:
+        return (self.extent.width, self.extent.height)
+
     def draw(self, slide: Slide, left: float=0, top: float=0):
         shapes: SlideShapes = slide.shapes
 
-        pic = shapes.add_picture(
-            BytesIO(self.shape.image.blob),
+        pic = add_picture_from_part(
+            shapes,
+            self.shape.part.related_part(self.shape._element.blip_rId),
             Cm(left + self.left),
             Cm(top + self.top),
             self.shape.width,
@@ -76,11 +107,50 @@ class ImageDrawer(ShapeDrawer):
         self.drawed_shape = pic
         return pic
 
-class TextBoxDrawer(ShapeDrawer):
+    def substitute_labels(self, data: dict[str, int|str]):
+        if self.drawed_shape is None:
+            raise ValueError("Shape is not drawn yet")
+        if self.photos is None:
+            return
+        photo = self.photos.get(data, self.photo_size)
+        if photo is not None:
+            set_photo(self.drawed_shape._element, self.drawed_shape.part, photo)
+
+class TextShapeDrawer(ShapeDrawer):
+    """텍스트를 가진 shape. 치환할 run 위치(label_index)를 만들 때 한 번만 계산합니다."""
     def __init__(self, shape: Shape):
         self.label = shape.text.strip().lower()
+        self.label_index = LabelIndex.build([[r.text for r in p.runs] for p in shape.text_frame.paragraphs], self.label)
+        self.fit_spec: TextFitSpec = None
+        self._fit_spec: TextFitSpec = None
         super().__init__(shape)
 
+    @property
+    def has_labels(self) -> bool:
+        return self.label_index is not None
+
+    def use_text_fit(self, enabled: bool):
+        if enabled and self._fit_spec is None and self.label_index is not None:
+            # placeholder는 a:xfrm 없이 크기를 상속받으므로 읽어 둔 extent를 넘김
+            self._fit_spec = TextFitSpec(self.shape._element, (self.extent.width, self.extent.height), default_text_sizes(self.shape.part))
+        self.fit_spec = self._fit_spec if enabled else None
+
+    def substitute_labels(self, data: dict[str, int|str]):
+        if self.drawed_shape is None:
+            raise ValueError("Shape is not drawn yet")
+        if self.label_index is None:
+            return
+        # 그린 shape는 set_text로 원본과 같은 paragraph/run 구조를 가지므로 색인의 위치에 바로 씀
+        paragraphs = self.drawed_shape.text_frame.paragraphs
+        for p_idx, r_idx, text in self.label_index.render(data):
+            runs = paragraphs[p_idx].runs if p_idx < len(paragraphs) else ()
+            if r_idx < len(runs):
+                runs[r_idx].text = text
+        if self.fit_spec is not None:
+            self.fit_spec.apply(self.drawed_shape._element.txBody)
+
+class TextBoxDrawer(TextShapeDrawer):
+
     def draw(self, slide: Slide, left: float=0, top: float=0):
         shapes: SlideShapes = slide.shapes
 
@@ -96,20 +166,8 @@ class TextBoxDrawer(ShapeDrawer):
         set_text(self.shape, shape)
         self.drawed_shape = shape
         return shape
-    
-    def substitute_label(self, text: str):
-        if self.drawed_shape is None:
-            raise ValueError("Shape is not drawn yet")
-        for p in self.drawed_shape.text_frame.paragraphs:
-            for run in p.runs:
-                if run.text.strip().lower() == self.label:
-                    run.text = text
-                    return
 
-class AutoShapeDrawer(ShapeDrawer):
-    def __init__(self, shape: Shape):
-        self.label = shape.text.strip().lower()
-        super().__init__(shape)
+class AutoShapeDrawer(TextShapeDrawer):
 
     def draw(self, slide: Slide, left: float=0, top: float=0):
         shapes: SlideShapes = slide.shapes
@@ -128,24 +186,61 @@ class AutoShapeDrawer(ShapeDrawer):
         self.drawed_shape = shape
         return shape
 
-    def substitute_label(self, text: str):
+class SubtreeDrawer(ShapeDrawer):
+    """
+    group, freeform, 텍스트가 있는 placeholder 등 python-pptx로 다시 만들 수 없는 shape를
+    XML subtree 통째로 복제해 그립니다. 그룹은 펼치지 않고 그룹 그대로 그리며, 그 안의 텍스트도 치환합니다.
+    """
+    def __init__(self, shape: BaseShape):
+        self.template = SubtreeTemplate.from_shape(shape)
+        self._slide_part = None
+        self._fit_text = False
+        super().__init__(shape)
+
+    @property
+    def has_labels(self) -> bool:
+        return bool(self.template.text_runs)
+
+    def use_text_fit(self, enabled: bool):
+        if enabled:
+            self.template.prepare_text_fit(self.shape.part)
+        self._fit_text = enabled
+
+    def draw(self, slide: Slide, left: float=0, top: float=0):
+        shapes: SlideShapes = slide.shapes
+        if shapes.part is not self._slide_part:
+            self.template.relate(self.shape.part, shapes.part, {})
+            self._slide_part = shapes.part
+
+        element = self.template.clone(left + self.left, top + self.top)
+        renumber_ids([element], shapes._next_shape_id)
+        shapes._spTree.insert_element_before(element, "p:extLst")
+        self.drawed_shape = shapes._shape_factory(element)
+        return self.drawed_shape
+
+    def substitute_labels(self, data: dict[str, int|str]):
         if self.drawed_shape is None:
             raise ValueError("Shape is not drawn yet")
-        for p in self.drawed_shape.text_frame.paragraphs:
-            for run in p.runs:
-                if run.text.strip().lower() == self.label:
-                    run.text = text
-                    return
+        element = self.drawed_shape._element
+        for path, original, parts in self.template.text_runs:
+            text = render_parts(parts, data)
+            if text != original:
+                follow(element, path).text = text
+        if self._fit_text:
+            self.template.fit_text(element)
 
 class ConnectorDrawer(ShapeDrawer):
     def __init__(self, shape: Picture):
+        self._begin_end = (shape.begin_x.cm, shape.begin_y.cm, shape.end_x.cm, shape.end_y.cm)
         super().__init__(shape)
 
     def to_relative_position(self, left: float, top: float):
-        self.begin_x = self.shape.begin_x.cm - left
-        self.begin_y = self.shape.begin_y.cm - top
-        self.end_x = self.shape.end_x.cm - left
-        self.end_y = self.shape.end_y.cm - top
+        super().to_relative_position(left, top)
+        begin_x, begin_y, end_x, end_y = self._begin_end
+        self.begin_x = begin_x - left
+        self.begin_y = begin_y - top
+        self.end_x = end_x - left
+        self.end_y = end_y - top
     
     def draw(self, slide: Slide, left: float=0, top: float=0):
         shapes: SlideShapes = slide.shapes
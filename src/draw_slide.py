@@ -1,32 +1,78 @@
+import math
+from typing import TYPE_CHECKING, Callable, Literal
+from pptx.parts.slide import SlidePart
 from pptx.presentation import Presentation
 
 from .draw_nametag import NameTagDrawer
-from .utils import chunk_list
+from .geometry import grid_positions
+from .compile_nametag import CompiledNameTag
+from .job import Job
+from .profiler import measure
+from .stream_writer import StreamingPptxWriter
+from .utils import SlideAppender, iter_chunks
+
+if TYPE_CHECKING:
+    from .label_template.catalog import LabelTemplate
 
 class SlidePositioner:
-    def __init__(self, slide_size, sample, data, padding = (0, 0), margin = (0, 0), per_slide = None):
+    def __init__(self, slide_size, sample, data, padding = (0, 0), margin = (0, 0), per_slide = None, label_template: "LabelTemplate" = None):
+        """
+        label_template을 주면 padding/margin으로 격자를 계산하지 않고 라벨지 catalog의 칸 위치를 그대로 씁니다.
+        명찰은 각 라벨 칸의 가운데에 놓입니다.
+        """
         self._slide_width, self._slide_height = slide_size
         self._sample = sample
 
         self.padding = padding
         self.margin = margin
+        self.label_template = label_template
 
-        self.num_col, self.num_row = self.get_max_col_row()
         assert per_slide is None or per_slide > 0, "per_slide must be a positive integer or None."
-        self.num_per_slide = self.num_col * self.num_row if per_slide is None else min(per_slide, self.num_col * self.num_row)
-        assert self.num_per_slide > 0, "Sample size is too large to fit in the slide with the given margins and padding."
-        self.left, self.top = self._get_start_pos()
-        self.data_by_slide = chunk_list(data, self.num_per_slide)
+        if label_template is not None:
+            self.num_col, self.num_row = label_template.horizontal_num, label_template.vertical_num
+            self.num_per_slide = label_template.count if per_slide is None else min(per_slide, label_template.count)
+            self.positions = self._label_positions()
+            self.left, self.top = self.positions[0]
+        else:
+            self.num_col, self.num_row = self.get_max_col_row()
+            self.num_per_slide = self.num_col * self.num_row if per_slide is None else min(per_slide, self.num_col * self.num_row)
+            assert self.num_per_slide > 0, "Sample size is too large to fit in the slide with the given margins and padding."
+            self.left, self.top = self._get_start_pos()
+            # 모든 페이지가 같은 배치를 쓰므로 한 페이지 분량의 명찰 위치를 미리 계산해 둠
+            self.positions = grid_positions(self.left + self.padding[0], self.top + self.padding[1], self._pitch(), self.num_col, self.num_per_slide)
+        self.num_slides = math.ceil(len(data) / self.num_per_slide)
+        self.data_by_slide = iter_chunks(data, self.num_per_slide)
+
 
+    def _pitch(self):
+        """이웃한 명찰 사이의 가로/세로 간격 (명찰 크기 + padding 양쪽 + margin)"""
+        return (
+            self._sample.width + self.padding[0] * 2 + self.margin[0],
+            self._sample.height + self.padding[1] * 2 + self.margin[1]
+        )
+
+    def _label_positions(self):
+        """라벨 칸 위치(catalog에 미리 계산됨)에서 명찰을 칸 가운데에 놓는 왼쪽 위 좌표"""
+        label = self.label_template
+        page_width, page_height = label.page
+        if abs(page_width - self._slide_width) > 0.05 or abs(page_height - self._slide_height) > 0.05:
+            raise ValueError(f"Slide size {self._slide_width:.2f}x{self._slide_height:.2f}cm does not match the {label.page_size} page of label template '{label.key}'")
+        if self._sample.width > label.label_width + 0.01 or self._sample.height > label.label_height + 0.01:
+            raise ValueError(f"Sample ({self._sample.width:.2f}x{self._sample.height:.2f}cm) is larger than a label of '{label.key}' ({label.label_width}x{label.label_height}cm)")
+        offset_x = (label.label_width - self._sample.width) / 2
+        offset_y = (label.label_height - self._sample.height) / 2
+        return [(left + offset_x, top + offset_y) for left, top in label.positions[:self.num_per_slide]]
 
     def get_max_col_row(self):
-        num_col = (self._slide_width + self.margin[0]) / (self._sample.width + self.padding[0] * 2 + self.margin[0])
-        num_row = (self._slide_height + self.margin[1]) / (self._sample.height + self.padding[1] * 2 + self.margin[1])
+        pitch_x, pitch_y = self._pitch()
+        num_col = (self._slide_width + self.margin[0]) / pitch_x
+        num_row = (self._slide_height + self.margin[1]) / pitch_y
         return (int(num_col), int(num_row))
 
     def _get_start_pos(self):
-        left = (self._slide_width - self.num_col * (self._sample.width + self.padding[0] * 2 + self.margin[0]) + self.margin[0]) / 2
-        top = (self._slide_height - self.num_row * (self._sample.height + self.padding[1] * 2 + self.margin[1]) + self.margin[1]) / 2
+        pitch_x, pitch_y = self._pitch()
+        left = (self._slide_width - self.num_col * pitch_x + self.margin[0]) / 2
+        top = (self._slide_height - self.num_row * pitch_y + self.margin[1]) / 2
         return (left, top)
     
     def _get_index(self, idx):
@@ -35,34 +81,59 @@ class SlidePositioner:
         return (col_idx, row_idx)
     
     def _get_position(self, idx):
-        col_idx, row_idx = self._get_index(idx)
-        return (
-            self.left + col_idx * (self._sample.width + self.padding[0] * 2 + self.margin[0]) + self.padding[0],
-            self.top + row_idx * (self._sample.height + self.padding[1] * 2 + self.margin[1]) + self.padding[1]
-        )
+        return self.positions[idx]
 
     def slide_info_generator(self):
         for data in self.data_by_slide:
             yield self._nametag_info_generator(data)
 
     def _nametag_info_generator(self, slide_info):
-        for idx, d in enumerate(slide_info):
-            yield *self._get_position(idx), d
+        for (left, top), d in zip(self.positions, slide_info):
+            yield left, top, d
 
 class SlideDrawer:
-    def __init__(self, prs: Presentation, sample_num: int, data: list[dict[str, int|str]], blank_slide_layout = 0):
+    def __init__(self, prs: Presentation, sample_num: int, data: list[dict[str, int|str]], blank_slide_layout = 0, engine: Literal["clone", "drawer"] = "clone", sample: NameTagDrawer|CompiledNameTag = None):
         self._prs = prs  
+        self.sample_num = sample_num
         self.data = data
-        self.sample = NameTagDrawer.create_from_slide(self._prs.slides[sample_num])
+        if sample is not None:
+            self.sample = sample
+        elif engine == "clone":
+            self.sample = CompiledNameTag.compile(NameTagDrawer.create_from_slide(self._prs.slides[sample_num]))
+        elif engine == "drawer":
+            self.sample = NameTagDrawer.create_from_slide(self._prs.slides[sample_num])
+        else:
+            raise ValueError(f"Unknown engine: {engine}")
         # self.slide_layout = self._prs.slides[sample_num].slide_layout
         self.slide_layout = self._prs.slide_layouts[blank_slide_layout]
 
-    def draw(self, **kwargs):
+    def draw(self, job: Job = None, writer: StreamingPptxWriter = None, appender: SlideAppender = None, reuse: dict[int, Callable[[], SlidePart]] = None, **kwargs):
+        """
+        reuse: {페이지 번호: 이전 결과의 슬라이드를 붙이고 slide part를 반환하는 함수}
+        해당 페이지는 새로 그리지 않고 그 슬라이드를 그대로 씁니다 (incremental).
+        """
         self.position = SlidePositioner((self._prs.slide_width.cm, self._prs.slide_height.cm), self.sample, self.data, **kwargs)
+        appender = appender or SlideAppender(self._prs)
 
-        for slide_info in self.position.slide_info_generator():
-            slide = self._prs.slides.add_slide(self.slide_layout)
-            for left, top, data in slide_info:
-                self.sample.draw(slide, left, top)
-                self.sample.set_text(data)
-        return self._prs
\ No newline at end of file
+        for page, slide_info in enumerate(self.position.slide_info_generator()):
+            if job is not None:
+                job.check()
+            if reuse and page in reuse:
+                with measure("slide.reuse"):
+                    slide_part = reuse[page]()
+                num_drawn = sum(1 for _ in slide_info)
+            else:
+                with measure("slide.add"):
+                    slide = appender.add_slide(self.slide_layout)
+                num_drawn = 0
+                for left, top, data in slide_info:
+                    self.sample.draw(slide, left, top)
+                    self.sample.set_text(data)
+                    num_drawn += 1
+                slide_part = slide.part
+            if writer is not None:
+                with measure("slide.flush"):
+                    writer.flush(slide_part)
+            if job is not None:
+                job.advance(self.sample_num, pages=1, nametags=num_drawn)
+        return self._prs
@@ -0,0 +1,137 @@
+import os
+import sys
+import json
+import logging
+import tempfile
+
+# 저장 형식이나 글꼴을 읽는 방식이 바뀌면 올려서 이전 색인을 버림
+INDEX_VERSION = 1
+FONT_EXTENSIONS = (".otf", ".ttf")
+
+FontKey = tuple[str, bool, bool]  # (family_name, is_bold, is_italic)
+
+def font_directories() -> list[str]:
+    """현재 OS에서 글꼴이 있을 만한 폴더 목록. 환경 변수가 없는 폴더는 건너뜁니다."""
+    home = os.path.expanduser("~")
+    if sys.platform.startswith("win32"):
+        dirs = [os.path.join(os.environ.get("WINDIR", r"C:\Windows"), "Fonts")]
+        local = os.environ.get("LOCALAPPDATA") or (os.path.join(os.environ["USERPROFILE"], "AppData", "Local") if "USERPROFILE" in os.environ else None)
+        if local:
+            dirs.append(os.path.join(local, "Microsoft", "Windows", "Fonts"))
+        return dirs
+    if sys.platform.startswith("darwin"):
+        return ["/Library/Fonts", "/Network/Library/Fonts", "/System/Library/Fonts", os.path.join(home, "Library", "Fonts"), os.path.join(home, ".fonts")]
+    # Linux 등: fontconfig 기본 경로
+    data_dirs = os.environ.get("XDG_DATA_DIRS") or "/usr/local/share:/usr/share"
+    data_home = os.environ.get("XDG_DATA_HOME") or os.path.join(home, ".local", "share")
+    dirs = [os.path.join(d, "fonts") for d in data_dirs.split(":") if d]
+    dirs += [os.path.join(data_home, "fonts"), os.path.join(home, ".fonts")]
+    return list(dict.fromkeys(dirs))
+
+def default_index_path() -> str:
+    if sys.platform.startswith("win32"):
+        base = os.environ.get("LOCALAPPDATA") or tempfile.gettempdir()
+    elif sys.platform.startswith("darwin"):
+        base = os.path.join(os.path.expanduser("~"), "Library", "Caches")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "nametag-generator", "font-index.json")
+
+def _read_font_key(path: str) -> FontKey:
+    from pptx.text.fonts import _Font
+
+    with _Font.open(path) as f:
+        return (f.family_name, f.is_bold, f.is_italic)
+
+class FontIndex:
+    """
+    (family, bold, italic) → 글꼴 파일 경로 색인을 파일에 저장해 두고 실행할 때마다 다시 씁니다.
+
+    폴더(하위 폴더 포함)마다 수정 시각과 그 폴더 바로 아래 글꼴들의 key를 기록합니다.
+    글꼴 파일을 추가/삭제하면 그 폴더의 수정 시각이 바뀌므로, 수정 시각이 바뀐 폴더만 다시 읽습니다.
+    """
+    def __init__(self, path: str = None):
+        self.path = path or default_index_path()
+        # {폴더: {"mtime": ns, "fonts": [[family, bold, italic, 파일 이름]]}}
+        self._dirs: dict[str, dict] = {}
+        self._changed = False
+
+    def load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return
+        if index.get("version") == INDEX_VERSION:
+            self._dirs = index.get("dirs", {})
+
+    def save(self):
+        if not self._changed:
+            return
+        folder = os.path.dirname(self.path)
+        try:
+            os.makedirs(folder, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=folder, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"version": INDEX_VERSION, "dirs": self._dirs}, f, ensure_ascii=False)
+            os.replace(tmp, self.path)
+            self._changed = False
+        except OSError as e:
+            logging.debug("Cannot save font index '%s': %s", self.path, e)
+
+    def fonts(self, directories: list[str]) -> dict[FontKey, str]:
+        """directories 아래의 모든 글꼴. 같은 key는 뒤에 나온 폴더의 파일이 이깁니다. (python-pptx와 같음)"""
+        seen = set()
+        fonts = {}
+        for directory in directories:
+            for folder in self._walk(directory):
+                seen.add(folder)
+                for family, bold, italic, filename in self._folder_fonts(folder):
+                    fonts[(family, bold, italic)] = os.path.join(folder, filename)
+        # 없어진 폴더는 색인에서 지움
+        for folder in set(self._dirs) - seen:
+            del self._dirs[folder]
+            self._changed = True
+        return fonts
+
+    def _walk(self, directory: str):
+        if not os.path.isdir(directory):
+            return
+        yield os.path.abspath(directory)
+        try:
+            entries = sorted(os.scandir(directory), key=lambda e: e.name)
+        except OSError:
+            return
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from self._walk(entry.path)
+
+    def _folder_fonts(self, folder: str) -> list[list]:
+        try:
+            mtime = os.stat(folder).st_mtime_ns
+        except OSError:
+            return []
+        entry = self._dirs.get(folder)
+        if entry is not None and entry["mtime"] == mtime:
+            return entry["fonts"]
+
+        fonts = []
+        for name in sorted(os.listdir(folder)):
+            if os.path.splitext(name)[1].lower() not in FONT_EXTENSIONS:
+                continue
+            try:
+                fonts.append([*_read_font_key(os.path.join(folder, name)), name])
+            except Exception as e:
+                # 깨진 글꼴 파일 하나 때문에 전체 색인이 실패하지 않도록 건너뜀
+                logging.debug("Cannot read font '%s': %s", name, e)
+        self._dirs[folder] = {"mtime": mtime, "fonts": fonts}
+        self._changed = True
+        return fonts
+
+def installed_fonts(directories: list[str] = None, path: str = None) -> dict[FontKey, str]:
+    """저장된 색인을 읽어 바뀐 폴더만 다시 읽고, 색인을 저장한 뒤 전체 글꼴 목록을 반환합니다."""
+    index = FontIndex(path)
+    index.load()
+    fonts = index.fonts(font_directories() if directories is None else directories)
+    index.save()
+    return fonts
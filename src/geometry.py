@@ -0,0 +1,52 @@
+import math
+from collections import namedtuple
+
+from pptx.shapes.base import BaseShape
+
+# 명찰 한 개의 shape는 수십 개 이하이므로 NumPy 배열 대신 tuple로 한 번에 계산함 (NumPy는 의존성이 아님)
+BoundingBox = namedtuple("BoundingBox", ["left", "top", "width", "height"])
+# shape 하나의 위치/크기(cm)와 회전 각도(도)
+Extent = namedtuple("Extent", ["left", "top", "width", "height", "rotation"])
+
+def shape_extent(shape: BaseShape) -> Extent:
+    """shape의 위치/크기/회전을 한 번만 읽어 둡니다. (placeholder는 레이아웃에서 상속받은 값)"""
+    return Extent(shape.left.cm, shape.top.cm, shape.width.cm, shape.height.cm, shape.rotation)
+
+def rotated_bounding_box(extent: Extent) -> BoundingBox:
+    """
+    회전된 shape의 실제 바운딩 박스를 계산합니다.
+    회전 중심(shape 중심)은 그대로 두고, 회전한 뒤의 가로/세로 폭으로 상자를 넓힙니다.
+    """
+    left, top, width, height, rotation = extent
+    if rotation == 0:
+        return BoundingBox(left, top, width, height)
+
+    angle_rad = math.radians(rotation)
+    cos_angle = abs(math.cos(angle_rad))
+    sin_angle = abs(math.sin(angle_rad))
+    rotated_width = width * cos_angle + height * sin_angle
+    rotated_height = width * sin_angle + height * cos_angle
+    return BoundingBox(
+        left + (width - rotated_width) / 2,
+        top + (height - rotated_height) / 2,
+        rotated_width,
+        rotated_height,
+    )
+
+def union_bounding_box(boxes: list[BoundingBox]) -> BoundingBox:
+    """여러 바운딩 박스를 모두 감싸는 바운딩 박스를 한 번에 계산합니다."""
+    left = min(box.left for box in boxes)
+    top = min(box.top for box in boxes)
+    right = max(box.left + box.width for box in boxes)
+    bottom = max(box.top + box.height for box in boxes)
+    return BoundingBox(left, top, right - left, bottom - top)
+
+def grid_positions(left: float, top: float, pitch: tuple[float, float], num_col: int, count: int) -> list[tuple[float, float]]:
+    """
+    (left, top)에서 시작해 pitch 간격으로 왼쪽→오른쪽, 위→아래 순서로 놓이는 칸 count개의 왼쪽 위 좌표 목록.
+    페이지마다 같은 배치를 쓰므로 한 번만 계산해 두고 번호로 찾아 씁니다.
+    """
+    return [
+        (left + (idx % num_col) * pitch[0], top + (idx // num_col) * pitch[1])
+        for idx in range(count)
+    ]
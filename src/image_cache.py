@@ -0,0 +1,87 @@
+import hashlib
+import weakref
+
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.oxml.ns import qn
+from pptx.parts.image import Image, ImagePart
+from pptx.shapes.picture import Picture
+from pptx.shapes.shapetree import SlideShapes
+from pptx.util import Length
+
+from .photos import PreparedPhoto
+
+class ImagePartCache:
+    """
+    프레젠테이션(패키지)별 이미지 part 캐시.
+
+    원본 이미지 part(또는 blob의 sha1)를 key로, 대상 패키지에 임베드된 part를 돌려줍니다.
+    같은 이미지는 한 번만 해시/임베드되고, 이후에는 relationship만 추가됩니다.
+    """
+    _caches: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+    def __init__(self, package):
+        self._package = package
+        self._by_source: "weakref.WeakKeyDictionary[ImagePart, ImagePart]" = weakref.WeakKeyDictionary()
+        self._by_sha1: dict[str, ImagePart] = None
+
+    @classmethod
+    def of(cls, package) -> "ImagePartCache":
+        cache = cls._caches.get(package)
+        if cache is None:
+            cache = cls._caches[package] = cls(package)
+        return cache
+
+    @classmethod
+    def forget(cls, package):
+        """
+        package의 캐시를 버립니다. 슬라이드를 지워 연결이 끊긴 이미지 part는 저장할 때 빠지고
+        다음 이미지가 같은 partname을 받을 수 있으므로, 같은 Presentation에 다시 그리기 전에 호출합니다.
+        """
+        cls._caches.pop(package, None)
+
+    def get_or_add(self, source_part: ImagePart) -> ImagePart:
+        if source_part.package is self._package:
+            return source_part
+        target_part = self._by_source.get(source_part)
+        if target_part is None:
+            target_part = self.get_or_add_blob(source_part.blob, source_part.sha1, source_part.desc)
+            self._by_source[source_part] = target_part
+        return target_part
+
+    def get_or_add_blob(self, blob: bytes, sha1: str = None, filename: str = None) -> ImagePart:
+        sha1 = sha1 or hashlib.sha1(blob).hexdigest()
+        index = self._sha1_index()
+        if sha1 not in index:
+            index[sha1] = ImagePart.new(self._package, Image.from_blob(blob, filename))
+        return index[sha1]
+
+    def relate(self, part, source_part: ImagePart) -> str:
+        """part(슬라이드 등)에서 source_part 이미지로의 rId를 반환합니다."""
+        return part.relate_to(self.get_or_add(source_part), RT.IMAGE)
+
+    def _sha1_index(self) -> dict[str, ImagePart]:
+        if self._by_sha1 is None:
+            self._by_sha1 = {
+                part.sha1: part for part in self._package.iter_parts() if isinstance(part, ImagePart)
+            }
+        return self._by_sha1
+
+def add_picture_from_part(shapes: SlideShapes, source_part: ImagePart, left: Length, top: Length, width: Length, height: Length) -> Picture:
+    """shapes.add_picture와 같지만 이미지를 다시 읽거나 해시하지 않고 캐시된 part를 그대로 연결합니다."""
+    image_part = ImagePartCache.of(shapes.part.package).get_or_add(source_part)
+    rId = shapes.part.relate_to(image_part, RT.IMAGE)
+    id_ = shapes._next_shape_id
+    pic = shapes._spTree.add_pic(id_, f"Picture {id_ - 1}", image_part.desc, rId, left, top, width, height)
+    return shapes._shape_factory(pic)
+
+def set_photo(pic, part, photo: PreparedPhoto):
+    """
+    그린 그림(p:pic)의 이미지를 photo로 바꿉니다.
+    photo는 이미 칸 비율에 맞게 잘려 있으므로 sample 그림의 자르기(a:srcRect)는 지웁니다.
+    """
+    image_part = ImagePartCache.of(part.package).get_or_add_blob(photo.blob, photo.sha1, photo.filename)
+    blip = pic.find(f"{qn('p:blipFill')}/{qn('a:blip')}")
+    blip.set(qn("r:embed"), part.relate_to(image_part, RT.IMAGE))
+    src_rect = blip.getnext()
+    if src_rect is not None and src_rect.tag == qn("a:srcRect"):
+        src_rect.getparent().remove(src_rect)
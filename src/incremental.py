@@ -0,0 +1,195 @@
+import os
+import json
+import hashlib
+import zipfile
+from functools import partial
+
+from pptx.opc.constants import RELATIONSHIP_TARGET_MODE as RTM
+from pptx.opc.oxml import parse_xml
+from pptx.opc.package import _ContentTypeMap
+from pptx.opc.packuri import CONTENT_TYPES_URI, PackURI
+from pptx.parts.slide import SlidePart
+from pptx.presentation import Presentation
+
+from .draw_slide import SlidePositioner
+from .parallel import ShardMerger
+from .utils import SlideAppender, iter_chunks
+
+MANIFEST_SUFFIX = ".manifest.json"
+# 그리는 방식이 바뀌어 같은 입력에서 다른 슬라이드가 나오게 되면 올려서 이전 manifest를 무효화
+MANIFEST_VERSION = 2
+
+class IncrementalBuild:
+    """
+    이전 출력의 manifest(<output>.manifest.json)를 읽어 바뀌지 않은 페이지를 그대로 가져옵니다.
+
+    페이지마다 (sample 슬라이드, 레이아웃 설정, 엔진, 그 페이지의 행들)의 hash를 기록해 두고,
+    다음 실행에서 hash가 같은 페이지는 새로 그리지 않고 이전 출력 zip의 슬라이드 XML을 그대로 붙입니다.
+    출력 파일이 manifest를 쓴 뒤 바깥에서 수정되었으면(크기/수정 시각이 다르면) 모든 페이지를 새로 그립니다.
+    """
+    def __init__(self, prs: Presentation, output: str, engine: str, layout: dict, fingerprints: list[str], fit_text: bool = False):
+        """fingerprints: sample 번호별 sample_fingerprint() (TemplateEntry.fingerprints)"""
+        self._prs = prs
+        self.output = output
+        self._layout = layout
+        self._params = {"engine": engine, **layout}
+        if fit_text:
+            # 꺼져 있을 때는 넣지 않아 이전 manifest의 hash가 그대로 맞도록 함
+            self._params["fit_text"] = True
+        self._fingerprints = fingerprints
+        self.appender = SlideAppender(prs)
+        self._template_parts = {str(p.partname): p for p in prs.part.package.iter_parts()}
+        self._hashes: list[str] = []
+        self._reusable: dict[str, bool] = {}
+        self.reused = 0
+
+        self._zip = None
+        self._old_pages: dict[str, str] = {}
+        manifest = self._read_manifest()
+        if manifest is not None:
+            try:
+                self._zip = zipfile.ZipFile(output)
+                self._content_types = _ContentTypeMap.from_xml(self._zip.read(CONTENT_TYPES_URI.membername))
+                self._old_pages = manifest["pages"]
+            except (OSError, KeyError, zipfile.BadZipFile):
+                self.close()
+        self._merger = ShardMerger(prs, appender=self.appender) if self._zip is not None else None
+
+    @property
+    def manifest_path(self) -> str:
+        return self.output + MANIFEST_SUFFIX
+
+    def _read_manifest(self) -> dict:
+        try:
+            with open(self.manifest_path, encoding="utf-8") as f:
+                manifest = json.load(f)
+            stat = os.stat(self.output)
+        except (OSError, ValueError):
+            return None
+        if manifest.get("version") != MANIFEST_VERSION or manifest.get("output") != _stat_key(stat):
+            return None
+        return manifest
+
+    def reuse_pages(self, sample_num: int, sample, rows: list[dict]) -> dict:
+        """
+        SlideDrawer.draw(reuse=...)에 넘길 {페이지 번호: 슬라이드를 붙이는 함수}를 반환합니다.
+        sample은 SlideDrawer가 쓰는 것과 같은 객체여야 페이지 경계가 일치합니다.
+        샘플 순서대로 호출해야 manifest의 페이지 순서가 출력과 맞습니다.
+        """
+        slide_size = (self._prs.slide_width.cm, self._prs.slide_height.cm)
+        num_per_slide = SlidePositioner(slide_size, sample, rows, **self._layout).num_per_slide
+        fingerprint = self._fingerprints[sample_num]
+
+        reuse = {}
+        for page, chunk in enumerate(iter_chunks(rows, num_per_slide)):
+            page_hash = hashlib.sha1(json.dumps(
+                [fingerprint, self._params, chunk], sort_keys=True, ensure_ascii=False, default=str
+            ).encode("utf-8")).hexdigest()
+            self._hashes.append(page_hash)
+            member = self._old_pages.get(page_hash)
+            if member is not None and self._is_reusable(member):
+                reuse[page] = partial(self._append_old_slide, member)
+        return reuse
+
+    def close(self):
+        """이전 출력 파일을 닫습니다. 같은 경로에 저장하기 전에 호출해야 합니다 (Windows 파일 잠금)."""
+        if self._zip is not None:
+            self._zip.close()
+            self._zip = None
+
+    def save_manifest(self, sample_count: int):
+        """저장이 끝난 뒤 호출합니다. sample_count 뒤의 슬라이드가 reuse_pages로 hash를 만든 페이지들입니다."""
+        rels = self._prs.part.rels
+        sldIds = list(self._prs.slides._sldIdLst)[sample_count:]
+        pages = {}
+        for page_hash, sldId in zip(self._hashes, sldIds):
+            pages.setdefault(page_hash, rels[sldId.rId]._target.partname.membername)
+        manifest = {"version": MANIFEST_VERSION, "output": _stat_key(os.stat(self.output)), "pages": pages}
+        with open(self.manifest_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+
+    def _old_rels(self, member: str) -> list[tuple[str, str, bool, str]]:
+        """이전 출력에서 슬라이드의 relationship을 render_shard와 같은 형식으로 읽습니다."""
+        partname = PackURI("/" + member)
+        try:
+            xml = self._zip.read(partname.rels_uri.membername)
+        except KeyError:
+            return []
+        rels = []
+        for rel in parse_xml(xml).relationship_lst:
+            if rel.targetMode == RTM.EXTERNAL:
+                rels.append((rel.rId, rel.reltype, True, rel.target_ref))
+            else:
+                rels.append((rel.rId, rel.reltype, False, str(PackURI.from_rel_ref(partname.baseURI, rel.target_ref))))
+        return rels
+
+    def _is_reusable(self, member: str) -> bool:
+        """
+        슬라이드가 참조하는 part가 모두 현재 템플릿에 그대로 있거나 이미지일 때만 가져옵니다.
+        (템플릿의 레이아웃 등이 바뀌었으면 그 part의 relationship까지 옮길 수 없으므로 새로 그림)
+        """
+        try:
+            rels = self._old_rels(member)
+        except (KeyError, ValueError):
+            return False
+        for _, _, is_external, target in rels:
+            if is_external:
+                continue
+            if target not in self._reusable:
+                self._reusable[target] = self._is_reusable_part(target)
+            if not self._reusable[target]:
+                return False
+        return True
+
+    def _is_reusable_part(self, partname: str) -> bool:
+        try:
+            blob = self._zip.read(PackURI(partname).membername)
+        except KeyError:
+            return False
+        if partname in self._template_parts:
+            return self._template_parts[partname].blob == blob
+        try:
+            return self._content_types[PackURI(partname)].startswith("image/")
+        except KeyError:
+            return False
+
+    def _append_old_slide(self, member: str) -> SlidePart:
+        parts = {}
+        rels = self._old_rels(member)
+        for _, _, is_external, target in rels:
+            if not is_external and target not in self._template_parts:
+                parts[target] = (self._content_types[PackURI(target)], self._zip.read(PackURI(target).membername))
+        blob = self._zip.read(member)
+        slide_part = self._merger.merge_slide(blob, rels, parts, part_class=_ReusedSlidePart)
+        if set(slide_part.rels.keys()) == {rId for rId, *_ in rels}:
+            slide_part.original_blob = blob
+        self.reused += 1
+        return slide_part
+
+class _ReusedSlidePart(SlidePart):
+    """
+    이전 출력에서 가져온 슬라이드. rId가 그대로면 다시 직렬화하지 않고 읽은 바이트를 그대로 저장합니다.
+    붙인 뒤에는 내용을 고치지 않는다고 가정합니다.
+    """
+    original_blob: bytes = None
+
+    @property
+    def blob(self) -> bytes:
+        return self.original_blob if self.original_blob is not None else super().blob
+
+def sample_fingerprint(prs: Presentation, sample_num: int) -> str:
+    """
+    sample 슬라이드와 그 슬라이드가 참조하는 part, 빈 레이아웃, 슬라이드 크기의 hash.
+    drawer 엔진은 그리는 동안 sample에 빈 요소(a:ln 등)를 덧붙이므로 템플릿을 연 직후에 계산해야 합니다.
+    """
+    slide_part = prs.slides[sample_num].part
+    h = hashlib.sha1(slide_part.blob)
+    for rId, rel in sorted(slide_part.rels.items()):
+        h.update(f"{rId} {rel.reltype} ".encode())
+        h.update(rel.target_ref.encode() if rel.is_external else rel.target_part.blob)
+    h.update(prs.slide_layouts[0].part.blob)
+    h.update(f"{prs.slide_width} {prs.slide_height}".encode())
+    return h.hexdigest()
+
+def _stat_key(stat: os.stat_result) -> dict:
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
@@ -0,0 +1,74 @@
+import time
+import threading
+from typing import Callable
+
+class JobCancelled(Exception):
+    """Job.cancel()로 취소된 작업이 다음 확인 지점에 도달했을 때 발생합니다."""
+
+class Job:
+    """
+    RPC 요청 하나의 실행 상태.
+
+    취소는 협조적으로 이루어집니다: 긴 작업은 페이지 단위로 check()를 호출하고,
+    cancel()이 호출된 뒤라면 JobCancelled가 발생해 작업이 중단됩니다.
+    on_progress가 주어지면 advance()로 쌓인 진행 상황을 최대 interval초마다 한 번 전달합니다.
+    """
+    def __init__(self, id=None, on_progress: Callable[[dict], None] = None, interval: float = 0.5):
+        self.id = id
+        self._cancelled = threading.Event()
+
+        self._on_progress = on_progress
+        self._interval = interval
+        self._started = time.monotonic()
+        self._drawing_started = self._last_report = self._started
+        self.sample = None
+        self.pages_done = self.pages_total = 0
+        self.nametags_done = self.nametags_total = 0
+        # 응답의 warnings로 돌려줄 경고 (TaskManger.log_warning이 추가)
+        self.warnings: list[str] = []
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def check(self):
+        if self._cancelled.is_set():
+            raise JobCancelled(f"Task {self.id} cancelled")
+
+    def set_total(self, pages: int, nametags: int):
+        self.pages_total = pages
+        self.nametags_total = nametags
+        # 남은 시간은 파일을 읽는 시간을 빼고 그리기 속도로만 추정
+        self._drawing_started = time.monotonic()
+
+    def advance(self, sample: int = None, pages: int = 0, nametags: int = 0):
+        self.sample = sample
+        self.pages_done += pages
+        self.nametags_done += nametags
+        if self._on_progress is None:
+            return
+
+        now = time.monotonic()
+        finished = self.nametags_done >= self.nametags_total
+        if finished or now - self._last_report >= self._interval:
+            self._last_report = now
+            self._on_progress(self.progress(now))
+
+    def progress(self, now: float = None) -> dict:
+        now = now or time.monotonic()
+        remaining = self.nametags_total - self.nametags_done
+        eta = (now - self._drawing_started) / self.nametags_done * remaining if self.nametags_done else None
+        return {
+            "id": self.id,
+            "event": "progress",
+            "sample": self.sample,
+            "pages_done": self.pages_done,
+            "pages_total": self.pages_total,
+            "nametags_done": self.nametags_done,
+            "nametags_total": self.nametags_total,
+            "elapsed": round(now - self._started, 2),
+            "eta": None if eta is None else round(eta, 2),
+        }
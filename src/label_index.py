@@ -0,0 +1,98 @@
+import re
+from typing import NamedTuple
+
+# 텍스트 안의 {field} 자리 표시자. 이름은 엑셀 header처럼 앞뒤 공백을 없애고 소문자로 비교합니다.
+FIELD_PATTERN = re.compile(r"\{([^{}]+)\}")
+
+class Field(NamedTuple):
+    name: str
+    raw: str    # 데이터에 없는 필드일 때 그대로 남길 원래 글자 ("{Name}")
+
+def field_name(text: str) -> str:
+    return text.strip().lower()
+
+def find_fields(text: str) -> list[str]:
+    """text에 들어있는 {field} 이름 목록 (처음 나온 순서, 중복 없음)"""
+    return list(dict.fromkeys(field_name(m.group(1)) for m in FIELD_PATTERN.finditer(text)))
+
+class LabelIndex:
+    """
+    텍스트 shape 하나에서 명찰마다 바꿔 쓸 run 위치를 미리 계산한 색인.
+
+    runs: [(paragraph 번호, run 번호, 원래 텍스트, 조각들)] - 조각은 그대로 쓸 str 또는 Field
+    render(data)는 새로 써야 하는 (paragraph 번호, run 번호, 텍스트)만 돌려주므로 명찰마다 해당 run에 바로 씁니다.
+
+    - "{name} ({role})"처럼 글자 사이에 {field}를 여러 개 둘 수 있으며, 그 자리만 바뀝니다.
+    - PowerPoint가 "{", "name", "}"처럼 여러 run으로 나눈 {field}는 시작 run에 합쳐 쓰고 나머지 run에서는 지웁니다.
+    - {field}가 하나도 없으면 예전처럼 shape 전체 텍스트(label)와 같은 run 하나를 통째로 바꿉니다.
+    """
+    def __init__(self, runs: list[tuple[int, int, str, tuple]]):
+        self.runs = runs
+        self.fields = {part.name for *_, parts in runs for part in parts if isinstance(part, Field)}
+
+    @classmethod
+    def build(cls, paragraphs: list[list[str]], label: str = None) -> "LabelIndex|None":
+        """
+        paragraphs: paragraph별 run 텍스트 목록
+        label: {field}가 없을 때 쓸 예전 방식의 label (shape 전체 텍스트를 strip().lower()한 것)
+        바꿀 곳이 없으면 None을 반환합니다.
+        """
+        runs = []
+        for p_idx, texts in enumerate(paragraphs):
+            runs += _index_paragraph(p_idx, texts)
+        if not runs and label:
+            runs = _index_whole_run_label(paragraphs, label)
+        return cls(runs) if runs else None
+
+    def render(self, data: dict[str, int|str]) -> list[tuple[int, int, str]]:
+        writes = []
+        for p_idx, r_idx, original, parts in self.runs:
+            text = render_parts(parts, data)
+            if text != original:
+                writes.append((p_idx, r_idx, text))
+        return writes
+
+def render_parts(parts: tuple, data: dict[str, int|str]) -> str:
+    if len(parts) == 1 and type(parts[0]) is Field:
+        # 가장 흔한 경우: run 전체가 필드 하나
+        name, raw = parts[0]
+        return str(data[name]) if name in data else raw
+    return "".join(
+        (str(data[part.name]) if part.name in data else part.raw) if type(part) is Field else part
+        for part in parts
+    )
+
+def _index_paragraph(p_idx: int, texts: list[str]) -> list[tuple[int, int, str, tuple]]:
+    joined = "".join(texts)
+    tokens = list(FIELD_PATTERN.finditer(joined))
+    if not tokens:
+        return []
+
+    runs = []
+    start = 0
+    for r_idx, text in enumerate(texts):
+        end = start + len(text)
+        parts = []
+        pos = start
+        for token in tokens:
+            if token.end() <= start or token.start() >= end:
+                continue
+            if token.start() > pos:
+                parts.append(joined[pos:token.start()])
+            if token.start() >= start:
+                # token은 시작한 run에 통째로 들어가고, 다음 run들에 걸친 부분은 그 run들에서 빠짐
+                parts.append(Field(field_name(token.group(1)), token.group(0)))
+            pos = token.end()
+        if pos < end:
+            parts.append(joined[pos:end])
+        if any(isinstance(part, Field) for part in parts) or "".join(parts) != text:
+            runs.append((p_idx, r_idx, text, tuple(parts)))
+        start = end
+    return runs
+
+def _index_whole_run_label(paragraphs: list[list[str]], label: str) -> list[tuple[int, int, str, tuple]]:
+    for p_idx, texts in enumerate(paragraphs):
+        for r_idx, text in enumerate(texts):
+            if text.strip().lower() == label:
+                return [(p_idx, r_idx, text, (Field(label, text),))]
+    return []
@@ -0,0 +1,108 @@
+import re
+from dataclasses import dataclass, field
+
+# 라벨지의 실제 용지 크기 (세로 방향 가로 x 세로, cm)
+PAPER_SIZE = {
+    "A4": (21.0, 29.7),
+    "A3": (29.7, 42.0),
+    "Letter": (21.59, 27.94),
+    "Ledger": (27.94, 43.18),
+}
+# 라벨 배치가 용지를 이 이상(cm) 넘으면 잘못된 정의로 봄 (제조사 치수의 반올림 오차는 허용)
+_TOLERANCE = 0.02
+# set_label_template이 core_properties.comments에 쓰는 형식. to_comment()와 짝을 이룸
+_COMMENT_PATTERN = re.compile(
+    r"^(?P<company>\S+) (?P<name>\S+) (?P<category>.+) (?P<page_size>\S+) (?P<horizontal_num>\d+)x(?P<vertical_num>\d+)"
+    r" margin: (?P<top_margin>[\d.]+), (?P<side_margin>[\d.]+)"
+    r" label: (?P<label_height>[\d.]+), (?P<label_width>[\d.]+)"
+    r" gap: (?P<horizontal_gap>[\d.]+), (?P<vertical_gap>[\d.]+)$"
+)
+
+@dataclass(frozen=True)
+class LabelTemplate:
+    """
+    시판 라벨지 한 종류의 배치 (길이 단위: cm). 라벨은 왼쪽 위에서 시작해
+    가로로 horizontal_num개, 세로로 vertical_num개가 놓이고 이웃한 라벨 사이에 gap이 있습니다.
+    칸마다 라벨 왼쪽 위 좌표는 처음 만들 때 한 번 계산해 positions에 둡니다.
+    """
+    company: str
+    name: str
+    category: str
+    page_size: str
+    horizontal_num: int
+    vertical_num: int
+    top_margin: float
+    side_margin: float
+    label_height: float
+    label_width: float
+    horizontal_gap: float
+    vertical_gap: float
+    positions: tuple[tuple[float, float], ...] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        if self.page_size not in PAPER_SIZE:
+            raise ValueError(f"Unknown page size '{self.page_size}' of label template '{self.key}'. Options: {list(PAPER_SIZE)}")
+        page_width, page_height = self.page
+        right = self.side_margin + self.horizontal_num * self.label_width + (self.horizontal_num - 1) * self.horizontal_gap
+        bottom = self.top_margin + self.vertical_num * self.label_height + (self.vertical_num - 1) * self.vertical_gap
+        if right > page_width + _TOLERANCE or bottom > page_height + _TOLERANCE:
+            raise ValueError(f"Labels of '{self.key}' do not fit on a {self.page_size} page")
+        object.__setattr__(self, "positions", tuple(
+            (round(self.side_margin + col * (self.label_width + self.horizontal_gap), 4),
+             round(self.top_margin + row * (self.label_height + self.vertical_gap), 4))
+            for row in range(self.vertical_num)
+            for col in range(self.horizontal_num)
+        ))
+
+    @property
+    def key(self) -> str:
+        return f"{self.company} {self.name}"
+
+    @property
+    def page(self) -> tuple[float, float]:
+        """용지 크기 (가로, 세로) cm"""
+        return PAPER_SIZE[self.page_size]
+
+    @property
+    def count(self) -> int:
+        return self.horizontal_num * self.vertical_num
+
+    def to_comment(self) -> str:
+        return (
+            f"{self.company} {self.name} {self.category} {self.page_size} {self.horizontal_num}x{self.vertical_num}"
+            f" margin: {self.top_margin}, {self.side_margin} label: {self.label_height}, {self.label_width}"
+            f" gap: {self.horizontal_gap}, {self.vertical_gap}"
+        )
+
+    @classmethod
+    def from_comment(cls, comment: str) -> "LabelTemplate|None":
+        """to_comment()로 쓴 문자열을 읽습니다. 형식이 다르면 None을 반환합니다."""
+        match = _COMMENT_PATTERN.match((comment or "").strip())
+        if match is None:
+            return None
+        fields = match.groupdict()
+        return cls(
+            fields["company"], fields["name"], fields["category"], fields["page_size"],
+            int(fields["horizontal_num"]), int(fields["vertical_num"]),
+            float(fields["top_margin"]), float(fields["side_margin"]),
+            float(fields["label_height"]), float(fields["label_width"]),
+            float(fields["horizontal_gap"]), float(fields["vertical_gap"]),
+        )
+
+def _inch(value: float) -> float:
+    return round(value * 2.54, 4)
+
+LABEL_TEMPLATES: dict[str, LabelTemplate] = {t.key: t for t in [
+    LabelTemplate("FORMTEC", "3100", "바코드라벨", "A4", 5, 13, 1.07, 0.46, 2.12, 3.81, 0.25, 0.0),
+    LabelTemplate("Avery", "L7160", "주소라벨", "A4", 3, 7, 1.515, 0.725, 3.81, 6.35, 0.25, 0.0),
+    LabelTemplate("Avery", "L7163", "주소라벨", "A4", 2, 7, 1.515, 0.465, 3.81, 9.91, 0.25, 0.0),
+    LabelTemplate("Avery", "5160", "주소라벨", "Letter", 3, 10, _inch(0.5), _inch(0.1875), _inch(1), _inch(2.625), _inch(0.125), 0.0),
+    LabelTemplate("Avery", "5395", "명찰라벨", "Letter", 2, 4, _inch(0.5833), _inch(0.6875), _inch(2.3333), _inch(3.375), _inch(0.375), _inch(0.1667)),
+]}
+
+def find_label_template(key: str) -> LabelTemplate:
+    """'회사 제품명'(예: 'FORMTEC 3100')으로 catalog에서 찾습니다. 대소문자는 구분하지 않습니다."""
+    for template in LABEL_TEMPLATES.values():
+        if template.key.casefold() == key.strip().casefold():
+            return template
+    raise ValueError(f"Unknown label template '{key}'. Options: {list(LABEL_TEMPLATES)}")
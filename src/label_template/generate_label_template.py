@@ -1,45 +1,14 @@
+import os
+import argparse
 import pptx.presentation
 
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pptx import Presentation
 from pptx.util import Cm, Pt
 from pptx.enum.shapes import MSO_SHAPE, PP_PLACEHOLDER
 from pptx.dml.color import RGBColor
-from dataclasses import dataclass
-from typing import Literal
-
-
-@dataclass
-class LabelTemplate:
-    company: str
-    name: str
-    category: str
-    page_size: str
-    horizontal_num: int
-    vertical_num: int
-    top_margin: float
-    side_margin: float
-    label_height: float
-    label_width: float
-    horizontal_gap: float
-    vertical_gap: float
-
-prs: pptx.presentation.Presentation = Presentation("template/nametag2.pptx")
-
-SLIDE_SIZE = {
-    "default": (Cm(25.4), Cm(19.05)),   # 기본 (16:9 비율)
-    "A3": (Cm(35.56), Cm(26.67)),       # A3 (297mm x 420mm)
-    "A4": (Cm(27.517), Cm(19.05)),      # A4 (210mm x 297mm)
-    "Letter": (Cm(25.4), Cm(19.05)),    # Letter (8.5in x 11in)
-    "Ledger": (Cm(33.831), Cm(25.374))  # Ledger (11in x 17in)
-}
-
-SlideSizeType = Literal["default", "A3", "A4", "Letter", "Ledger"]
-SlideOrientation = Literal["landscape", "portrait"]
-
-def set_slide_size(prs: Presentation, size: SlideSizeType = "default", orientation: SlideOrientation = "landscape"):
-    if size not in SLIDE_SIZE:
-        raise ValueError(f"'{size}'은(는) 지원되지 않는 슬라이드 크기입니다. 사용 가능한 옵션: {list(SLIDE_SIZE.keys())}")
-    prs.slide_width, prs.slide_height = SLIDE_SIZE[size][:: -1] if orientation == "portrait" else SLIDE_SIZE[size]
+
+from .catalog import LABEL_TEMPLATES, LabelTemplate, find_label_template
 
 def set_label_template(prs: Presentation, label_info: str) -> None:
     prs.core_properties.comments = label_info
@@ -47,17 +16,22 @@ def set_label_template(prs: Presentation, label_info: str) -> None:
 def get_label_template(prs: Presentation) -> str:
     return prs.core_properties.comments or None
 
+def set_page_size(prs: Presentation, label_template: LabelTemplate) -> None:
+    """슬라이드 크기를 라벨지의 실제 용지 크기로 맞춥니다. (칸 위치가 용지 기준 절대 좌표이므로)"""
+    width, height = label_template.page
+    prs.slide_width, prs.slide_height = Cm(width), Cm(height)
+
 
-def create_template_slide(prs: Presentation, label_template: LabelTemplate) -> None:
+def create_template_slide(prs: Presentation, label_template: LabelTemplate, layout: int = 1) -> None:
     """
-    'template/nametag.pptx' 파일에서 slide_layouts[1]을 사용하여 새로운 슬라이드를 추가하고,
+    'template/nametag.pptx' 파일에서 slide_layouts[layout]을 사용하여 새로운 슬라이드를 추가하고,
     - 직사각형 실선으로 내용물 범위를 표시
     - Picture Placeholder를 찾아서 배경 영역으로 사용
 
     :param prs: pptx.presentation.Presentation 객체
     """
     # 📌 slide_layouts[1]을 사용 (이 레이아웃에는 Picture Placeholder가 포함됨)
-    slide_layout = prs.slide_layouts[2]
+    slide_layout = prs.slide_layouts[layout]
     slide = prs.slides.add_slide(slide_layout)
 
     # 🔹 기존 내용물 제거 (자리 표시자 제외)
@@ -84,6 +58,8 @@ def create_template_slide(prs: Presentation, label_template: LabelTemplate) -> N
         if shape.placeholder_format.type == PP_PLACEHOLDER.PICTURE:
             placeholder = shape
             break
+    if placeholder is None:
+        return
 
     placeholder.width, placeholder.height = int(Cm(label_template.label_width) + Cm(label_template.horizontal_gap)/2), int(Cm(label_template.label_height) + Cm(label_template.vertical_gap)/2)
     placeholder.left, placeholder.top = int((prs.slide_width - placeholder.width)/2), int((prs.slide_height - placeholder.height)/2)
@@ -105,11 +81,47 @@ def delete_slide(prs: Presentation, idx: int) -> None:
     prs.part.drop_rel(rId)
     del prs.slides._sldIdLst[idx]
 
-lt = LabelTemplate("FORMTEC", "3100", "바코드라벨", "A4", 5, 13, 1.07, 0.46, 2.12, 3.81, 0.25, 0.0)
-
-clear_slides(prs)
-set_slide_size(prs, lt.page_size, "portrait")
-set_label_template(prs, f"{lt.company} {lt.name} {lt.category} {lt.page_size} {lt.horizontal_num}x{lt.vertical_num} margin: {lt.top_margin}, {lt.side_margin} label: {lt.label_height}, {lt.label_width} gap: {lt.horizontal_gap}, {lt.vertical_gap}")
-create_template_slide(prs, lt)
-
-prs.save(f"example/{lt.company}_{lt.name}_{lt.category}.pptx")
+def build_template(base_pptx: str, label_template: LabelTemplate, output_dir: str, layout: int = 1, guides: bool = False) -> str:
+    """base_pptx로 label_template용 명찰 템플릿 pptx 하나를 만들고 경로를 반환합니다."""
+    prs: pptx.presentation.Presentation = Presentation(base_pptx)
+    clear_slides(prs)
+    set_page_size(prs, label_template)
+    set_label_template(prs, label_template.to_comment())
+    create_template_slide(prs, label_template, layout)
+
+    output = os.path.join(output_dir, f"{label_template.company}_{label_template.name}_{label_template.category}.pptx")
+    prs.save(output)
+    if guides:
+        from .guides import PowerPointGuideEditor
+
+        editor = PowerPointGuideEditor(output)
+        editor.add_grid_guides(label_template, "00B0F0")
+        editor.save(output)
+    return output
+
+def main(argv: list[str] = None):
+    parser = argparse.ArgumentParser(description="Create a nametag template pptx for each label sheet in the catalog")
+    parser.add_argument("--base", type=str, default="template/nametag.pptx", help="PowerPoint file whose masters and layouts are reused")
+    parser.add_argument("--layout", type=int, default=1, help="Index of the slide layout with the background picture placeholder")
+    parser.add_argument("--output_dir", type=str, default="example", help="Folder to write the templates to")
+    parser.add_argument("--templates", type=str, nargs="*", help=f"Label sheets to build (default: all). Options: {list(LABEL_TEMPLATES)}")
+    parser.add_argument("--guides", action="store_true", help="Add a PowerPoint guide on every label edge")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Number of processes that build templates at the same time")
+    args = parser.parse_args(argv)
+
+    templates = [find_label_template(key) for key in args.templates] if args.templates else list(LABEL_TEMPLATES.values())
+    os.makedirs(args.output_dir, exist_ok=True)
+    with ProcessPoolExecutor(max_workers=max(1, min(args.workers, len(templates)))) as executor:
+        futures = {executor.submit(build_template, args.base, t, args.output_dir, args.layout, args.guides): t for t in templates}
+        failed = 0
+        for future in as_completed(futures):
+            try:
+                print(f"{futures[future].key}: {future.result()}")
+            except Exception as e:
+                failed += 1
+                print(f"{futures[future].key}: failed ({e})")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    # python -m src.label_template.generate_label_template --guides
+    raise SystemExit(main())
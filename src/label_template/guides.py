@@ -1,95 +1,130 @@
 import os
 import zipfile
-import xml.etree.ElementTree as ET
+from typing import TYPE_CHECKING
+from lxml import etree
 from pptx.oxml.ns import qn, _nsmap
 
-import sys
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from utils import qn_xpath, pretty_print_xml
+from ..utils import qn_xpath, replace_file, temp_file_beside
+
+if TYPE_CHECKING:
+    from ..draw_slide import SlidePositioner
+    from .catalog import LabelTemplate
 
 # p15 네임스페이스 추가
 _nsmap['p15'] = 'http://schemas.microsoft.com/office/powerpoint/2012/main'
 
+VIEW_PROPS = "ppt/viewProps.xml"
+PRESENTATION = "ppt/presentation.xml"
+# presentation.xml에서 안내선 색상(p15:sldGuideLst)을 담는 p:ext의 uri
+_SLD_GUIDE_EXT_URI = "{EFAFB233-063F-42B5-8137-9DF3F51BA10A}"
+# 안내선 위치 단위는 1/8 pt
+_GUIDE_UNITS_PER_CM = 72 / 2.54 * 8
+
+def cm_to_guide_pos(cm: float) -> int:
+    return round(cm * _GUIDE_UNITS_PER_CM)
 
 class PowerPointGuideEditor:
+    """
+    pptx의 안내선(guide)을 편집합니다.
+
+    viewProps.xml(위치)과 presentation.xml(색상)만 메모리에서 고치고, 저장할 때 나머지 항목은
+    원본 zip에서 같은 이름과 압축 방식으로 옮겨 씁니다. 임시 폴더를 쓰지 않으므로 동시에 여러 개를 실행해도 됩니다.
+    """
     def __init__(self, pptx_file: str):
         self.pptx_file = pptx_file
-        self.temp_dir = "pptx_temp"
-        self.view_props_path = os.path.join(self.temp_dir, "ppt/viewProps.xml")
-        self.presentation_path = os.path.join(self.temp_dir, "ppt/presentation.xml")
-        
-        self._extract_pptx()
-        self._load_xml_trees()
-    
-    def _extract_pptx(self):
-        """PPTX 파일을 압축 해제합니다."""
-        with zipfile.ZipFile(self.pptx_file, "r") as zip_ref:
-            zip_ref.extractall(self.temp_dir)
-    
-    def _load_xml_trees(self):
-        """XML 트리를 로드합니다."""
-        self.view_props_tree = ET.parse(self.view_props_path) if os.path.exists(self.view_props_path) else None
-        self.presentation_tree = ET.parse(self.presentation_path) if os.path.exists(self.presentation_path) else None
-        assert self.view_props_tree or self.presentation_tree, "PPTX 파일을 불러오는 데 실패했습니다."
-        self.view_props_root = self.view_props_tree.getroot() if self.view_props_tree else None
-        self.presentation_root = self.presentation_tree.getroot() if self.presentation_tree else None
-        for ns in _nsmap:
-            ET.register_namespace(ns, _nsmap[ns])
-                
-    def _save_pptx(self, output_pptx: str):
-        """변경된 XML을 압축하여 새로운 PPTX 파일로 저장합니다."""
-        with zipfile.ZipFile(output_pptx, "w", zipfile.ZIP_DEFLATED) as new_zip:
-            for folder, _, files in os.walk(self.temp_dir):
-                for file in files:
-                    file_path = os.path.join(folder, file)
-                    arcname = file_path.replace(self.temp_dir + os.sep, "")  # ZIP 내부 경로 유지
-                    new_zip.write(file_path, arcname)
-    
-    def _cleanup_temp(self):
-        """임시 폴더 삭제"""
-        for root, _, files in os.walk(self.temp_dir, topdown=False):
-            for file in files:
-                os.remove(os.path.join(root, file))
-            os.rmdir(root)
+        with zipfile.ZipFile(pptx_file) as zf:
+            names = set(zf.namelist())
+            self.view_props_root = etree.fromstring(zf.read(VIEW_PROPS)) if VIEW_PROPS in names else None
+            self.presentation_root = etree.fromstring(zf.read(PRESENTATION)) if PRESENTATION in names else None
+        assert self.view_props_root is not None and self.presentation_root is not None, "PPTX 파일을 불러오는 데 실패했습니다."
 
     def add_guide(self, pos: int, orient: str = None, color: str = None):
         """
         개별 안내선을 추가하는 함수. ID를 자동으로 할당하며, 위치와 색상을 개별적으로 추가 가능.
-        
-        :param pos: 안내선 위치
+
+        :param pos: 안내선 위치 (1/8 pt 단위, cm_to_guide_pos로 변환)
         :param orient: 'horz' (수평) 또는 None (수직)
         :param color: 안내선 색상 (RGB HEX 코드)
         """
         # 🔹 viewProps.xml 수정 (위치 추가)
         guide_list = self.view_props_root.find(qn_xpath(".//p:slideViewPr/p:cSldViewPr/p:guideLst"))
         if guide_list is None:
-            guide_list = ET.SubElement(self.view_props_root.find(qn_xpath(".//p:slideViewPr/p:cSldViewPr")), qn("p:guideLst"))
-        
-        ET.SubElement(guide_list, qn("p:guide"), {"pos": str(pos), **({"orient": orient} if orient else {})})
+            guide_list = etree.SubElement(self.view_props_root.find(qn_xpath(".//p:slideViewPr/p:cSldViewPr")), qn("p:guideLst"))
+
+        etree.SubElement(guide_list, qn("p:guide"), {"pos": str(pos), **({"orient": orient} if orient else {})})
 
         # 🔹 presentation.xml 수정 (색상 추가)
-        sldGuideLst = self.presentation_root.find(qn_xpath(".//p:extLst/p:ext/p15:sldGuideLst"))
-        if sldGuideLst is None:
-            sldGuideLst = ET.SubElement(self.presentation_root.find(qn_xpath(".//p:extLst/p:ext")), qn("p15:sldGuideLst"))
-        
+        sldGuideLst = self._sld_guide_list()
         guide_id = len(sldGuideLst.findall(qn("p15:guide"))) + 1  # 자동 ID 할당
-        guide = ET.SubElement(sldGuideLst, qn("p15:guide"), {"id": str(guide_id), "pos": str(pos), **({"orient": orient} if orient else {}), "userDrawn": "1"})
-        
+        guide = etree.SubElement(sldGuideLst, qn("p15:guide"), {"id": str(guide_id), "pos": str(pos), **({"orient": orient} if orient else {}), "userDrawn": "1"})
+
         if color:
-            clr_elem = ET.SubElement(guide, qn("p15:clr"))
-            ET.SubElement(clr_elem, qn("a:srgbClr"), {"val": color})
-    
-    def write(self):
-        self.view_props_tree.write(self.view_props_path, xml_declaration=True, encoding="UTF-8")
-        self.presentation_tree.write(self.presentation_path, xml_declaration=True, encoding="UTF-8")
+            clr_elem = etree.SubElement(guide, qn("p15:clr"))
+            etree.SubElement(clr_elem, qn("a:srgbClr"), {"val": color})
+
+    def add_grid_guides(self, layout: "SlidePositioner|LabelTemplate", color: str = None):
+        """명찰(라벨) 칸마다 왼쪽/오른쪽, 위/아래 가장자리에 안내선을 추가합니다. 겹치는 선은 한 번만 추가합니다."""
+        vertical, horizontal = grid_lines(layout)
+        for x in vertical:
+            self.add_guide(cm_to_guide_pos(x), None, color)
+        for y in horizontal:
+            self.add_guide(cm_to_guide_pos(y), "horz", color)
+
+    def _sld_guide_list(self):
+        ext_list = self.presentation_root.find(qn("p:extLst"))
+        if ext_list is None:
+            ext_list = etree.SubElement(self.presentation_root, qn("p:extLst"))
+        ext = ext_list.find(f"{qn('p:ext')}[@uri='{_SLD_GUIDE_EXT_URI}']")
+        if ext is None:
+            ext = etree.SubElement(ext_list, qn("p:ext"), {"uri": _SLD_GUIDE_EXT_URI})
+        sldGuideLst = ext.find(qn("p15:sldGuideLst"))
+        if sldGuideLst is None:
+            sldGuideLst = etree.SubElement(ext, qn("p15:sldGuideLst"), nsmap={"p15": _nsmap["p15"]})
+        return sldGuideLst
 
     def save(self, output_pptx: str):
-        self.write()
-        self._save_pptx(output_pptx)
-        self._cleanup_temp()
+        """
+        고친 두 XML은 새로 쓰고 나머지는 원본 항목 그대로 output_pptx에 씁니다.
+        같은 폴더의 임시 파일에 쓴 뒤 옮기므로 output_pptx가 입력 파일과 같아도 됩니다.
+        """
+        modified = {
+            VIEW_PROPS: etree.tostring(self.view_props_root, xml_declaration=True, encoding="UTF-8", standalone=True),
+            PRESENTATION: etree.tostring(self.presentation_root, xml_declaration=True, encoding="UTF-8", standalone=True),
+        }
+        tmp = temp_file_beside(output_pptx)
+        try:
+            with zipfile.ZipFile(self.pptx_file) as source, zipfile.ZipFile(tmp, "w") as target:
+                for info in source.infolist():
+                    if info.filename in modified:
+                        target.writestr(info.filename, modified[info.filename], compress_type=zipfile.ZIP_DEFLATED)
+                    else:
+                        target.writestr(info, source.read(info))
+            replace_file(tmp, output_pptx)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+def grid_lines(layout: "SlidePositioner|LabelTemplate") -> tuple[list[float], list[float]]:
+    """
+    layout의 칸 가장자리 위치(cm) (세로선 x 목록, 가로선 y 목록).
+    SlidePositioner는 명찰 크기를, LabelTemplate은 라벨 크기를 칸 크기로 씁니다.
+    """
+    from ..draw_slide import SlidePositioner
+
+    if isinstance(layout, SlidePositioner):
+        width, height = layout._sample.width, layout._sample.height
+    else:
+        width, height = layout.label_width, layout.label_height
+    # 둘 다 한 페이지의 칸 위치를 미리 계산해 positions에 두고 있음
+    lefts = {left for left, _ in layout.positions}
+    tops = {top for _, top in layout.positions}
+    vertical = sorted({round(x, 4) for left in lefts for x in (left, left + width)})
+    horizontal = sorted({round(y, 4) for top in tops for y in (top, top + height)})
+    return vertical, horizontal
 
 if __name__ == "__main__":
-    # $env:PYTHONPATH = "$PWD\src" && python '.\src\label_template\guides.py' # 잘 안됨...
+    # python -m src.label_template.guides
     input_pptx = "template/nametag.pptx"
     output_pptx = "example/ppt_with_guides.pptx"
 
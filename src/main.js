@@ -40,20 +40,26 @@ function startPythonIPCServer() {
         encoding: 'utf8'
     });
 
+    let stdoutBuffer = "";
     pythonProcess.stdout.on("data", (data) => {
-        const text = data.toString().trim();
-        for (const line of text.split("\n")) {
+        // progress 줄이 자주 오므로 청크 경계에서 잘린 줄은 다음 청크와 합쳐서 처리
+        stdoutBuffer += data.toString();
+        const lines = stdoutBuffer.split("\n");
+        stdoutBuffer = lines.pop();
+        for (const line of lines.map(l => l.trim()).filter(l => l)) {
             try {
                 const response = JSON.parse(line);
 
-                if (response && response.status) {
+                if (response && response.event === "progress") {
+                    win.webContents.send("task-progress", response);
+                } else if (response && response.status) {
                     console.log(`Sending to renderer:`, response);
                     win.webContents.send("task-result", response);
                 } else {
                     console.warn("Received JSON but no 'status' field:", response);
                 }
             } catch (error) {
-                if (text.includes("ready")) {
+                if (line.includes("ready")) {
                     console.log("✅ Python 실행 완료! 이제 요청을 받을 수 있음.");
                     pythonReady = true;
                 }
@@ -73,6 +79,24 @@ function startPythonIPCServer() {
 }
 
 ipcMain.on("execute-task", (event, requestData) => {
+    // Python은 작업 스레드에서 생성하므로 Tk 대화상자를 띄우지 않음. 저장 위치는 여기서 먼저 물어 output으로 보냄
+    if (requestData.task === "generate_pptx" && !requestData.data.output) {
+        dialog.showSaveDialog(win, {
+            title: "Save the file as",
+            defaultPath: `generated-${path.basename(requestData.data.pptx || "nametag.pptx")}`,
+            filters: [{ name: 'PowerPoint Files', extensions: ['pptx'] }]
+        }).then(result => {
+            if (result.canceled || !result.filePath) {
+                win.webContents.send("task-result", { task: "generate_pptx", status: "success", message: "Saving PPTX canceled by user" });
+                return;
+            }
+            requestData.data.output = result.filePath;
+            ipcMain.emit("execute-task", event, requestData);
+        }).catch(err => {
+            console.log(err);
+        });
+        return;
+    }
     if (!pythonReady) {
         console.warn("⏳ Python이 아직 실행되지 않았음. 요청 대기 중...");
         if (requestData.task === "generate_pptx") {
@@ -0,0 +1,146 @@
+from collections import namedtuple
+from pptx.presentation import Presentation
+
+from .draw_nametag import NameTagDrawer
+from .compile_nametag import CompiledNameTag
+from .draw_slide import SlidePositioner
+from .job import Job
+from .profiler import measure
+from .stream_writer import StreamingPptxWriter
+from .utils import SlideAppender
+
+# 명찰 하나를 놓을 자리. (left, top)은 padding을 뺀 명찰 왼쪽 위 좌표(cm)
+Placement = namedtuple("Placement", ["sample_num", "left", "top", "data"])
+
+class _Page:
+    """
+    shelf 방식으로 채우는 페이지 하나.
+    shelf는 [top, height, 다음 칸의 left] 목록이며, 위에서부터 차례로 쌓입니다.
+    """
+    __slots__ = ("shelves", "bottom", "right", "cells")
+
+    def __init__(self):
+        self.shelves: list[list[float]] = []
+        self.bottom = 0.0
+        self.right = 0.0
+        self.cells: list[tuple[int, float, float, dict]] = []
+
+class PagePacker:
+    """
+    크기가 다른 여러 sample의 명찰을 shelf(FFDH) 방식으로 같은 페이지에 채워 넣습니다.
+
+    - 칸 크기는 명찰 크기 + padding 양쪽이고, 이웃한 칸 사이에는 margin을 둡니다. (SlidePositioner와 같은 규칙)
+    - 높은 칸부터 놓고, 앞 페이지의 shelf에 남은 자리가 있으면 새 페이지보다 먼저 채웁니다.
+    - 페이지마다 채운 영역 전체를 슬라이드 가운데에 맞춥니다.
+    - sample이 하나뿐이면 SlidePositioner와 같은 열/행 수가 나옵니다.
+    """
+    def __init__(self, slide_size, samples: dict[int, NameTagDrawer|CompiledNameTag], padding = (0, 0), margin = (0, 0), per_slide = None):
+        self._slide_width, self._slide_height = slide_size
+        self._samples = samples
+        self.padding = padding
+        self.margin = margin
+        if per_slide is not None and per_slide <= 0:
+            raise ValueError("per_slide must be a positive integer or None.")
+        self.per_slide = per_slide
+
+    def cell_size(self, sample_num: int) -> tuple[float, float]:
+        sample = self._samples[sample_num]
+        return (sample.width + self.padding[0] * 2, sample.height + self.padding[1] * 2)
+
+    def pack(self, data_by_sample: dict[int, list[dict]]) -> list[list[Placement]]:
+        """페이지별 Placement 목록. 한 페이지 안에서는 sample 번호 순서로, 같은 sample은 엑셀 순서로 놓입니다."""
+        for sample_num in data_by_sample:
+            width, height = self.cell_size(sample_num)
+            if width > self._slide_width or height > self._slide_height:
+                raise ValueError(f"Sample {sample_num} is too large to fit in the slide with the given margins and padding.")
+
+        order = sorted(data_by_sample, key=lambda i: self.cell_size(i)[::-1], reverse=True)
+        pages: list[_Page] = []
+        for sample_num in order:
+            width, height = self.cell_size(sample_num)
+            # 같은 크기의 칸이 들어가지 않은 페이지는 다음 칸도 들어가지 않으므로 거기서부터 다시 찾음
+            first_page = 0
+            for data in data_by_sample[sample_num]:
+                first_page = self._place(pages, first_page, sample_num, width, height, data)
+        return [self._center(page) for page in pages]
+
+    def _place(self, pages: list[_Page], first_page: int, sample_num: int, width: float, height: float, data: dict) -> int:
+        """칸 하나를 들어갈 수 있는 첫 페이지에 놓고 그 페이지 번호를 반환합니다."""
+        for page_idx in range(first_page, len(pages)):
+            page = pages[page_idx]
+            if self.per_slide is not None and len(page.cells) >= self.per_slide:
+                continue
+            for shelf in page.shelves:
+                left = shelf[2]
+                if height <= shelf[1] and left + width <= self._slide_width:
+                    self._put(page, shelf, sample_num, width, data)
+                    return page_idx
+            top = page.bottom + self.margin[1] if page.shelves else 0.0
+            if top + height <= self._slide_height:
+                shelf = [top, height, 0.0]
+                page.shelves.append(shelf)
+                page.bottom = top + height
+                self._put(page, shelf, sample_num, width, data)
+                return page_idx
+
+        page = _Page()
+        shelf = [0.0, height, 0.0]
+        page.shelves.append(shelf)
+        page.bottom = height
+        pages.append(page)
+        self._put(page, shelf, sample_num, width, data)
+        return len(pages) - 1
+
+    def _put(self, page: _Page, shelf: list[float], sample_num: int, width: float, data: dict):
+        left = shelf[2]
+        page.cells.append((sample_num, left, shelf[0], data))
+        page.right = max(page.right, left + width)
+        shelf[2] = left + width + self.margin[0]
+
+    def _center(self, page: _Page) -> list[Placement]:
+        offset_x = (self._slide_width - page.right) / 2 + self.padding[0]
+        offset_y = (self._slide_height - page.bottom) / 2 + self.padding[1]
+        # CompiledNameTag는 슬라이드가 바뀔 때만 shape id를 다시 세므로 같은 sample을 한 번에 이어서 그림
+        cells = sorted(page.cells, key=lambda cell: cell[0])
+        return [Placement(sample_num, left + offset_x, top + offset_y, data) for sample_num, left, top, data in cells]
+
+    def report(self, pages: list[list[Placement]], data_by_sample: dict[int, list[dict]]) -> dict:
+        """
+        페이지 사용률 비교. utilisation은 명찰(padding 제외)이 차지하는 넓이 / 전체 페이지 넓이입니다.
+        grid_*는 sample마다 SlidePositioner로 따로 그렸을 때의 값입니다.
+        """
+        slide_area = self._slide_width * self._slide_height
+        nametag_area = sum(
+            len(rows) * self._samples[sample_num].width * self._samples[sample_num].height
+            for sample_num, rows in data_by_sample.items()
+        )
+        grid_pages = sum(
+            SlidePositioner((self._slide_width, self._slide_height), self._samples[sample_num], rows, self.padding, self.margin, self.per_slide).num_slides
+            for sample_num, rows in data_by_sample.items()
+        )
+        return {
+            "pages": len(pages),
+            "grid_pages": grid_pages,
+            "utilisation": round(nametag_area / (len(pages) * slide_area), 4) if pages else 0.0,
+            "grid_utilisation": round(nametag_area / (grid_pages * slide_area), 4) if grid_pages else 0.0,
+        }
+
+def draw_packed(prs: Presentation, samples: dict[int, NameTagDrawer|CompiledNameTag], pages: list[list[Placement]], blank_slide_layout = 0, job: Job = None, writer: StreamingPptxWriter = None):
+    """PagePacker.pack의 결과대로 페이지마다 슬라이드 하나에 명찰을 그립니다."""
+    slide_layout = prs.slide_layouts[blank_slide_layout]
+    appender = SlideAppender(prs)
+    for placements in pages:
+        if job is not None:
+            job.check()
+        with measure("slide.add"):
+            slide = appender.add_slide(slide_layout)
+        for sample_num, left, top, data in placements:
+            sample = samples[sample_num]
+            sample.draw(slide, left, top)
+            sample.set_text(data)
+        if writer is not None:
+            with measure("slide.flush"):
+                writer.flush(slide.part)
+        if job is not None:
+            job.advance(placements[-1].sample_num, pages=1, nametags=len(placements))
+    return prs
@@ -0,0 +1,179 @@
+import math
+import re
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FuturesTimeoutError
+
+from pptx import Presentation
+from pptx.presentation import Presentation as PresentationType
+from pptx.opc.constants import CONTENT_TYPE as CT
+from pptx.opc.package import Part
+from pptx.parts.slide import SlidePart
+
+from .draw_nametag import NameTagDrawer
+from .draw_slide import SlideDrawer, SlidePositioner
+from .image_cache import ImagePartCache
+from .job import Job, JobCancelled
+from .profiler import Profiler, current_profiler, measure, profiling
+from .stream_writer import StreamingPptxWriter
+from .utils import SlideAppender, truncate_slides
+
+_R_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+
+# 작업 프로세스마다 템플릿을 한 번만 열어두고 shard가 끝날 때마다 생성한 슬라이드를 되돌림
+_worker_templates: dict[str, tuple[PresentationType, int, set[str]]] = {}
+
+def plan_shards(prs: PresentationType, data_by_sample: dict[int, list[dict]], workers: int, shards_per_worker: int = 4, **layout) -> list[tuple[int, list[dict]]]:
+    """
+    페이지 경계에 맞춰 (sample_num, rows) shard 목록을 만듭니다.
+    shard 하나는 항상 한 페이지 인원의 배수이므로 직렬로 그릴 때와 같은 배치가 나옵니다.
+    """
+    slide_size = (prs.slide_width.cm, prs.slide_height.cm)
+    per_page = {}
+    total_pages = 0
+    for sample_num, rows in data_by_sample.items():
+        sample = NameTagDrawer.create_from_slide(prs.slides[sample_num])
+        per_page[sample_num] = SlidePositioner(slide_size, sample, rows, **layout).num_per_slide
+        total_pages += math.ceil(len(rows) / per_page[sample_num])
+
+    pages_per_shard = max(1, math.ceil(total_pages / (workers * shards_per_worker)))
+    shards = []
+    for sample_num, rows in data_by_sample.items():
+        step = pages_per_shard * per_page[sample_num]
+        for i in range(0, len(rows), step):
+            shards.append((sample_num, rows[i:i + step]))
+    return shards
+
+def worker_template(pptx: str) -> tuple[PresentationType, int, set[str]]:
+    """(작업 프로세스에서 실행) 이 프로세스에서 열어둔 템플릿 (prs, sample 수, 템플릿의 partname들)"""
+    if pptx not in _worker_templates:
+        prs = Presentation(pptx)
+        _worker_templates[pptx] = (prs, len(prs.slides), {str(p.partname) for p in prs.part.package.iter_parts()})
+    return _worker_templates[pptx]
+
+def render_shard(pptx: str, sample_num: int, rows: list[dict], engine: str = "clone", layout: dict = None, profile: bool = False, fit_text: bool = False) -> dict:
+    """
+    (작업 프로세스에서 실행) shard 하나를 템플릿 복사본에 그리고 슬라이드를 직렬화해 반환합니다.
+
+    반환값: {"slides": [(slide xml, [(rId, reltype, is_external, target)])], "parts": {partname: (content_type, blob)}}
+    target은 외부 링크면 URL, 아니면 partname이며, 템플릿에 없던 part만 "parts"에 blob으로 담깁니다.
+    profile이면 작업 프로세스에서 측정한 stage별 시간이 "profile"에 담깁니다.
+    """
+    prs, sample_count, template_partnames = worker_template(pptx)
+
+    try:
+        with profiling(Profiler() if profile else None) as profiler:
+            drawer = SlideDrawer(prs, sample_num, rows, engine=engine)
+            drawer.sample.use_text_fit(fit_text)
+            drawer.draw(**(layout or {}))
+            with measure("parallel.serialize"):
+                slides, parts = [], {}
+                for sldId in list(prs.slides._sldIdLst)[sample_count:]:
+                    slide_part = prs.part.related_part(sldId.rId)
+                    rels = []
+                    for rId, rel in slide_part.rels.items():
+                        if rel.is_external:
+                            rels.append((rId, rel.reltype, True, rel.target_ref))
+                            continue
+                        partname = str(rel.target_part.partname)
+                        if partname not in template_partnames and partname not in parts:
+                            parts[partname] = (rel.target_part.content_type, rel.target_part.blob)
+                        rels.append((rId, rel.reltype, False, partname))
+                    slides.append((slide_part.blob, rels))
+        shard = {"slides": slides, "parts": parts}
+        if profiler is not None:
+            shard["profile"] = profiler.samples
+        return shard
+    finally:
+        truncate_slides(prs, sample_count)
+
+class ShardMerger:
+    """
+    render_shard 결과를 원본 Presentation 뒤에 순서대로 붙입니다. 미디어는 sha1 기준으로 중복 제거됩니다.
+    writer가 주어지면 붙인 슬라이드를 바로 출력 파일로 내보냅니다.
+    """
+    def __init__(self, prs: PresentationType, writer: StreamingPptxWriter = None, appender: SlideAppender = None):
+        self._prs = prs
+        self._writer = writer
+        self._package = prs.part.package
+        self._parts = {str(p.partname): p for p in self._package.iter_parts()}
+        self._image_cache = ImagePartCache.of(self._package)
+        # 같은 prs에 다른 경로로도 슬라이드를 붙인다면(incremental) appender를 공유해야 번호가 겹치지 않음
+        self._appender = appender or SlideAppender(prs)
+
+    def _get_part(self, partname: str, new_parts: dict) -> Part:
+        if partname in new_parts:
+            content_type, blob = new_parts[partname]
+            if content_type.startswith("image/"):
+                return self._image_cache.get_or_add_blob(blob)
+            key = (partname, blob)
+            if key not in self._parts:
+                tmpl = re.sub(r"\d*(\.\w+)$", r"%d\1", partname)
+                self._parts[key] = Part(self._package.next_partname(tmpl), content_type, self._package, blob)
+            return self._parts[key]
+        return self._parts[partname]
+
+    def merge(self, shard: dict):
+        for blob, rels in shard["slides"]:
+            slide_part = self.merge_slide(blob, rels, shard["parts"])
+            if self._writer is not None:
+                self._writer.flush(slide_part)
+
+    def merge_slide(self, blob: bytes, rels: list[tuple], parts: dict, part_class: type[SlidePart] = SlidePart) -> SlidePart:
+        """직렬화된 슬라이드 하나를 마지막 슬라이드로 붙이고 slide part를 반환합니다. (rels, parts 형식은 render_shard 참고)"""
+        slide_part = part_class.load(self._appender.next_partname(), CT.PML_SLIDE, self._package, blob)
+
+        rId_map = {}
+        for rId, reltype, is_external, target in sorted(rels, key=lambda r: (len(r[0]), r[0])):
+            if is_external:
+                rId_map[rId] = slide_part.relate_to(target, reltype, is_external=True)
+            else:
+                rId_map[rId] = slide_part.relate_to(self._get_part(target, parts), reltype)
+
+        if any(old != new for old, new in rId_map.items()):
+            for e in slide_part._element.iter():
+                for key, value in e.attrib.items():
+                    if key.startswith(_R_NS) and value in rId_map:
+                        e.set(key, rId_map[value])
+
+        self._appender.append(slide_part)
+        return slide_part
+
+def draw_parallel(prs: PresentationType, pptx: str, data_by_sample: dict[int, list[dict]], workers: int, engine: str = "clone", job: Job = None, writer: StreamingPptxWriter = None, fit_text: bool = False, **layout) -> PresentationType:
+    """
+    data_by_sample을 페이지 단위 shard로 나눠 여러 프로세스에서 그린 뒤 prs에 합칩니다.
+    슬라이드 순서는 직렬로 그릴 때와 같습니다 (sample 순서, 그 안에서 페이지 순서).
+    job이 취소되면 아직 시작하지 않은 shard는 버리고 JobCancelled를 발생시킵니다.
+    """
+    with measure("parallel.plan"):
+        shards = plan_shards(prs, data_by_sample, workers, **layout)
+    merger = ShardMerger(prs, writer)
+    profiler = current_profiler()
+    executor = ProcessPoolExecutor(max_workers=workers)
+    cancelled = False
+    try:
+        futures = [executor.submit(render_shard, pptx, sample_num, rows, engine, layout, profiler is not None, fit_text) for sample_num, rows in shards]
+        for (sample_num, rows), future in zip(shards, futures):
+            with measure("parallel.wait"):
+                shard = wait_result(future, job)
+            with measure("parallel.merge"):
+                merger.merge(shard)
+            if profiler is not None:
+                profiler.merge(shard["profile"])
+            if job is not None:
+                job.advance(sample_num, pages=len(shard["slides"]), nametags=len(rows))
+    except JobCancelled:
+        cancelled = True
+        raise
+    finally:
+        # 취소되었으면 실행 중인 shard가 끝나기를 기다리지 않고 바로 반환 (결과는 버려짐)
+        executor.shutdown(wait=not cancelled, cancel_futures=True)
+    return prs
+
+def wait_result(future: Future, job: Job = None, poll: float = 0.2):
+    if job is None:
+        return future.result()
+    while True:
+        job.check()
+        try:
+            return future.result(timeout=poll)
+        except FuturesTimeoutError:
+            pass
@@ -1,5 +1,18 @@
 import importlib
 import pkgutil
 
-for _, module_name, _ in pkgutil.walk_packages(__path__, prefix=__name__ + "."):
-    importlib.import_module(module_name)
\ No newline at end of file
+_applied: set[str] = set()
+
+def apply_patches(library: str = None):
+    """
+    python-pptx/openpyxl patch 모듈을 import해 적용합니다. (모듈 이름은 patch하는 라이브러리 이름으로 끝남: morefont_pptx)
+    library를 주면 그 라이브러리의 patch만 적용합니다. 여러 번 호출해도 한 번만 적용됩니다.
+    실행 시작 시간을 줄이기 위해 src를 import할 때가 아니라 라이브러리를 처음 쓰는 모듈(utils)에서 호출합니다.
+    """
+    key = library or "*"
+    if key in _applied:
+        return
+    for _, module_name, _ in pkgutil.walk_packages(__path__, prefix=__name__ + "."):
+        if library is None or module_name.endswith(library):
+            importlib.import_module(module_name)
+    _applied.add(key)
@@ -1,11 +1,12 @@
-import os
 from pptx.text.fonts import FontFiles
 
-def _windows_font_directories():
-    return [os.path.join(os.environ['WINDIR'], "Fonts") , os.path.join(os.environ['USERPROFILE'], "AppData", "Local", "Microsoft", "Windows", "Fonts")]
+from ..font_index import font_directories, installed_fonts
 
-FontFiles._windows_font_directories = _windows_font_directories
+# Windows 사용자 글꼴 폴더와 Linux(fontconfig) 폴더까지 찾고, 글꼴 파일을 매번 다시 읽지 않도록
+# 폴더 수정 시각으로 갱신하는 저장된 색인(font_index)을 씀
+FontFiles._font_directories = classmethod(lambda cls: font_directories())
+FontFiles._installed_fonts = classmethod(lambda cls: installed_fonts(cls._font_directories()))
 
 if __name__ == "__main__":
     font_names = [f[0] for f in FontFiles._installed_fonts()]
-    print(font_names)
\ No newline at end of file
+    print(font_names)
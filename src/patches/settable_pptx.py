@@ -1,9 +1,9 @@
 from pptx.text.text import _Run
 
-from ..utils import set_fill
-
 # Add setter for font
 def font(self, font):
+    # utils가 import될 때 이 patch를 적용하므로 순환 import를 피해 여기서 import
+    from ..utils import set_fill
     self.font.bold = font.bold
     self.font.italic = font.italic
     self.font.language_id = font.language_id
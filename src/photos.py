@@ -0,0 +1,160 @@
+import os
+import hashlib
+import contextvars
+import logging
+import tempfile
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from io import BytesIO
+
+from .job import Job
+from .label_index import field_name
+from .profiler import measure
+
+# 인쇄용 해상도. 사진 칸 크기(cm)를 이 해상도의 픽셀 수로 바꿔 그보다 크게는 넣지 않음
+PRINT_DPI = 300
+JPEG_QUALITY = 90
+# 변환 방식이 바뀌면 올려서 이전 디스크 캐시를 무효화
+CACHE_VERSION = 1
+DEFAULT_CACHE_DIR = os.path.join(tempfile.gettempdir(), "nametag-photos")
+
+PreparedPhoto = namedtuple("PreparedPhoto", ["blob", "sha1", "filename"])
+
+def photo_pixels(size: tuple[float, float], dpi: int = PRINT_DPI) -> tuple[int, int]:
+    """사진 칸 크기(cm)를 dpi 기준 픽셀 수로 바꿉니다."""
+    width, height = size
+    return (max(1, round(width / 2.54 * dpi)), max(1, round(height / 2.54 * dpi)))
+
+def convert_photo(blob: bytes, pixels: tuple[int, int]) -> tuple[bytes, str]:
+    """
+    사진 하나를 EXIF 방향대로 돌리고, 가운데를 기준으로 칸 비율에 맞게 자른 뒤 pixels 이하로 줄입니다.
+    원본이 더 작으면 키우지 않습니다. (blob, 확장자)를 반환하며 투명도가 있으면 PNG, 아니면 JPEG입니다.
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(BytesIO(blob)) as image:
+        # JPEG은 디코딩할 때부터 축소해 읽음. EXIF 회전 전이므로 가로/세로 중 긴 쪽 기준
+        image.draft("RGB", (max(pixels),) * 2)
+        image = ImageOps.exif_transpose(image)
+        target_width, target_height = pixels
+        scale = min(1.0, image.width / target_width, image.height / target_height)
+        size = (max(1, round(target_width * scale)), max(1, round(target_height * scale)))
+        image = ImageOps.fit(image, size, Image.LANCZOS)
+
+        stream = BytesIO()
+        if image.mode in ("RGBA", "LA") or image.mode == "P" and "transparency" in image.info:
+            image.save(stream, format="PNG", optimize=True)
+            return stream.getvalue(), "png"
+        image.convert("RGB").save(stream, format="JPEG", quality=JPEG_QUALITY, optimize=True)
+        return stream.getvalue(), "jpg"
+
+class PhotoPipeline:
+    """
+    사진 열(column)의 파일들을 그리기 전에 스레드 풀에서 한 번에 변환해 둡니다.
+
+    변환 결과는 (원본 내용의 sha1, 픽셀 크기, CACHE_VERSION)을 이름으로 cache_dir에 저장하므로
+    다시 실행할 때 바뀌지 않은 사진은 디코딩하지 않고 캐시 파일을 그대로 읽습니다.
+    """
+    def __init__(self, cache_dir: str = None, dpi: int = PRINT_DPI, workers: int = None):
+        self.cache_dir = cache_dir or DEFAULT_CACHE_DIR
+        self.dpi = dpi
+        self.workers = workers or min(8, (os.cpu_count() or 1) + 4)
+
+    def prepare(self, requests: set[tuple[str, tuple[float, float]]], job: Job = None) -> dict[tuple[str, tuple[float, float]], PreparedPhoto]:
+        """
+        requests: {(사진 경로, 칸 크기(cm))}
+        읽거나 변환하지 못한 사진은 경고를 남기고 결과에서 빠집니다. (sample의 사진이 그대로 남음)
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        photos = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            # 작업 스레드에서도 현재 profiler로 측정되도록 컨텍스트를 복사해 실행
+            futures = {
+                executor.submit(contextvars.copy_context().run, self._prepare_one, path, size): (path, size)
+                for path, size in requests
+            }
+            try:
+                for future in as_completed(futures):
+                    if job is not None:
+                        job.check()
+                    path, size = futures[future]
+                    try:
+                        photos[path, size] = future.result()
+                    except Exception as e:
+                        logging.warning("Cannot read photo '%s': %s", path, e)
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+        return photos
+
+    def _prepare_one(self, path: str, size: tuple[float, float]) -> PreparedPhoto:
+        with measure("photo.read"):
+            with open(path, "rb") as f:
+                blob = f.read()
+        pixels = photo_pixels(size, self.dpi)
+        key = hashlib.sha1(blob).hexdigest()
+        name = f"{key}-{pixels[0]}x{pixels[1]}-v{CACHE_VERSION}"
+        for ext in ("jpg", "png"):
+            cached = os.path.join(self.cache_dir, f"{name}.{ext}")
+            if os.path.exists(cached):
+                with open(cached, "rb") as f:
+                    converted = f.read()
+                return PreparedPhoto(converted, hashlib.sha1(converted).hexdigest(), f"photo.{ext}")
+
+        with measure("photo.convert"):
+            converted, ext = convert_photo(blob, pixels)
+        # 다른 실행과 동시에 써도 깨진 파일이 보이지 않도록 임시 파일에 쓰고 옮김
+        cached = os.path.join(self.cache_dir, f"{name}.{ext}")
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(converted)
+            os.replace(tmp, cached)
+        except OSError:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        return PreparedPhoto(converted, hashlib.sha1(converted).hexdigest(), f"photo.{ext}")
+
+class PhotoSet:
+    """
+    명찰 한 장의 데이터에서 그 명찰에 넣을 사진을 찾아줍니다.
+    column 값은 파일 경로이며, 상대 경로는 base_dir(엑셀 파일이 있는 폴더) 기준입니다.
+    """
+    def __init__(self, column: str, base_dir: str = ""):
+        self.column = field_name(column)
+        self.base_dir = base_dir
+        self.photos: dict[tuple[str, tuple[float, float]], PreparedPhoto] = {}
+
+    def path(self, data: dict) -> str|None:
+        value = str(data.get(self.column, "") or "").strip()
+        return os.path.join(self.base_dir, value) if value else None
+
+    def requests(self, data_by_sample: dict[int, list[dict]], slots_by_sample: dict[int, list[tuple[float, float]]]) -> set[tuple[str, tuple[float, float]]]:
+        """변환해야 할 (경로, 칸 크기) 목록. 같은 사진이 같은 크기의 칸에 여러 번 쓰여도 한 번만 변환합니다."""
+        return {
+            (path, size)
+            for sample_num, rows in data_by_sample.items()
+            for size in slots_by_sample.get(sample_num, ())
+            for path in map(self.path, rows)
+            if path is not None
+        }
+
+    def prepare(self, pipeline: PhotoPipeline, data_by_sample: dict[int, list[dict]], slots_by_sample: dict[int, list[tuple[float, float]]], job: Job = None) -> int:
+        """사진을 모두 변환해 두고, 읽지 못한 사진 수를 반환합니다."""
+        requests = self.requests(data_by_sample, slots_by_sample)
+        with measure("photo.prepare"):
+            self.photos = pipeline.prepare(requests, job)
+        return len({path for path, _ in requests} - {path for path, _ in self.photos})
+
+    def subset(self, rows: list[dict]) -> "PhotoSet":
+        """rows의 사진만 담은 PhotoSet. 다른 프로세스로 넘길 때 필요한 사진만 보내기 위해 씁니다."""
+        paths = set(map(self.path, rows))
+        subset = PhotoSet.__new__(PhotoSet)
+        subset.column, subset.base_dir = self.column, self.base_dir
+        subset.photos = {key: photo for key, photo in self.photos.items() if key[0] in paths}
+        return subset
+
+    def get(self, data: dict, size: tuple[float, float]) -> PreparedPhoto|None:
+        path = self.path(data)
+        return self.photos.get((path, size)) if path is not None else None
@@ -0,0 +1,80 @@
+import math
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from functools import wraps
+
+class Profiler:
+    """
+    stage별 소요 시간을 모아 횟수/합계/p95 보고서를 만듭니다.
+
+    profiling()으로 현재 컨텍스트에 설치되어 있을 때만 측정되며,
+    설치되지 않았으면 measure()/profiled는 아무 일도 하지 않습니다.
+    """
+    def __init__(self):
+        self.samples: dict[str, list[float]] = {}
+
+    def add(self, stage: str, seconds: float):
+        self.samples.setdefault(stage, []).append(seconds)
+
+    def merge(self, samples: dict[str, list[float]]):
+        """다른 프로세스(--workers)에서 모은 samples를 합칩니다."""
+        for stage, values in samples.items():
+            self.samples.setdefault(stage, []).extend(values)
+
+    @contextmanager
+    def measure(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start)
+
+    def report(self) -> dict[str, dict[str, float]]:
+        """{stage: {"count", "total", "p95"}} (초 단위, total이 큰 순서)"""
+        report = {}
+        for stage, values in sorted(self.samples.items(), key=lambda item: -sum(item[1])):
+            ordered = sorted(values)
+            report[stage] = {
+                "count": len(ordered),
+                "total": round(sum(ordered), 6),
+                "p95": round(ordered[math.ceil(len(ordered) * 0.95) - 1], 6),
+            }
+        return report
+
+_current: ContextVar[Profiler] = ContextVar("profiler", default=None)
+_NO_OP = nullcontext()
+
+def current_profiler() -> Profiler:
+    return _current.get()
+
+@contextmanager
+def profiling(profiler: Profiler = None):
+    """with 블록 안에서 profiler를 현재 profiler로 설치합니다. None이면 측정하지 않습니다."""
+    token = _current.set(profiler)
+    try:
+        yield profiler
+    finally:
+        _current.reset(token)
+
+def measure(stage: str):
+    profiler = _current.get()
+    return _NO_OP if profiler is None else profiler.measure(stage)
+
+def profiled(stage: str = None):
+    """함수 호출 시간을 stage(기본값: 함수 이름)로 기록하는 decorator."""
+    def decorator(func):
+        name = stage or func.__name__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            profiler = _current.get()
+            if profiler is None:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profiler.add(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
@@ -71,8 +71,11 @@ ipcRenderer.on("task-result", (event, response) => {
         ipcRenderer.emit("pptx-slide-text-complete", event, response);
     }
 
+    // RPC 모드의 Python은 경고 창을 띄우지 않고 응답의 warnings로 돌려줌
+    const warnings = (response.warnings || []).map(w => `\n⚠️ ${w}`).join("");
+
     if (response.status === "success" && response.message) {
-        showCustomAlert("✅ 성공", `${response.message}`);
+        showCustomAlert("✅ 성공", `${response.message}${warnings}`);
         console.log("Success details:", response);
     } 
     else if (response.status === "developer_error") {
@@ -85,6 +88,13 @@ ipcRenderer.on("task-result", (event, response) => {
     }
 });
 
+ipcRenderer.on("task-progress", (event, progress) => {
+    if (progress.task === "generate_pptx" && progress.nametags_total > 0) {
+        const percent = Math.floor(progress.nametags_done / progress.nametags_total * 100);
+        generateButtonText.textContent = `처리중... ${percent}%`;
+    }
+});
+
 ipcRenderer.on("python-waiting", () => {
     document.getElementById("python-loading-spinner").classList.remove("hidden");
 });
@@ -0,0 +1,101 @@
+import sys
+import json
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .job import Job
+
+class RPCServer:
+    """
+    stdin에서 한 줄에 하나씩 JSON 요청을 읽어 동시에 처리하는 RPC 서버.
+
+    요청: {"id": ..., "task": ..., "data": {...}} -> 응답에는 같은 id가 붙습니다.
+    heavy_tasks는 전용 스레드 하나에서 순서대로 실행되고 (메인 스레드가 아니므로 Tk 대화상자는 띄우지 않음),
+    나머지 가벼운 조회는 별도 스레드 풀에서 바로 처리되므로 생성 중에도 응답합니다.
+    {"task": "cancel", "data": {"id": ...}}는 대기 중이거나 실행 중인 작업을 취소합니다.
+    긴 작업은 끝나기 전까지 {"event": "progress", ...} 줄을 제한된 빈도로 보냅니다 (status 없음).
+    """
+    heavy_tasks = ("generate_pptx",)
+
+    def __init__(self, task_manager, light_workers: int = 4):
+        self.task_manager = task_manager
+        self._heavy = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rpc-heavy")
+        self._light = ThreadPoolExecutor(max_workers=light_workers, thread_name_prefix="rpc-light")
+        self._jobs: dict[object, Job] = {}
+        self._write_lock = threading.Lock()
+
+    def send(self, response: dict):
+        line = json.dumps(response, ensure_ascii=False)
+        with self._write_lock:
+            print(line, flush=True)
+
+    def run(self, stdin=sys.stdin):
+        asyncio.run(self._serve(stdin))
+
+    async def _serve(self, stdin):
+        loop = asyncio.get_running_loop()
+        running = set()
+        while True:
+            # stdin 읽기는 플랫폼마다 비동기 지원이 달라서 스레드에서 기다림
+            line = await loop.run_in_executor(None, stdin.readline)
+            if not line:
+                break
+            if not line.strip():
+                continue
+
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("Request must be a JSON object")
+            except ValueError as e:
+                self.send({"status": "developer_error", "message": str(e)})
+                continue
+
+            if request.get("task") == "cancel":
+                self.send(self._cancel(request))
+                continue
+
+            job = Job(request.get("id"), on_progress=self._progress_sender(request.get("task")))
+            if job.id is not None:
+                self._jobs[job.id] = job
+            task = loop.create_task(self._dispatch(request, job))
+            running.add(task)
+            task.add_done_callback(running.discard)
+
+        # 입력이 닫히면(프론트엔드 종료) 남은 작업을 취소하고 정리될 때까지 기다림
+        for job in self._jobs.values():
+            job.cancel()
+        if running:
+            await asyncio.gather(*running)
+        self._heavy.shutdown()
+        self._light.shutdown()
+
+    async def _dispatch(self, request: dict, job: Job):
+        executor = self._heavy if request.get("task") in self.heavy_tasks else self._light
+        try:
+            response = await asyncio.get_running_loop().run_in_executor(executor, self.task_manager.handle_request, request, job)
+        except Exception as e:
+            response = {"task": request.get("task"), "status": "developer_error", "message": str(e)}
+            if job.id is not None:
+                response["id"] = job.id
+            if job.warnings:
+                response["warnings"] = job.warnings
+        finally:
+            if self._jobs.get(job.id) is job:
+                del self._jobs[job.id]
+        self.send(response)
+
+    def _progress_sender(self, task: str):
+        return lambda progress: self.send({"task": task, **progress})
+
+    def _cancel(self, request: dict) -> dict:
+        target = (request.get("data") or {}).get("id")
+        job = self._jobs.get(target)
+        if job is not None:
+            job.cancel()
+
+        response = {"task": "cancel", "status": "success", "cancelled": job is not None}
+        if "id" in request:
+            response["id"] = request["id"]
+        return response
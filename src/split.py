@@ -0,0 +1,246 @@
+import os
+import math
+import re
+import zlib
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+from pptx.presentation import Presentation
+
+from .compile_nametag import CompiledNameTag
+from .draw_nametag import NameTagDrawer
+from .draw_slide import SlideDrawer, SlidePositioner
+from .image_cache import ImagePartCache
+from .job import Job, JobCancelled
+from .label_index import field_name
+from .parallel import wait_result, worker_template
+from .photos import PhotoSet
+from .profiler import Profiler, current_profiler, measure, profiling
+from .utils import iter_chunks, truncate_slides
+
+# 출력 파일 하나. name은 파일 이름 뒤에 붙는 부분, samples는 {sample 번호: 이 파일에 그릴 행들}
+OutputPart = namedtuple("OutputPart", ["name", "samples"])
+
+# 파일 이름에 쓸 수 없는 글자
+_UNSAFE_NAME = re.compile(r'[<>:"/\\|?*\x00-\x1f]+')
+
+def part_filename(output: str, name: str) -> str:
+    """output이 'out/tags.pptx'이고 name이 '본관'이면 'out/tags-본관.pptx'"""
+    stem, ext = os.path.splitext(output)
+    return f"{stem}-{name}{ext or '.pptx'}"
+
+def _safe_name(value) -> str:
+    name = _UNSAFE_NAME.sub("_", str(value if value is not None else "")).strip(" .")
+    return name or "blank"
+
+def _unique_names(parts: list[OutputPart]) -> list[OutputPart]:
+    """
+    대소문자를 무시하고 같은 이름이 있으면 뒤의 것에 '_2', '_3' …을 붙입니다.
+    (열 값 'A-1'과 값 'A'를 나눈 두 번째 파일 'A-1'처럼 서로 다른 파일이 같은 이름을 받는 경우)
+    """
+    used = set()
+    unique = []
+    for part in parts:
+        name, n = part.name, 1
+        while name.casefold() in used:
+            n += 1
+            name = f"{part.name}_{n}"
+        used.add(name.casefold())
+        unique.append(part._replace(name=name))
+    return unique
+
+class OutputSplitter:
+    """
+    생성 결과를 여러 파일로 나누는 계획을 세웁니다.
+
+    column이 있으면 그 열의 값마다 파일 하나로 먼저 나누고(처음 나온 순서), 그 안에서 다시
+    pages(파일당 페이지 수)나 max_bytes(파일 크기 상한)로 나눕니다. 파일 경계는 항상 페이지 경계이므로
+    한 파일 안의 배치는 그 행들만 직렬로 그릴 때와 같습니다.
+    max_bytes는 sample마다 한 페이지를 실제로 그려 잰 압축 크기와 사진 크기로 어림하며, 한 페이지가
+    상한보다 크면 그 페이지만 담은 파일이 상한을 넘을 수 있습니다. 템플릿만으로 상한을 넘으면 ValueError가 발생합니다.
+    """
+    def __init__(self, prs: Presentation, samples: dict[int, NameTagDrawer|CompiledNameTag], layout: dict, pages: int = None, max_bytes: int = None, column: str = None, photos: PhotoSet = None):
+        if pages is not None and pages <= 0:
+            raise ValueError("pages must be a positive integer or None.")
+        if max_bytes is not None and max_bytes <= 0:
+            raise ValueError("max_bytes must be a positive integer or None.")
+        self._prs = prs
+        self._samples = samples
+        self._layout = layout
+        self.pages = pages
+        self.max_bytes = max_bytes
+        self.column = field_name(column) if column else None
+        self._photos = photos
+        self._estimates: tuple[int, dict[int, int]] = None
+        slide_size = (prs.slide_width.cm, prs.slide_height.cm)
+        self._per_page = {
+            i: SlidePositioner(slide_size, sample, [], **layout).num_per_slide for i, sample in samples.items()
+        }
+
+    def plan(self, data_by_sample: dict[int, list[dict]]) -> list[OutputPart]:
+        parts = []
+        for group_name, group in self._groups(data_by_sample):
+            pages = [(i, chunk) for i, rows in group.items() for chunk in iter_chunks(rows, self._per_page[i])]
+            chunks = self._split_pages(pages, data_by_sample)
+            for n, chunk in enumerate(chunks, 1):
+                samples = {}
+                for i, rows in chunk:
+                    samples.setdefault(i, []).extend(rows)
+                if group_name is None:
+                    name = str(n).zfill(len(str(len(chunks))))
+                else:
+                    name = group_name if len(chunks) == 1 else f"{group_name}-{n}"
+                parts.append(OutputPart(name, samples))
+        return _unique_names(parts)
+
+    def page_count(self, parts: list[OutputPart]) -> int:
+        return sum(math.ceil(len(rows) / self._per_page[i]) for part in parts for i, rows in part.samples.items())
+
+    def _groups(self, data_by_sample: dict[int, list[dict]]):
+        if self.column is None:
+            yield None, data_by_sample
+            return
+        if not any(self.column in rows[0] for rows in data_by_sample.values() if rows):
+            raise ValueError(f"Column '{self.column}' not found in the excel file")
+        # 대소문자를 구분하지 않는 파일 시스템(Windows, macOS)에서 서로 덮어쓰지 않도록 대소문자만 다른 값은
+        # 같은 파일로 모음. 파일 이름은 처음 나온 값의 표기를 씀
+        names: dict[str, str] = {}
+        groups: dict[str, dict[int, list[dict]]] = {}
+        for i, rows in data_by_sample.items():
+            for row in rows:
+                name = _safe_name(row.get(self.column))
+                key = name.casefold()
+                names.setdefault(key, name)
+                groups.setdefault(key, {}).setdefault(i, []).append(row)
+        for key, group in groups.items():
+            yield names[key], group
+
+    def _split_pages(self, pages: list[tuple[int, list[dict]]], data_by_sample: dict[int, list[dict]]) -> list[list[tuple[int, list[dict]]]]:
+        if self.max_bytes is not None:
+            base, page_bytes = self._estimate(data_by_sample)
+            if base >= self.max_bytes:
+                # 이대로 나누면 모든 파일이 한 페이지짜리가 되고 그래도 상한을 넘음
+                raise ValueError(f"The file size limit ({self.max_bytes / 1024 / 1024:.2f} MB) is smaller than the template alone ({base / 1024 / 1024:.2f} MB)")
+            chunks, size = [[]], base
+            for i, rows in pages:
+                estimate = page_bytes[i] + self._photo_bytes(i, rows)
+                if chunks[-1] and (size + estimate > self.max_bytes or self.pages and len(chunks[-1]) >= self.pages):
+                    chunks.append([])
+                    size = base
+                chunks[-1].append((i, rows))
+                size += estimate
+            return [chunk for chunk in chunks if chunk]
+        if self.pages is not None:
+            return [pages[i:i + self.pages] for i in range(0, len(pages), self.pages)]
+        return [pages]
+
+    def _estimate(self, data_by_sample: dict[int, list[dict]]) -> tuple[int, dict[int, int]]:
+        """(sample 슬라이드만 있는 파일 크기, sample별 한 페이지의 압축된 slide XML 크기) (byte)"""
+        if self._estimates is not None:
+            return self._estimates
+        with measure("split.estimate"):
+            stream = BytesIO()
+            self._prs.save(stream)
+            sample_count = len(self._prs.slides)
+            page_bytes = {}
+            try:
+                for i, sample in self._samples.items():
+                    rows = data_by_sample.get(i, [])[:self._per_page[i]]
+                    if not rows:
+                        continue
+                    SlideDrawer(self._prs, i, rows, sample=sample).draw(**self._layout)
+                    slide_part = self._prs.slides[-1].part
+                    # 사진은 행마다 따로 더하므로 XML만 잼 (relationship 파일 몫으로 조금 더함)
+                    page_bytes[i] = len(zlib.compress(slide_part.blob)) + 512
+            finally:
+                truncate_slides(self._prs, sample_count)
+                ImagePartCache.forget(self._prs.part.package)
+        self._estimates = (len(stream.getvalue()), page_bytes)
+        return self._estimates
+
+    def _photo_bytes(self, sample_num: int, rows: list[dict]) -> int:
+        if self._photos is None:
+            return 0
+        total = 0
+        for size in self._samples[sample_num].photo_slots:
+            for row in rows:
+                photo = self._photos.get(row, size)
+                if photo is not None:
+                    total += len(photo.blob)
+        return total
+
+def save_part(prs: Presentation, samples: dict[int, NameTagDrawer|CompiledNameTag], part: OutputPart, output: str, layout: dict, job: Job = None) -> dict:
+    """part를 prs 뒤에 그려 output에 저장하고, 그린 슬라이드를 지워 prs를 되돌립니다."""
+    sample_count = len(prs.slides)
+    try:
+        for sample_num, rows in part.samples.items():
+            SlideDrawer(prs, sample_num, rows, sample=samples[sample_num]).draw(job=job, **layout)
+        with measure("save"):
+            # 저장할 때 python-pptx는 relationship으로 닿는 part만 쓰므로 이 파일의 슬라이드가 쓰는 미디어만 들어감
+            prs.save(output)
+        return {
+            "name": part.name,
+            "output": output,
+            "pages": len(prs.slides) - sample_count,
+            "nametags": sum(len(rows) for rows in part.samples.values()),
+            "bytes": os.path.getsize(output),
+        }
+    finally:
+        truncate_slides(prs, sample_count)
+        ImagePartCache.forget(prs.part.package)
+
+def render_part(pptx: str, part: OutputPart, output: str, engine: str = "clone", layout: dict = None, fit_text: bool = False, photos: PhotoSet = None, profile: bool = False) -> dict:
+    """(작업 프로세스에서 실행) 템플릿 복사본에 part를 그려 output에 저장합니다."""
+    prs, _, _ = worker_template(pptx)
+    with profiling(Profiler() if profile else None) as profiler:
+        samples = {}
+        for sample_num in part.samples:
+            samples[sample_num] = SlideDrawer(prs, sample_num, [], engine=engine).sample
+            samples[sample_num].use_text_fit(fit_text)
+            samples[sample_num].use_photos(photos)
+        result = save_part(prs, samples, part, output, layout or {})
+    if profiler is not None:
+        result["profile"] = profiler.samples
+    return result
+
+def draw_split(prs: Presentation, pptx: str, samples: dict[int, NameTagDrawer|CompiledNameTag], parts: list[OutputPart], output: str, workers: int = 1, engine: str = "clone", job: Job = None, fit_text: bool = False, photos: PhotoSet = None, **layout) -> list[dict]:
+    """
+    parts를 파일마다 따로 그려 저장하고 파일별 결과를 parts 순서대로 반환합니다.
+    workers > 1이면 파일마다 작업 프로세스에서 그리고 저장까지 하므로 큰 파일 하나를 저장할 때보다 빨리 끝납니다.
+    workers == 1이면 prs와 이미 준비된 samples(글자 맞춤, 사진 포함)로 차례로 그립니다.
+    """
+    outputs = [part_filename(output, part.name) for part in parts]
+    if workers <= 1:
+        results = []
+        for part, filename in zip(parts, outputs):
+            results.append(save_part(prs, samples, part, filename, layout, job))
+        return results
+
+    profiler = current_profiler()
+    executor = ProcessPoolExecutor(max_workers=min(workers, len(parts)))
+    cancelled = False
+    try:
+        futures = [
+            executor.submit(
+                render_part, pptx, part, filename, engine, layout, fit_text,
+                photos.subset([row for rows in part.samples.values() for row in rows]) if photos is not None else None,
+                profiler is not None
+            )
+            for part, filename in zip(parts, outputs)
+        ]
+        results = []
+        for part, future in zip(parts, futures):
+            with measure("split.wait"):
+                result = wait_result(future, job)
+            if profiler is not None:
+                profiler.merge(result.pop("profile"))
+            if job is not None:
+                job.advance(list(part.samples)[-1], pages=result["pages"], nametags=result["nametags"])
+            results.append(result)
+        return results
+    except JobCancelled:
+        cancelled = True
+        raise
+    finally:
+        executor.shutdown(wait=not cancelled, cancel_futures=True)
@@ -0,0 +1,67 @@
+import os
+import zipfile
+
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.opc.oxml import serialize_part_xml
+from pptx.opc.package import Part
+from pptx.opc.packuri import CONTENT_TYPES_URI, PACKAGE_URI
+from pptx.opc.serialized import _ContentTypesItem
+from pptx.presentation import Presentation
+
+from .utils import replace_file, temp_file_beside
+
+class _FlushedPart(Part):
+    """
+    이미 zip에 쓴 슬라이드 자리를 지키는 가벼운 part.
+    XML 트리는 들고 있지 않고, 원래 relationship만 유지해 이미지 등의 partname이 중복 부여되지 않게 합니다.
+    """
+    def __init__(self, part: Part):
+        super().__init__(part.partname, part.content_type, part.package)
+        self.__dict__["_rels"] = part.rels
+
+class StreamingPptxWriter:
+    """
+    완성된 슬라이드를 바로 출력 zip에 쓰고 메모리에서 내리는 writer.
+
+    flush(slide_part)로 슬라이드 XML과 rels를 즉시 기록한 뒤, 프레젠테이션이 그 슬라이드 대신
+    _FlushedPart를 가리키게 합니다. 나머지 part(presentation.xml, 레이아웃, 미디어, content types)는
+    close()에서 기록되므로 메모리 사용량이 행 수와 무관하게 유지됩니다.
+    출력은 같은 폴더의 임시 파일에 쓰고 close()에서 교체하므로, 중간에 실패해도 기존 파일은 그대로입니다.
+    flush한 슬라이드는 내용이 비어 있으므로 close() 뒤에 prs를 다시 저장하면 안 됩니다.
+    """
+    def __init__(self, prs: Presentation, path: str):
+        self._prs = prs
+        self.path = path
+        self._tmp_path = temp_file_beside(path, ".pptx.tmp")
+        self._zip = zipfile.ZipFile(self._tmp_path, "w", compression=zipfile.ZIP_DEFLATED, strict_timestamps=False)
+        self._written: set[str] = set()
+
+    def flush(self, slide_part: Part):
+        self._write_part(slide_part)
+        # 방금 추가한 슬라이드의 relationship은 대개 마지막에 있으므로 뒤에서부터 찾음
+        for rel in reversed(self._prs.part.rels._rels.values()):
+            if rel.reltype == RT.SLIDE and rel._target is slide_part:
+                rel._target = _FlushedPart(slide_part)
+                break
+
+    def close(self):
+        parts = list(self._prs.part.package.iter_parts())
+        for part in parts:
+            if str(part.partname) not in self._written:
+                self._write_part(part)
+        self._zip.writestr(CONTENT_TYPES_URI.membername, serialize_part_xml(_ContentTypesItem.xml_for(parts)))
+        self._zip.writestr(PACKAGE_URI.rels_uri.membername, self._prs.part.package._rels.xml)
+        self._zip.close()
+        replace_file(self._tmp_path, self.path)
+
+    def abort(self):
+        """close() 전에 실패했을 때 임시 파일을 지웁니다."""
+        self._zip.close()
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+
+    def _write_part(self, part: Part):
+        self._zip.writestr(part.partname.membername, part.blob)
+        if part.rels:
+            self._zip.writestr(part.partname.rels_uri.membername, part.rels.xml)
+        self._written.add(str(part.partname))
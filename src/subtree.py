@@ -0,0 +1,187 @@
+from copy import deepcopy
+
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.oxml import parse_xml
+from pptx.oxml.ns import nsdecls, qn
+from pptx.oxml.shapes.groupshape import CT_GroupShape
+from pptx.shapes.base import BaseShape
+from pptx.util import Cm
+
+from .image_cache import ImagePartCache
+from .label_index import LabelIndex
+from .text_fit import TextFitSpec, default_text_sizes
+from .utils import qn_xpath, _paragraph_text
+
+_R_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+
+OFF_PATHS = {
+    qn("p:sp"): qn_xpath("p:spPr/a:xfrm/a:off"),
+    qn("p:pic"): qn_xpath("p:spPr/a:xfrm/a:off"),
+    qn("p:cxnSp"): qn_xpath("p:spPr/a:xfrm/a:off"),
+    qn("p:grpSp"): qn_xpath("p:grpSpPr/a:xfrm/a:off"),
+    qn("p:graphicFrame"): qn_xpath("p:xfrm/a:off"),
+}
+
+def child_path(root, node) -> tuple[int, ...]:
+    """root에서 node까지의 child index 경로를 반환합니다. (deepcopy된 트리에서 같은 위치를 찾기 위함)"""
+    path = []
+    while node is not root:
+        parent = node.getparent()
+        path.append(parent.index(node))
+        node = parent
+    return tuple(reversed(path))
+
+def follow(root, path: tuple[int, ...]):
+    for i in path:
+        root = root[i]
+    return root
+
+def next_shape_id(spTree) -> int:
+    used_ids = [int(id_str) for id_str in spTree.xpath("//@id") if id_str.isdigit()]
+    return max(used_ids) + 1 if used_ids else 1
+
+def index_text_runs(element) -> list[tuple[tuple[int, ...], str, tuple]]:
+    """
+    element(그룹이면 그 안의 모든 p:sp 포함)에서 명찰마다 바꿔 쓸 run을 찾아
+    [(a:t 경로, 원래 텍스트, 조각들)]로 반환합니다. shape마다 LabelIndex 규칙을 따릅니다.
+    """
+    text_runs = []
+    for sp in element.iter(qn("p:sp")):
+        txBody = sp.find(qn("p:txBody"))
+        if txBody is None:
+            continue
+        paragraphs = txBody.findall(qn("a:p"))
+        label = "\n".join(_paragraph_text(p) for p in paragraphs).strip().lower()
+        runs = [[r.findtext(qn("a:t")) or "" for r in p.findall(qn("a:r"))] for p in paragraphs]
+        label_index = LabelIndex.build(runs, label)
+        if label_index is None:
+            continue
+        for p_idx, r_idx, original, parts in label_index.runs:
+            t = paragraphs[p_idx].findall(qn("a:r"))[r_idx].find(qn("a:t"))
+            text_runs.append((child_path(element, t), original, parts))
+    return text_runs
+
+class SubtreeTemplate:
+    """
+    shape 하나(그룹이면 하위 shape 전체)의 XML 사본과, 복제본에서 고칠 곳(a:off, a:t, r:id)을 미리 찾아둔 것.
+    그룹 안의 shape는 그룹 좌표계(chOff)를 따르므로 가장 바깥 a:off만 옮기면 함께 움직입니다.
+    """
+    def __init__(self, element):
+        self.element = element
+        self.off_path = child_path(element, element.find(OFF_PATHS[element.tag]))
+        self.text_runs = index_text_runs(element)
+        self._fit_specs = None
+        # sz가 없는 run의 크기를 찾는 프레젠테이션 기본값 (default_text_sizes). fit_specs를 처음 쓰기 전에 정함
+        self.default_text_sizes: dict[int, float] = None
+        # 원래 rId를 기억해 두고 슬라이드가 바뀔 때마다 새 rId로 바꿔 씀
+        self.rel_attrs = [
+            (e, key, value)
+            for e in element.iter()
+            for key, value in e.attrib.items()
+            if key.startswith(_R_NS)
+        ]
+
+    @property
+    def fit_specs(self) -> list[tuple[tuple[int, ...], TextFitSpec]]:
+        """바꿔 쓰는 텍스트가 있는 p:sp마다 (경로, TextFitSpec). 글꼴을 찾아야 하므로 처음 쓸 때 만듭니다."""
+        if self._fit_specs is None:
+            # a:t 경로는 p:sp/p:txBody/a:p/a:r/a:t이므로 뒤의 4단계를 빼면 p:sp 경로
+            sp_paths = dict.fromkeys(path[:-4] for path, _, _ in self.text_runs)
+            self._fit_specs = [(path, TextFitSpec(follow(self.element, path), default_sizes=self.default_text_sizes)) for path in sp_paths]
+        return self._fit_specs
+
+    def prepare_text_fit(self, source_part):
+        if self.default_text_sizes is None:
+            self.default_text_sizes = default_text_sizes(source_part)
+
+    def fit_text(self, clone):
+        """복제본의 텍스트가 넘치는 p:sp마다 글자 크기를 줄입니다."""
+        for path, spec in self.fit_specs:
+            spec.apply(follow(clone, path).find(qn("p:txBody")))
+
+    @classmethod
+    def from_shape(cls, shape: BaseShape) -> "SubtreeTemplate":
+        return cls(detached_copy(shape))
+
+    def relate(self, source_part, slide_part, rId_map: dict[str, str]):
+        """source_part 기준의 rId를 slide_part의 rId로 바꿉니다. rId_map은 같은 슬라이드의 템플릿끼리 공유합니다."""
+        image_cache = ImagePartCache.of(slide_part.package)
+        for element, key, old_rId in self.rel_attrs:
+            if old_rId not in rId_map:
+                rel = source_part.rels[old_rId]
+                if rel.is_external:
+                    rId_map[old_rId] = slide_part.relate_to(rel.target_ref, rel.reltype, is_external=True)
+                elif rel.reltype == RT.IMAGE:
+                    rId_map[old_rId] = image_cache.relate(slide_part, rel.target_part)
+                else:
+                    rId_map[old_rId] = slide_part.relate_to(rel.target_part, rel.reltype)
+            element.set(key, rId_map[old_rId])
+
+    def clone(self, left: float, top: float):
+        """(left, top) cm 위치로 옮긴 복제본"""
+        clone = deepcopy(self.element)
+        off = follow(clone, self.off_path)
+        off.set("x", str(Cm(left)))
+        off.set("y", str(Cm(top)))
+        return clone
+
+def detached_copy(shape: BaseShape):
+    """shape XML의 사본. placeholder는 레이아웃에서 상속받던 위치/크기/모양을 명시하고 연결을 끊습니다."""
+    element = deepcopy(shape._element)
+    if shape.is_placeholder:
+        # 레이아웃에서 상속받는 위치/크기를 명시적으로 고정하고 placeholder 연결을 끊음
+        element.x, element.y, element.cx, element.cy = shape.left, shape.top, shape.width, shape.height
+        for ph in list(element.iter(qn("p:ph"))):
+            ph.getparent().remove(ph)
+        spPr = element.find(qn("p:spPr"))
+        if element.tag == qn("p:sp") and spPr.find(qn("a:prstGeom")) is None and spPr.find(qn("a:custGeom")) is None:
+            # 모양도 레이아웃에서 상속받던 것이므로 placeholder 기본 모양(사각형)을 명시
+            spPr.find(qn("a:xfrm")).addnext(parse_xml(f'<a:prstGeom {nsdecls("a")} prst="rect"><a:avLst/></a:prstGeom>'))
+    return element
+
+def set_offset(element, left: float, top: float):
+    off = element.find(OFF_PATHS[element.tag])
+    off.set("x", str(Cm(left)))
+    off.set("y", str(Cm(top)))
+
+def renumber_ids(clones: list, next_id: int) -> int:
+    """
+    복제본들의 shape id를 next_id부터 새로 부여하고 다음 id를 반환합니다.
+    커넥터가 연결된 shape id도 새 id로 바꾸며, 복제본 밖을 가리키면 연결을 끊습니다.
+    """
+    id_map = {}
+    for clone in clones:
+        for cNvPr in clone.iter(qn("p:cNvPr")):
+            id_map[cNvPr.get("id")] = str(next_id)
+            cNvPr.set("id", str(next_id))
+            next_id += 1
+
+    for clone in clones:
+        for cxn in (*clone.iter(qn("a:stCxn")), *clone.iter(qn("a:endCxn"))):
+            if cxn.get("id") in id_map:
+                cxn.set("id", id_map[cxn.get("id")])
+            else:
+                cxn.getparent().remove(cxn)
+    return next_id
+
+# 명찰마다 다시 파싱하지 않도록 한 번 만든 빈 그룹을 복제해 씀
+_EMPTY_GROUP = CT_GroupShape.new_grpSp(0, "")
+
+def new_group(shape_id: int, left: float, top: float, width: float, height: float):
+    """
+    명찰 하나를 담을 빈 p:grpSp. 자식 좌표계(chOff/chExt)를 그룹 위치/크기와 같게 두므로 자식은 슬라이드 좌표 그대로 보입니다.
+    복제해서 a:off만 옮기면 자식도 함께 움직입니다.
+    """
+    grpSp = deepcopy(_EMPTY_GROUP)
+    cNvPr = grpSp[0][0]
+    cNvPr.set("id", str(shape_id))
+    cNvPr.set("name", "NameTag")
+    x, y, cx, cy = str(Cm(left)), str(Cm(top)), str(Cm(width)), str(Cm(height))
+    off, ext, chOff, chExt = grpSp[1][0]
+    for e in (off, chOff):
+        e.set("x", x)
+        e.set("y", y)
+    for e in (ext, chExt):
+        e.set("cx", cx)
+        e.set("cy", cy)
+    return grpSp
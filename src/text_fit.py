@@ -0,0 +1,244 @@
+import logging
+import unicodedata
+
+from pptx.oxml.ns import qn
+from pptx.util import Cm, Emu
+
+# 글자 크기를 상속받는 곳에서도 찾지 못한 run을 잴 때 쓰는 PowerPoint 기본값
+DEFAULT_SIZE_PT = 18.0
+# bodyPr에 여백이 없을 때의 PowerPoint 기본 여백 (EMU)
+DEFAULT_INSETS = {"lIns": 91440, "rIns": 91440, "tIns": 45720, "bIns": 45720}
+LINE_SPACING = 1.2
+# 이보다 작게는 줄이지 않음 (원래 크기 대비 비율)
+MIN_SCALE = 0.3
+SCALE_STEP = 0.95
+_PT_PER_CM = 72 / 2.54
+# 글꼴의 advance 표를 만들 때 쓰는 크기. advance는 이 크기에서 잰 값을 1pt 기준으로 나눠 저장
+_REFERENCE_SIZE = 1000
+
+class FontMetrics:
+    """
+    글꼴 파일 하나의 글자 폭 표. 글자마다 advance(1pt 기준 폭)를 처음 쓸 때 한 번만 재고,
+    문자열 폭도 (문자열 → 1pt 기준 폭)으로 기억해 두므로 크기가 달라도 다시 재지 않습니다.
+    """
+    def __init__(self, path: str = None):
+        self.path = path
+        self._font = None
+        self._advances: dict[str, float] = {}
+        self._widths: dict[str, float] = {}
+        self.line_height = LINE_SPACING
+        if path is not None:
+            from PIL import ImageFont
+
+            self._font = ImageFont.truetype(path, _REFERENCE_SIZE)
+            ascent, descent = self._font.getmetrics()
+            self.line_height = max(LINE_SPACING, (ascent + descent) / _REFERENCE_SIZE)
+
+    def advance(self, char: str) -> float:
+        advance = self._advances.get(char)
+        if advance is None:
+            if self._font is not None:
+                advance = self._font.getlength(char) / _REFERENCE_SIZE
+            else:
+                # 글꼴 파일을 찾지 못하면 전각 글자는 1em, 나머지는 0.6em으로 어림
+                advance = 1.0 if unicodedata.east_asian_width(char) in ("W", "F") else 0.6
+            self._advances[char] = advance
+        return advance
+
+    def text_width(self, text: str, size: float) -> float:
+        """text를 size(pt)로 썼을 때의 폭(pt)"""
+        width = self._widths.get(text)
+        if width is None:
+            width = self._widths[text] = sum(map(self.advance, text))
+        return width * size
+
+_ESTIMATED = FontMetrics()
+_metrics: dict[tuple[str, bool, bool], FontMetrics] = {}
+
+def font_metrics(typeface: str, bold: bool = False, italic: bool = False) -> FontMetrics:
+    """설치된 글꼴에서 typeface의 FontMetrics를 찾습니다. 찾지 못하면 어림값을 쓰는 FontMetrics를 반환합니다."""
+    key = (typeface, bold, italic)
+    if key not in _metrics:
+        from pptx.text.fonts import FontFiles
+
+        metrics = _ESTIMATED
+        if typeface and not typeface.startswith("+"):
+            try:
+                metrics = FontMetrics(FontFiles.find(typeface, bold, italic))
+            except KeyError:
+                if bold or italic:
+                    metrics = font_metrics(typeface)
+            except Exception as e:
+                logging.debug("Cannot load font '%s': %s", typeface, e)
+        _metrics[key] = metrics
+    return _metrics[key]
+
+def _is_wide(char: str) -> bool:
+    return unicodedata.east_asian_width(char) in ("W", "F")
+
+def default_text_sizes(part) -> dict[int, float]:
+    """presentation.xml의 p:defaultTextStyle에서 수준(0부터)별 기본 글자 크기(pt). placeholder가 아닌 shape가 상속받음"""
+    sizes = {}
+    style = part.package.presentation_part._element.find(qn("p:defaultTextStyle"))
+    if style is not None:
+        for lvl in range(9):
+            defRPr = style.find(f"{qn(f'a:lvl{lvl + 1}pPr')}/{qn('a:defRPr')}")
+            if defRPr is not None and defRPr.get("sz"):
+                sizes[lvl] = int(defRPr.get("sz")) / 100
+    return sizes
+
+def _inherited_size(txBody, p, default_sizes: dict[int, float]) -> float|None:
+    """
+    sz가 없는 run이 실제로 쓰는 글자 크기(pt). a:pPr/a:defRPr, shape의 a:lstStyle, 프레젠테이션 기본값 순으로 찾고
+    (레이아웃/마스터에서 상속받는 placeholder처럼) 알 수 없으면 None입니다.
+    """
+    pPr = p.find(qn("a:pPr"))
+    lvl = int(pPr.get("lvl", 0)) if pPr is not None else 0
+    candidates = [
+        pPr.find(qn("a:defRPr")) if pPr is not None else None,
+        txBody.find(f"{qn('a:lstStyle')}/{qn(f'a:lvl{lvl + 1}pPr')}/{qn('a:defRPr')}"),
+    ]
+    for defRPr in candidates:
+        if defRPr is not None and defRPr.get("sz"):
+            return int(defRPr.get("sz")) / 100
+    return default_sizes.get(lvl)
+
+class _RunFont:
+    """
+    run 하나의 원래 글자 크기와 글꼴. 전각 글자(한글 등)는 a:ea 글꼴로 잽니다.
+    크기를 알 수 없는 run(size is None)은 기본값으로 재기만 하고 크기를 바꾸지 않습니다.
+    """
+    __slots__ = ("size", "latin", "ea")
+
+    def __init__(self, rPr, inherited: float = None):
+        sz = rPr.get("sz") if rPr is not None else None
+        self.size = int(sz) / 100 if sz else inherited
+        bold = rPr is not None and rPr.get("b") in ("1", "true")
+        italic = rPr is not None and rPr.get("i") in ("1", "true")
+        latin = rPr.find(qn("a:latin")) if rPr is not None else None
+        ea = rPr.find(qn("a:ea")) if rPr is not None else None
+        self.latin = font_metrics(latin.get("typeface") if latin is not None else None, bold, italic)
+        # 라틴 글꼴에는 보통 한글 글리프가 없으므로 a:ea가 없으면 전각 글자는 어림값으로 잼
+        self.ea = font_metrics(ea.get("typeface"), bold, italic) if ea is not None else _ESTIMATED
+
+    @property
+    def measured_size(self) -> float:
+        return self.size if self.size is not None else DEFAULT_SIZE_PT
+
+    def width(self, text: str, scale: float) -> float:
+        size = self.measured_size * scale
+        if not any(map(_is_wide, text)):
+            return self.latin.text_width(text, size)
+        return sum((self.ea if _is_wide(c) else self.latin).text_width(c, size) for c in text)
+
+    def line_height(self, scale: float) -> float:
+        return self.measured_size * scale * max(self.latin.line_height, self.ea.line_height)
+
+def _words(fonts: list[_RunFont], runs: list[str]) -> list[list[tuple[_RunFont, str]]]:
+    """paragraph를 공백 기준 단어로 나눕니다. run 경계에서 공백 없이 이어지는 글자는 같은 단어입니다."""
+    words = [[]]
+    for font, text in zip(fonts, runs):
+        for i, piece in enumerate(text.split(" ")):
+            if i > 0:
+                words.append([])
+            if piece:
+                words[-1].append((font, piece))
+    return [word for word in words if word]
+
+class TextFitSpec:
+    """
+    text shape(p:sp) 하나에 글자를 줄여 맞추기 위한 정보. sample에서 한 번 만들고 명찰마다 apply합니다.
+
+    글자 폭은 설치된 글꼴의 실제 advance로 재며(커닝과 줄 간격 설정은 무시), 넘치면 모든 run의 크기를
+    같은 비율로 줄입니다. 키우지는 않습니다. sample의 원래 텍스트가 이미 상자보다 크게 재어지면
+    그 크기까지는 넘치지 않은 것으로 봅니다. (재는 방식과 PowerPoint의 차이로 모든 명찰이 줄지 않도록)
+
+    size: a:xfrm이 없는 shape(레이아웃에서 위치/크기를 상속받는 placeholder)의 크기 (가로, 세로) cm
+    default_sizes: default_text_sizes(). sz가 없는 run의 크기를 찾을 때 씁니다.
+    """
+    def __init__(self, sp, size: tuple[float, float] = None, default_sizes: dict[int, float] = None):
+        txBody = sp.find(qn("p:txBody"))
+        bodyPr = txBody.find(qn("a:bodyPr"))
+        insets = {k: int(bodyPr.get(k, v)) if bodyPr is not None else v for k, v in DEFAULT_INSETS.items()}
+        ext = sp.find(f"{qn('p:spPr')}/{qn('a:xfrm')}/{qn('a:ext')}")
+        if ext is not None:
+            cx, cy = int(ext.get("cx")), int(ext.get("cy"))
+        elif size is not None:
+            cx, cy = int(Cm(size[0])), int(Cm(size[1]))
+        else:
+            cx = cy = None
+        width = Emu(cx - insets["lIns"] - insets["rIns"]).cm * _PT_PER_CM if cx is not None else None
+        height = Emu(cy - insets["tIns"] - insets["bIns"]).cm * _PT_PER_CM if cy is not None else None
+        # placeholder의 기본 글자 크기는 레이아웃/마스터에서 오므로 프레젠테이션 기본값을 쓰지 않음
+        if sp.find(f"{qn('p:nvSpPr')}/{qn('p:nvPr')}/{qn('p:ph')}") is not None:
+            default_sizes = {}
+        self.wrap = bodyPr is None or bodyPr.get("wrap") != "none"
+        # 같은 텍스트(이름, 소속 등)는 명찰마다 반복되므로 비율을 기억해 둠
+        self._scales: dict[tuple[tuple[str, ...], ...], float] = {}
+        self.fonts = [
+            [_RunFont(r.find(qn("a:rPr")), inherited) for r in p.findall(qn("a:r"))]
+            for p in txBody.findall(qn("a:p"))
+            for inherited in [_inherited_size(txBody, p, default_sizes or {})]
+        ]
+
+        original_width, original_height = self._measure(self._texts(txBody), 1.0, width)
+        self.width = max(width or 0, original_width) if width is not None else None
+        self.height = max(height or 0, original_height) if height is not None else None
+
+    def _texts(self, txBody) -> list[list[str]]:
+        return [[r.findtext(qn("a:t")) or "" for r in p.findall(qn("a:r"))] for p in txBody.findall(qn("a:p"))]
+
+    def _measure(self, texts: list[list[str]], scale: float, width: float) -> tuple[float, float]:
+        """(가장 긴 줄의 폭, 전체 높이) (pt). wrap이면 width에서 단어 단위로 줄을 바꿔 잽니다."""
+        max_width = total_height = 0.0
+        for fonts, runs in zip(self.fonts, texts):
+            line_height = max((font.line_height(scale) for font in fonts), default=DEFAULT_SIZE_PT * scale * LINE_SPACING)
+            if not self.wrap or width is None:
+                line_width = sum(font.width(text, scale) for font, text in zip(fonts, runs))
+                max_width = max(max_width, line_width)
+                total_height += line_height
+                continue
+
+            lines, line_width = 1, 0.0
+            for word in _words(fonts, runs):
+                word_width = sum(font.width(piece, scale) for font, piece in word)
+                space = word[0][0].width(" ", scale)
+                if line_width and line_width + space + word_width > width:
+                    lines += 1
+                    line_width = word_width
+                else:
+                    line_width += (space if line_width else 0.0) + word_width
+                max_width = max(max_width, line_width)
+            total_height += lines * line_height
+        return max_width, total_height
+
+    def fit_scale(self, texts: list[list[str]]) -> float:
+        """texts가 상자에 들어가는 가장 큰 비율 (1.0 이하, MIN_SCALE 이상)"""
+        if self.width is None:
+            return 1.0
+        if not self.wrap:
+            width, height = self._measure(texts, 1.0, None)
+            scale = min(1.0, self.width / width if width else 1.0, self.height / height if height else 1.0)
+            return max(MIN_SCALE, scale)
+        scale = 1.0
+        while scale > MIN_SCALE:
+            width, height = self._measure(texts, scale, self.width)
+            if width <= self.width and height <= self.height:
+                break
+            scale *= SCALE_STEP
+        return max(MIN_SCALE, scale)
+
+    def apply(self, txBody):
+        """명찰에 그린 txBody의 현재 텍스트가 넘치면 run마다 글자 크기를 줄여 씁니다."""
+        runs = [p.findall(qn("a:r")) for p in txBody.findall(qn("a:p"))]
+        texts = tuple(tuple(r.findtext(qn("a:t")) or "" for r in p_runs) for p_runs in runs)
+        scale = self._scales.get(texts)
+        if scale is None:
+            scale = self._scales[texts] = self.fit_scale(texts)
+        if scale >= 1.0:
+            return
+        for fonts, p_runs in zip(self.fonts, runs):
+            for font, r in zip(fonts, p_runs):
+                if font.size is None:
+                    continue
+                r.get_or_add_rPr().set("sz", str(max(100, int(font.size * scale * 100))))
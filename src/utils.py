@@ -1,10 +1,22 @@
-import subprocess, os, platform
+import subprocess, os, platform, posixpath, re, stat, tempfile, zipfile
 
 from collections import defaultdict
+from itertools import islice
 from openpyxl import load_workbook
 from pptx.enum.dml import MSO_COLOR_TYPE, MSO_FILL
 from pptx.enum.text import PP_ALIGN
 from pptx.oxml.ns import qn
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.opc.packuri import PackURI
+from pptx.parts.slide import SlidePart
+from pptx.slide import Slide
+
+from .label_index import find_fields
+from .patches import apply_patches
+from .profiler import profiled
+
+# python-pptx/openpyxl을 쓰는 모듈은 모두 utils를 거치므로 여기서 patch를 적용
+apply_patches()
 
 class dotdict(dict):
     """dot.notation access to dictionary attributes"""
@@ -17,46 +29,277 @@ class dotdict(dict):
 def chunk_list(l, chunk_size):
     return [l[i:i + chunk_size] for i in range(0, len(l), chunk_size)]
 
+def iter_chunks(iterable, chunk_size):
+    """chunk_list와 같지만 전체 복사본을 만들지 않고 chunk 단위로 하나씩 만들어 냅니다."""
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, chunk_size)):
+        yield chunk
+
 def tuples_to_dict_list(header, data):
     return [dict(zip(header, d)) for d in data]
 
+def iter_excel_rows(filename):
+    """active sheet를 read-only 모드로 열어 한 행씩 문자열 tuple로 읽어옵니다."""
+    workbook = load_workbook(filename, read_only=True, data_only=True)
+    try:
+        ws = workbook.active
+        # read-only 모드는 시트의 <dimension>을 그대로 믿으므로, 잘못 기록한 exporter의 파일도 끝까지 읽도록 다시 계산
+        ws.reset_dimensions()
+        for row in ws.iter_rows(values_only=True):
+            yield tuple(str(c) if c is not None else "" for c in row)
+    finally:
+        workbook.close()
+
+def _normalize_header(header):
+    return [h.strip().lower() for h in header]
+
 def read_excel_data(filename):
-    workbook = load_workbook(filename, data_only=True)
-    sheet = workbook.active
-    data = []
-    for row in sheet.iter_rows(values_only=True):
-        data.append(row)
-
-    assert len(data) > 0, "No data found in the excel file"
-    assert len(data) > 1, "Only header found in the excel file. No data found"
-    for i, row in enumerate(data):
-        data[i] = tuple(str(c) if c is not None else "" for c in row)
-
-    header = data[0]
-    header = [h.strip().lower() for h in header]
-        
-    return header, data[1:]
+    rows = iter_excel_rows(filename)
+    header = next(rows, None)
+    assert header is not None, "No data found in the excel file"
+    data = list(rows)
+    assert len(data) > 0, "Only header found in the excel file. No data found"
+    return _normalize_header(header), data
 
-def headed_data_with_sample_num(header, data):
+_XLSX_MAIN_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_OPC_REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+_OPC_R_ID = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id"
+
+def _opc_rels(zf, source_path):
+    """OPC(xlsx/pptx) zip에서 source_path 파트의 relationship을 {rId: (type, 대상 경로)}로 반환합니다."""
+    import xml.etree.ElementTree as ET
+    base, name = posixpath.split(source_path)
+    rels = ET.fromstring(zf.read(posixpath.join(base, "_rels", name + ".rels")))
+    return {
+        rel.get("Id"): (
+            rel.get("Type").rsplit("/", 1)[-1],
+            rel.get("Target").lstrip("/") if rel.get("Target").startswith("/") else posixpath.normpath(posixpath.join(base, rel.get("Target"))),
+        )
+        for rel in rels.iter(f"{_OPC_REL_NS}Relationship")
+    }
+
+def _xlsx_column_index(cell_ref):
+    idx = 0
+    for ch in re.match(r"[A-Z]+", cell_ref).group():
+        idx = idx * 26 + ord(ch) - ord("A") + 1
+    return idx - 1
+
+def _xlsx_number_str(value):
+    try:
+        return str(int(value))
+    except ValueError:
+        return str(float(value))
+
+def _xlsx_text(elem):
+    """<si>/<is> 요소의 텍스트 (rich text run 포함, 발음 기호 rPh 제외)"""
+    t = elem.find(f"{_XLSX_MAIN_NS}t")
+    if t is not None:
+        return t.text or ""
+    return "".join(r.findtext(f"{_XLSX_MAIN_NS}t") or "" for r in elem.iter(f"{_XLSX_MAIN_NS}r"))
+
+def _read_first_row_from_zip(filename):
+    """
+    xlsx zip에서 active sheet XML의 첫 <row>까지만 파싱해 문자열 tuple로 반환합니다.
+    shared string도 필요한 index까지만 읽으므로 시트의 행 수와 무관하게 일정한 시간이 걸립니다.
+    """
+    import xml.etree.ElementTree as ET
+    with zipfile.ZipFile(filename) as zf:
+        workbook_path = next(target for type_, target in _opc_rels(zf, "").values() if type_ == "officeDocument")
+        workbook = ET.fromstring(zf.read(workbook_path))
+        workbook_rels = _opc_rels(zf, workbook_path)
+
+        view = workbook.find(f"{_XLSX_MAIN_NS}bookViews/{_XLSX_MAIN_NS}workbookView")
+        active_tab = int(view.get("activeTab", 0)) if view is not None else 0
+        sheet = workbook.findall(f"{_XLSX_MAIN_NS}sheets/{_XLSX_MAIN_NS}sheet")[active_tab]
+        sheet_path = workbook_rels[sheet.get(_OPC_R_ID)][1]
+
+        width = 0
+        cells = None
+        with zf.open(sheet_path) as f:
+            for event, elem in ET.iterparse(f, events=("end",)):
+                if elem.tag == f"{_XLSX_MAIN_NS}dimension":
+                    last_ref = elem.get("ref", "A1").split(":")[-1]
+                    width = _xlsx_column_index(last_ref) + 1
+                elif elem.tag == f"{_XLSX_MAIN_NS}row":
+                    # 첫 행이 비어있으면 (row 1이 XML에 없으면) 빈 header
+                    cells = list(elem) if elem.get("r", "1") == "1" else []
+                    break
+        if cells is None:
+            return None
+
+        row, shared = {}, {}
+        for col, c in enumerate(cells):
+            if c.tag != f"{_XLSX_MAIN_NS}c":
+                continue
+            col = _xlsx_column_index(c.get("r")) if c.get("r") else col
+            type_, value = c.get("t", "n"), c.findtext(f"{_XLSX_MAIN_NS}v")
+            if type_ == "inlineStr":
+                is_ = c.find(f"{_XLSX_MAIN_NS}is")
+                row[col] = _xlsx_text(is_) if is_ is not None else ""
+            elif value is None:
+                continue
+            elif type_ == "s":
+                shared[col] = int(value)
+            elif type_ == "b":
+                row[col] = str(value == "1")
+            elif type_ == "n":
+                row[col] = _xlsx_number_str(value)
+            else:
+                row[col] = value
+
+        if shared:
+            strings_path = next(target for type_, target in workbook_rels.values() if type_ == "sharedStrings")
+            needed, strings = max(shared.values()), []
+            with zf.open(strings_path) as f:
+                for event, elem in ET.iterparse(f, events=("end",)):
+                    if elem.tag == f"{_XLSX_MAIN_NS}si":
+                        strings.append(_xlsx_text(elem))
+                        elem.clear()
+                        if len(strings) > needed:
+                            break
+            for col, idx in shared.items():
+                row[col] = strings[idx]
+
+    width = max(width, max(row, default=-1) + 1)
+    return tuple(row.get(i, "") for i in range(width))
+
+_PML_NS = "{http://schemas.openxmlformats.org/presentationml/2006/main}"
+_DML_NS = "{http://schemas.openxmlformats.org/drawingml/2006/main}"
+
+def _paragraph_text(p):
+    """python-pptx의 _Paragraph.text와 같은 규칙 (a:br은 \\v)"""
+    text = []
+    for child in p:
+        if child.tag in (f"{_DML_NS}r", f"{_DML_NS}fld"):
+            text.append(child.findtext(f"{_DML_NS}t") or "")
+        elif child.tag == f"{_DML_NS}br":
+            text.append("\v")
+    return "".join(text)
+
+def _read_slide_text(f):
+    """
+    slide XML을 iterparse로 훑으며 shape별 텍스트를 모읍니다.
+    group shape 안의 shape는 python-pptx로 순회할 때와 같은 순서(바깥 shape 먼저, 너비 우선)로 나열합니다.
+    """
+    import xml.etree.ElementTree as ET
+    containers = (f"{_PML_NS}spTree", f"{_PML_NS}grpSp")
+    stack = []    # 열려있는 요소마다 shape tree(spTree/grpSp)로 취급했는지 여부
+    groups = []   # 열려있는 shape tree의 자식 목록 (str: 텍스트, list: 하위 group)
+    root = None
+    for event, elem in ET.iterparse(f, events=("start", "end")):
+        if event == "start":
+            is_tree = elem.tag in containers and (elem.tag == f"{_PML_NS}spTree" or bool(stack) and stack[-1])
+            if is_tree:
+                children = []
+                if groups:
+                    groups[-1].append(children)
+                else:
+                    root = children
+                groups.append(children)
+            stack.append(is_tree)
+            continue
+
+        if stack.pop():
+            groups.pop()
+        elif stack and stack[-1]:
+            # shape tree의 직계 자식인 shape만 python-pptx의 slide.shapes에 해당
+            if elem.tag == f"{_PML_NS}sp":
+                txBody = elem.find(f"{_PML_NS}txBody")
+                if txBody is not None:
+                    text = "\n".join(_paragraph_text(p) for p in txBody.findall(f"{_DML_NS}p")).strip()
+                    # {field}가 있는 shape는 텍스트 대신 필드 이름들을 보여줌 (엑셀 header와 맞춰보기 위함)
+                    fields = find_fields(text)
+                    if fields:
+                        groups[-1].extend(fields)
+                    elif text:
+                        groups[-1].append(text)
+            elem.clear()
+
+    slide_text = []
+    shapes_to_process = list(root or [])
+    for item in shapes_to_process:
+        if isinstance(item, str):
+            slide_text.append(item)
+        else:
+            shapes_to_process.extend(item)
+    return slide_text
+
+def read_pptx_slide_text(filename):
+    """
+    Presentation 객체를 만들지 않고 pptx zip에서 바로 슬라이드별 텍스트 목록을 읽어옵니다.
+    presentation.xml로 슬라이드 순서만 확인하고, 각 slide XML만 스트리밍으로 파싱합니다.
+    """
+    import xml.etree.ElementTree as ET
+    with zipfile.ZipFile(filename) as zf:
+        prs_path = next(target for type_, target in _opc_rels(zf, "").values() if type_ == "officeDocument")
+        prs_rels = _opc_rels(zf, prs_path)
+        slide_paths = []
+        with zf.open(prs_path) as f:
+            for event, elem in ET.iterparse(f, events=("end",)):
+                if elem.tag == f"{_PML_NS}sldId":
+                    slide_paths.append(prs_rels[elem.get(_OPC_R_ID)][1])
+                elif elem.tag == f"{_PML_NS}sldIdLst":
+                    break
+        slides_text = []
+        for slide_path in slide_paths:
+            with zf.open(slide_path) as f:
+                slides_text.append(_read_slide_text(f))
+    return slides_text
+
+def read_excel_header(filename):
+    """엑셀 파일의 첫 행(header)만 읽어옵니다."""
+    try:
+        header = _read_first_row_from_zip(filename)
+    except (KeyError, IndexError, StopIteration, ValueError, AttributeError):
+        # 비표준 구조의 xlsx는 openpyxl read-only 모드로 첫 행만 읽음
+        rows = iter_excel_rows(filename)
+        header = next(rows, None)
+        rows.close()
+    assert header is not None, "No data found in the excel file"
+    return _normalize_header(header)
+
+def _coerce_sample_num(row, sample_num_idx, row_num):
+    value = row[sample_num_idx]
+    if isinstance(value, str):
+        if value.strip() == "":
+            return row
+        try:
+            value = int(value.strip())
+        except:
+            raise ValueError(f"Sample number '{value}' is not an integer in row {row_num}")
+        return row[:sample_num_idx] + (value,) + row[sample_num_idx + 1:]
+    return row
+
+def _fit_row(row, width):
+    return row[:width] + ("",) * (width - len(row))
+
+def _iter_headed_rows(header, rows):
+    header = list(header)
     try:
         sample_num_idx = header.index("sample num")
     except:
-        sample_num_idx = len(header)
-        header += ("sample num",)
-        data = [d + (0,) for d in data]
+        width = len(header)
+        header.append("sample num")
+        for d in rows:
+            yield dict(zip(header, _fit_row(d, width) + (0,)))
     else:
-        for i, d in enumerate(data):
-            d = list(d)
-            if isinstance(d[sample_num_idx], str):
-                if d[sample_num_idx].strip() == "":
-                    continue
-                try:
-                    d[sample_num_idx] = int(d[sample_num_idx].strip())
-                except:
-                    raise ValueError(f"Sample number '{d[sample_num_idx]}' is not an integer in row {i+2}")
-            data[i] = tuple(d)
-    data = tuples_to_dict_list(header, data)
-    return data
+        width = len(header)
+        for i, d in enumerate(rows):
+            yield dict(zip(header, _coerce_sample_num(_fit_row(d, width), sample_num_idx, i + 2)))
+
+def headed_data_with_sample_num(header, data):
+    return list(_iter_headed_rows(header, data))
+
+def iter_headed_data(filename):
+    """엑셀 행을 header 정규화 및 sample num 변환을 거친 dict로 하나씩 만들어 냅니다."""
+    rows = iter_excel_rows(filename)
+    header = next(rows, None)
+    assert header is not None, "No data found in the excel file"
+    empty = True
+    for d in _iter_headed_rows(_normalize_header(header), rows):
+        empty = False
+        yield d
+    assert not empty, "Only header found in the excel file. No data found"
 
 def group_by_sample(data):
     data_by_sample = defaultdict(list)
@@ -65,9 +308,7 @@ def group_by_sample(data):
     return data_by_sample
 
 def get_data_by_sample(filename):
-    header, data = read_excel_data(filename)
-    haeded_data = headed_data_with_sample_num(header, data)
-    return group_by_sample(haeded_data)
+    return group_by_sample(iter_headed_data(filename))
 
 def open_file_with_default_program(filename):
     if os.path.isfile(filename):
@@ -79,7 +320,86 @@ def open_file_with_default_program(filename):
             subprocess.run(('xdg-open', filename))
     else:
         raise FileNotFoundError(f"No file found at {filename}")
-    
+
+def temp_file_beside(path: str, suffix: str = ".tmp") -> str:
+    """path와 같은 폴더에 빈 임시 파일을 만들고 경로를 반환합니다. (replace_file이 같은 파일 시스템 안에서 옮기도록)"""
+    fd, tmp = tempfile.mkstemp(suffix=suffix, dir=os.path.dirname(os.path.abspath(path)))
+    os.close(fd)
+    return tmp
+
+_umask: int = None
+
+def _current_umask() -> int:
+    global _umask
+    if _umask is None:
+        try:
+            # Linux는 umask를 바꾸지 않고 읽을 수 있음 (os.umask는 읽는 동안 다른 스레드에도 영향을 줌)
+            with open("/proc/self/status") as f:
+                _umask = next(int(line.split()[1], 8) for line in f if line.startswith("Umask:"))
+        except (OSError, StopIteration, ValueError, IndexError):
+            _umask = os.umask(0o022)
+            os.umask(_umask)
+    return _umask
+
+def replace_file(tmp: str, path: str):
+    """
+    temp_file_beside로 만든 tmp를 path로 옮깁니다.
+    mkstemp 파일은 소유자만 읽을 수 있으므로(0600) 먼저 기존 path의 권한을, path가 없으면 prs.save처럼
+    umask를 적용한 기본 권한을 줍니다.
+    """
+    try:
+        mode = stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        mode = 0o666 & ~_current_umask()
+    os.chmod(tmp, mode)
+    os.replace(tmp, path)
+
+def truncate_slides(prs, count):
+    """앞의 count개 슬라이드만 남기고 나머지를 삭제합니다. (생성한 슬라이드를 되돌릴 때 사용)"""
+    sldIdLst = prs.slides._sldIdLst
+    removed = list(sldIdLst)[count:]
+    for sldId in removed:
+        sldIdLst.remove(sldId)
+    # drop_rel은 호출마다 presentation.xml 전체에서 참조 수를 세므로, 남은 참조를 한 번만 모아서 비교
+    referenced = set(prs.part._element.xpath("//@r:id"))
+    for sldId in removed:
+        if sldId.rId not in referenced and sldId.rId in prs.part.rels:
+            prs.part.rels.pop(sldId.rId)
+
+class SlideAppender:
+    """
+    prs.slides.add_slide와 같은 슬라이드를 만들지만, 슬라이드 수에 비례하는 검색을 하지 않습니다.
+
+    python-pptx는 슬라이드를 추가할 때마다 기존 relationship 전체에서 같은 대상을 찾고(relate_to)
+    slide id 최댓값을 다시 계산해서 수천 페이지에서는 추가 비용이 페이지 수의 제곱으로 늘어납니다.
+    새 slide part는 기존 relationship과 겹칠 수 없으므로 바로 추가하고, slide id와 partname 번호는 직접 셉니다.
+    """
+    def __init__(self, prs):
+        self._prs = prs
+        self._sldIdLst = prs.slides._sldIdLst
+        self._next_id = self._sldIdLst._next_id
+        self._next_slide_num = len(self._sldIdLst) + 1
+
+    def next_partname(self) -> PackURI:
+        partname = PackURI(f"/ppt/slides/slide{self._next_slide_num}.xml")
+        self._next_slide_num += 1
+        return partname
+
+    def add_slide(self, slide_layout) -> Slide:
+        slide_part = SlidePart.new(self.next_partname(), self._prs.part.package, slide_layout.part)
+        slide = slide_part.slide
+        slide.shapes.clone_layout_placeholders(slide_layout)
+        self.append(slide_part)
+        return slide
+
+    def append(self, slide_part: SlidePart) -> str:
+        """이미 만들어진 slide part를 마지막 슬라이드로 추가하고 rId를 반환합니다."""
+        rId = self._prs.part.rels._add_relationship(RT.SLIDE, slide_part)
+        self._sldIdLst._add_sldId(id=self._next_id, rId=rId)
+        self._next_id += 1
+        return rId
+
+@profiled()
 def set_fill(source_shape, target_shape):
     try:
         if source_shape.fill.type is None:
@@ -103,19 +423,16 @@ def set_fill(source_shape, target_shape):
         elif source_shape.fill.type == MSO_FILL.PICTURE:
             import xml.etree.ElementTree as ET
             from pptx.oxml import parse_xml
-            from io import BytesIO
+            from .image_cache import ImagePartCache
             
             source_blipFill = source_shape.fill._xPr.find(qn('a:blipFill'))
             blip_elem = source_blipFill.find(qn('a:blip'))
             old_rId = blip_elem.get(qn('r:embed'))
 
-            # 원본 이미지 가져오기
-            source_image = source_shape.part.get_image(old_rId)
-            image_blob = BytesIO(source_image.blob)
-            
-            # target slide에 이미지 추가
-            target_slide_shapes = target_shape.part.slide.shapes
-            image_part, new_rId = target_slide_shapes.part.get_or_add_image_part(image_blob)
+            # 원본 이미지 part를 target slide에 연결 (패키지별 캐시로 이미지 해시/임베드는 한 번만)
+            source_image_part = source_shape.part.related_part(old_rId)
+            target_part = target_shape.part
+            new_rId = ImagePartCache.of(target_part.package).relate(target_part, source_image_part)
             
             # blipFill XML 복사
             blipFill_xml = ET.tostring(source_blipFill, encoding='unicode')
@@ -152,6 +469,7 @@ def set_base_shape(source_shape, target_shape): # BaseShape
     target_shape.rotation = source_shape.rotation
     set_shadow(source_shape.shadow, target_shape.shadow)
 
+@profiled()
 def set_text(source_shape, target_shape):
     """텍스트 프레임의 모든 paragraphs와 runs를 복사 (여러 글자 크기 처리)"""
     # TODO: 글자는 없는데 font size가 다른 경우 처리